@@ -1,42 +1,56 @@
 import random
+import time
 from typing import Tuple, Optional
-from Game.chess_engine import ChessEngine
+from Game.chess_engine import (
+    ChessEngine, SQUARE_COORDS, SQUARE_NAMES, PIECE_VALUES, MOVE_PROMOTION, MOVE_EN_PASSANT,
+    iter_squares, move_promotion
+)
+from Game.events import NULL_SINK
+from Game.transposition import TranspositionTable, EXACT, LOWER_BOUND, UPPER_BOUND
 
 class RandomBot:
     """Bot 1: Makes random legal moves"""
-    def __init__(self, color: str):
+    def __init__(self, color: str, sampling: bool = False, max_rejections: int = 16, sink=None):
+        """
+        With sampling, the move is drawn from the pseudo-legal moves and
+        only that one is checked for legality (see
+        ChessEngine.sample_legal_move), which is much cheaper than listing
+        every legal move. Moves are still picked uniformly.
+        Each chosen move is reported to sink (see Game.events); by default
+        nothing is reported.
+        """
         self.color = color  # 'w' or 'b'
+        self.sampling = sampling
+        self.max_rejections = max_rejections
+        self.sink = sink or NULL_SINK
     
     def get_move(self, engine: ChessEngine) -> Optional[Tuple[str, str]]:
-        # Get all legal moves for this bot's color
-        all_moves = []
-        for row in range(8):
-            for col in range(8):
-                piece = engine.board[row][col]
-                # Check if piece belongs to this bot
-                if piece != "  " and piece[0] == self.color:
-                    moves = engine.get_legal_moves_for_piece((row, col))
-                    for move in moves:
-                        all_moves.append(((row, col), move))
-        
-        if not all_moves:
-            return None
-        
-        # Choose a random move
-        from_pos, to_pos = random.choice(all_moves)
+        if self.sampling and engine.current_turn == self.color:
+            move = engine.sample_legal_move(random, self.max_rejections)
+            if move is None:
+                return None
+            from_pos, to_pos = SQUARE_COORDS[move & 63], SQUARE_COORDS[(move >> 6) & 63]
+        else:
+            # Get all legal moves for this bot's color
+            all_moves = engine.get_all_legal_moves(self.color)
+            
+            if not all_moves:
+                return None
+            
+            # Choose a random move
+            from_pos, to_pos = random.choice(all_moves)
         
         # Convert coordinates to algebraic notation
         from_sq = engine.coords_to_square(from_pos)
         to_sq = engine.coords_to_square(to_pos)
         
-        # IMPORTANT: Debug output
         piece = engine.board[from_pos[0]][from_pos[1]]
-        print(f"DEBUG RandomBot({self.color}): Moving {piece} from {from_sq} to {to_sq}")
+        self.sink.move("RandomBot", self.color, piece, from_sq, to_sq)
         
         # Verify we're not moving to same square
         if from_sq == to_sq:
             # Find any valid move
-            for from_pos2, to_pos2 in all_moves:
+            for from_pos2, to_pos2 in engine.get_all_legal_moves(self.color):
                 from_sq2 = engine.coords_to_square(from_pos2)
                 to_sq2 = engine.coords_to_square(to_pos2)
                 if from_sq2 != to_sq2:
@@ -48,46 +62,32 @@ class RandomBot:
 class CaptureBot(RandomBot):
     """Bot 2: Prefers capturing moves"""
     def get_move(self, engine: ChessEngine) -> Optional[Tuple[str, str]]:
-        # Get all legal moves for this bot's color
-        all_moves = []
-        for row in range(8):
-            for col in range(8):
-                piece = engine.board[row][col]
-                if piece != "  " and piece[0] == self.color:
-                    moves = engine.get_legal_moves_for_piece((row, col))
-                    for move in moves:
-                        all_moves.append(((row, col), move))
-        
-        if not all_moves:
-            return None
-        
-        # Look for capturing moves
+        # Look for capturing moves first; the staged generator only builds
+        # the quiet moves if there is nothing to take
         capture_moves = []
-        non_capture_moves = []
-        
-        for from_pos, to_pos in all_moves:
-            # Check if this move captures a piece
-            target_piece = engine.board[to_pos[0]][to_pos[1]]
-            if target_piece != "  " and target_piece[0] != self.color:
-                capture_moves.append((from_pos, to_pos))
-            else:
-                non_capture_moves.append((from_pos, to_pos))
+        if engine.current_turn == self.color:
+            for move in engine.iter_legal_moves(captures_only=True):
+                if engine.occupied >> ((move >> 6) & 63) & 1:
+                    capture_moves.append((SQUARE_COORDS[move & 63], SQUARE_COORDS[(move >> 6) & 63]))
         
         # Choose move
         if capture_moves:
             from_pos, to_pos = random.choice(capture_moves)
             move_type = "capture"
         else:
-            from_pos, to_pos = random.choice(non_capture_moves)
+            # Get all legal moves for this bot's color
+            all_moves = engine.get_all_legal_moves(self.color)
+            if not all_moves:
+                return None
+            from_pos, to_pos = random.choice(all_moves)
             move_type = "non-capture"
         
         # Convert to algebraic notation
         from_sq = engine.coords_to_square(from_pos)
         to_sq = engine.coords_to_square(to_pos)
         
-        # Debug output
         piece = engine.board[from_pos[0]][from_pos[1]]
-        print(f"DEBUG CaptureBot({self.color}): {move_type} with {piece} from {from_sq} to {to_sq}")
+        self.sink.move("CaptureBot", self.color, piece, from_sq, to_sq, {'type': move_type})
         
         # Verify not same square
         if from_sq == to_sq:
@@ -99,14 +99,7 @@ class CenterControlBot(RandomBot):
     """Bot 3: Prefers center squares"""
     def get_move(self, engine: ChessEngine) -> Optional[Tuple[str, str]]:
         # Get all legal moves for this bot's color
-        all_moves = []
-        for row in range(8):
-            for col in range(8):
-                piece = engine.board[row][col]
-                if piece != "  " and piece[0] == self.color:
-                    moves = engine.get_legal_moves_for_piece((row, col))
-                    for move in moves:
-                        all_moves.append(((row, col), move))
+        all_moves = engine.get_all_legal_moves(self.color)
         
         if not all_moves:
             return None
@@ -148,9 +141,8 @@ class CenterControlBot(RandomBot):
         from_sq = engine.coords_to_square(from_pos)
         to_sq = engine.coords_to_square(to_pos)
         
-        # Debug output
         piece = engine.board[from_pos[0]][from_pos[1]]
-        print(f"DEBUG CenterControlBot({self.color}): Moving {piece} from {from_sq} to {to_sq}")
+        self.sink.move("CenterControlBot", self.color, piece, from_sq, to_sq)
         
         # Verify not same square
         if from_sq == to_sq:
@@ -158,3 +150,281 @@ class CenterControlBot(RandomBot):
         
 
         return from_sq, to_sq
+
+
+MATE_SCORE = 100000
+MATE_THRESHOLD = MATE_SCORE - 1000  # scores beyond this are forced mates
+INFINITY = 1000000
+
+# Small positional bonuses: minor pieces and queens like the center,
+# pawns like to advance (indexed by square, white's point of view)
+CENTER_BONUS = [
+    int(5 * (3.5 - max(abs(row - 3.5), abs(col - 3.5)))) for row, col in SQUARE_COORDS
+]
+PAWN_ADVANCE_BONUS = {
+    'w': [5 * (6 - row) if 0 < row < 7 else 0 for row, col in SQUARE_COORDS],
+    'b': [5 * (row - 1) if 0 < row < 7 else 0 for row, col in SQUARE_COORDS],
+}
+
+
+class SearchAborted(Exception):
+    """Raised inside SearchBot's search when its time or node budget runs out"""
+
+
+class SearchBot(RandomBot):
+    """Bot 4: Looks ahead with alpha-beta search"""
+    def __init__(self, color: str, time_limit: Optional[float] = 1.0,
+                 node_limit: Optional[int] = None, max_depth: int = 32,
+                 tt_size_mb: float = 16, sink=None):
+        """
+        time_limit is wall-clock seconds per move and node_limit caps the
+        nodes searched per move; either can be None. The move returned is
+        the best one from the last depth that finished inside the budget.
+        tt_size_mb sets the transposition table size (0 disables it).
+        """
+        super().__init__(color, sink=sink)
+        self.time_limit = time_limit
+        self.node_limit = node_limit
+        self.max_depth = max_depth
+        self.tt = TranspositionTable(tt_size_mb) if tt_size_mb else None
+        self.nodes = 0
+        self.completed_depth = 0
+        self.killers = []
+        self._deadline = None
+
+    def get_move(self, engine: ChessEngine) -> Optional[Tuple[str, str]]:
+        # Search only works for the side to move
+        if engine.current_turn != self.color:
+            return super().get_move(engine)
+
+        root_moves = self._search_moves(engine)
+        if not root_moves:
+            return None
+
+        self.nodes = 0
+        self.completed_depth = 0
+        self.killers = [[None, None] for _ in range(self.max_depth + 64)]
+        self._deadline = time.perf_counter() + self.time_limit if self.time_limit is not None else None
+        history_length = len(engine.move_history)
+
+        best_move = self._order_moves(engine, root_moves, 0)[0]
+        best_score = 0
+        for depth in range(1, self.max_depth + 1):
+            try:
+                score, move = self._search_root(engine, root_moves, depth, best_move)
+            except SearchAborted:
+                # Unwind whatever the interrupted search left on the board
+                while len(engine.move_history) > history_length:
+                    engine.unmake_move()
+                break
+            best_move, best_score = move, score
+            self.completed_depth = depth
+            # A forced mate was found, searching deeper won't change the move
+            if abs(score) >= MATE_THRESHOLD:
+                break
+
+        from_sq = SQUARE_NAMES[best_move & 63]
+        to_sq = SQUARE_NAMES[(best_move >> 6) & 63]
+
+        piece = engine.get_piece_at(from_sq)
+        self.sink.move("SearchBot", self.color, piece, from_sq, to_sq,
+                       {'depth': self.completed_depth, 'score': best_score, 'nodes': self.nodes})
+
+        return from_sq, to_sq
+
+    def _check_budget(self):
+        """Count a node and stop the search once the budget is spent"""
+        self.nodes += 1
+        if self.node_limit is not None and self.nodes >= self.node_limit:
+            raise SearchAborted()
+        if self._deadline is not None and self.nodes & 255 == 0 and time.perf_counter() >= self._deadline:
+            raise SearchAborted()
+
+    def _search_root(self, engine, root_moves, depth, previous_best):
+        """Search every root move to depth; the previous best move goes first"""
+        ordered = self._order_moves(engine, root_moves, 0)
+        ordered.remove(previous_best)
+        ordered.insert(0, previous_best)
+
+        alpha, beta = -INFINITY, INFINITY
+        best_move = ordered[0]
+        for move in ordered:
+            engine._make_move_unchecked(move)
+            score = -self._negamax(engine, depth - 1, -beta, -alpha, 1)
+            engine.unmake_move()
+            if score > alpha:
+                alpha = score
+                best_move = move
+
+        if self.tt is not None:
+            self.tt.store(engine.hash, depth, EXACT, alpha, best_move)
+        return alpha, best_move
+
+    def _negamax(self, engine, depth, alpha, beta, ply):
+        """Alpha-beta search returning the score for the side to move"""
+        self._check_budget()
+
+        # Repetitions and the fifty-move rule are draws
+        if engine.halfmove_clock >= 100 or engine.repetition_count() >= 2:
+            return 0
+
+        if depth <= 0:
+            return self._quiescence(engine, alpha, beta, ply)
+
+        # Reuse an earlier search of this position if it went deep enough
+        original_alpha = alpha
+        tt_move = None
+        if self.tt is not None:
+            entry = self.tt.probe(engine.hash)
+            if entry is not None:
+                tt_depth, bound, tt_score, tt_move = entry
+                if tt_depth >= depth:
+                    tt_score = self._score_from_tt(tt_score, ply)
+                    if (bound == EXACT or
+                            (bound == LOWER_BOUND and tt_score >= beta) or
+                            (bound == UPPER_BOUND and tt_score <= alpha)):
+                        return tt_score
+
+        # Hash move, captures, killers, then quiet moves, generated lazily
+        # so a cutoff skips building the later stages
+        best_score = -INFINITY
+        best_move = None
+        for move in engine.iter_legal_moves(tt_move or 0, self.killers[ply]):
+            if move >> 14 == MOVE_PROMOTION and move_promotion(move) != 'Q':
+                continue
+            engine._make_move_unchecked(move)
+            score = -self._negamax(engine, depth - 1, -beta, -alpha, ply + 1)
+            engine.unmake_move()
+
+            if score > best_score:
+                best_score = score
+                best_move = move
+            if score > alpha:
+                alpha = score
+            if alpha >= beta:
+                # Remember quiet moves that cause cutoffs at this ply
+                if not self._is_capture(engine, move):
+                    killers = self.killers[ply]
+                    if killers[0] != move:
+                        killers[1] = killers[0]
+                        killers[0] = move
+                break
+
+        if best_move is None:
+            # Checkmate (prefer the quickest) or stalemate
+            return -MATE_SCORE + ply if engine.is_check() else 0
+
+        if self.tt is not None:
+            if best_score <= original_alpha:
+                bound = UPPER_BOUND
+            elif best_score >= beta:
+                bound = LOWER_BOUND
+            else:
+                bound = EXACT
+            self.tt.store(engine.hash, depth, bound, self._score_to_tt(best_score, ply),
+                          best_move)
+
+        return best_score
+
+    @staticmethod
+    def _search_moves(engine):
+        """Legal moves as packed ints, leaving out underpromotions"""
+        return [move for move in engine.legal_moves()
+                if move >> 14 != MOVE_PROMOTION or move_promotion(move) == 'Q']
+
+    @staticmethod
+    def _score_to_tt(score, ply):
+        """Store mate scores as distance from this node rather than from the root"""
+        if score >= MATE_THRESHOLD:
+            return score + ply
+        if score <= -MATE_THRESHOLD:
+            return score - ply
+        return score
+
+    @staticmethod
+    def _score_from_tt(score, ply):
+        """Inverse of _score_to_tt"""
+        if score >= MATE_THRESHOLD:
+            return score - ply
+        if score <= -MATE_THRESHOLD:
+            return score + ply
+        return score
+
+    def _quiescence(self, engine, alpha, beta, ply):
+        """Search captures only, so the evaluation isn't taken mid-exchange"""
+        self._check_budget()
+
+        stand_pat = self.evaluate(engine)
+        if stand_pat >= beta:
+            return stand_pat
+        if stand_pat > alpha:
+            alpha = stand_pat
+
+        # Winning captures come first, then the rest by MVV-LVA
+        for move in engine.iter_legal_moves(captures_only=True):
+            engine._make_move_unchecked(move)
+            score = -self._quiescence(engine, -beta, -alpha, ply + 1)
+            engine.unmake_move()
+
+            if score >= beta:
+                return score
+            if score > alpha:
+                alpha = score
+
+        return alpha
+
+    def _is_capture(self, engine, move):
+        """Check if a move captures (including en passant) or promotes"""
+        flag = move >> 14
+        if flag == MOVE_PROMOTION or flag == MOVE_EN_PASSANT:
+            return True
+        return bool(engine.occupied >> ((move >> 6) & 63) & 1)
+
+    def _mvv_lva(self, engine, move):
+        """Most valuable victim first, least valuable attacker as tie-break"""
+        from_row, from_col = SQUARE_COORDS[move & 63]
+        to_row, to_col = SQUARE_COORDS[(move >> 6) & 63]
+        attacker = engine.board[from_row][from_col]
+        victim = engine.board[to_row][to_col]
+        flag = move >> 14
+        score = 0
+        if victim != "  ":
+            score = 10 * PIECE_VALUES[victim[1]]
+        elif flag == MOVE_EN_PASSANT:
+            score = 10 * PIECE_VALUES['P']
+        if flag == MOVE_PROMOTION:
+            score += 10 * PIECE_VALUES[move_promotion(move)]
+        return score - PIECE_VALUES[attacker[1]]
+
+    def _order_moves(self, engine, moves, ply):
+        """Captures by MVV-LVA, then killer moves, then the other quiet moves"""
+        killers = self.killers[ply] if ply < len(self.killers) else [None, None]
+        scored = []
+        for move in moves:
+            if self._is_capture(engine, move):
+                score = 100000 + self._mvv_lva(engine, move)
+            elif move == killers[0]:
+                score = 90000
+            elif move == killers[1]:
+                score = 80000
+            else:
+                score = 0
+            scored.append((score, move))
+        scored.sort(key=lambda item: item[0], reverse=True)
+        return [move for _, move in scored]
+
+    def evaluate(self, engine: ChessEngine) -> int:
+        """Material and simple positional score, from the side to move's view"""
+        # The engine keeps the material balance up to date as pieces move
+        score = engine.material
+        bitboards = engine.bitboards
+        for color, sign in (('w', 1), ('b', -1)):
+            advance = PAWN_ADVANCE_BONUS[color]
+            bonus = 0
+            for sq in iter_squares(bitboards[color + 'P']):
+                bonus += advance[sq]
+            for piece_type in 'NBQ':
+                for sq in iter_squares(bitboards[color + piece_type]):
+                    bonus += CENTER_BONUS[sq]
+            score += sign * bonus
+        return score if engine.current_turn == 'w' else -score
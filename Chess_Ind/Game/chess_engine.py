@@ -1,17 +1,372 @@
+import random
+import re
+from array import array
+from collections import namedtuple
+from types import MappingProxyType
+
+# Bitboard layout: square index = row * 8 + col, so a8 is 0 and h1 is 63.
+# This matches board[row][col], where row 0 is rank 8.
+
+EMPTY = "  "
+PIECE_NAMES = [color + piece_type for color in "wb" for piece_type in "PNBRQK"]
+SQUARE_COORDS = [(sq // 8, sq % 8) for sq in range(64)]
+# 0 for light squares (a8 is light), 1 for dark
+SQUARE_SHADES = [(row + col) & 1 for row, col in SQUARE_COORDS]
+SQUARE_NAMES = [f"{'abcdefgh'[col]}{8 - row}" for row, col in SQUARE_COORDS]
+SQUARE_INDEX = {name: sq for sq, name in enumerate(SQUARE_NAMES)}
+
+# Moves are packed into 16 bits:
+#   bits 0-5    from square
+#   bits 6-11   to square
+#   bits 12-13  promotion piece, as an index into PROMOTION_CODES
+#   bits 14-15  flag: normal, promotion, en passant or castling
+MOVE_NORMAL, MOVE_PROMOTION, MOVE_EN_PASSANT, MOVE_CASTLING = 0, 1, 2, 3
+PROMOTION_CODES = 'NBRQ'
+_QUEEN_PROMOTION = (MOVE_PROMOTION << 14) | (PROMOTION_CODES.index('Q') << 12)
+
+# Material values in centipawns
+PIECE_VALUES = {'P': 100, 'N': 320, 'B': 330, 'R': 500, 'Q': 900, 'K': 0}
+
+
+def encode_move(from_sq, to_sq, promotion=None, flag=MOVE_NORMAL):
+    """Pack a move into a 16-bit int; promotion is 'N', 'B', 'R' or 'Q'"""
+    if promotion is not None:
+        return from_sq | (to_sq << 6) | (PROMOTION_CODES.index(promotion) << 12) | (MOVE_PROMOTION << 14)
+    return from_sq | (to_sq << 6) | (flag << 14)
+
+
+def move_from_square(move):
+    """Square index a packed move starts from"""
+    return move & 63
+
+
+def move_to_square(move):
+    """Square index a packed move goes to"""
+    return (move >> 6) & 63
+
+
+def move_promotion(move):
+    """Promotion piece letter of a packed move, or None"""
+    if move >> 14 == MOVE_PROMOTION:
+        return PROMOTION_CODES[(move >> 12) & 3]
+    return None
+
+
+def move_to_uci(move):
+    """Long algebraic name of a packed move, like 'e2e4' or 'a7a8q'"""
+    name = SQUARE_NAMES[move & 63] + SQUARE_NAMES[(move >> 6) & 63]
+    if move >> 14 == MOVE_PROMOTION:
+        name += PROMOTION_CODES[(move >> 12) & 3].lower()
+    return name
+
+
+# FEN letter of each piece, with '1' for an empty square
+FEN_CHARS = {piece: piece[1] if piece[0] == 'w' else piece[1].lower() for piece in PIECE_NAMES}
+FEN_CHARS[EMPTY] = '1'
+_EMPTY_RUNS = ['1' * length for length in range(8, 1, -1)]
+
+# Standard algebraic notation, once check and annotation marks are stripped:
+# piece, origin file and rank for disambiguation, target square, promotion
+SAN_PATTERN = re.compile(r"^([NBRQK])?([a-h])?([1-8])?x?([a-h][1-8])(?:=?([NBRQ]))?$")
+CASTLING_SAN = {'O-O': 2, '0-0': 2, 'O-O-O': -2, '0-0-0': -2}
+
+# PGN movetext tokens: comments, variation brackets, NAGs, results, move
+# numbers and moves. Anything else (stray punctuation) is skipped.
+MOVETEXT_TOKEN = re.compile(r"""
+    (?P<comment>\{[^}]*\}|;[^\n]*)
+  | (?P<open>\()
+  | (?P<close>\))
+  | (?P<nag>\$\d+)
+  | (?P<castling>[O0]-[O0](?:-[O0])?[+#!?]*)
+  | (?P<result>1-0|0-1|1/2-1/2|\*)
+  | (?P<number>\d+\.+)
+  | (?P<move>[a-hNBRQK][a-h1-8x=NBRQ]*[+#!?]*)
+""", re.VERBOSE)
+
+
+def tokenize_movetext(text):
+    """
+    Yield the SAN moves of the mainline in PGN movetext, skipping comments,
+    variations, NAGs, move numbers and the result
+    """
+    depth = 0
+    for match in MOVETEXT_TOKEN.finditer(text):
+        kind = match.lastgroup
+        if kind == 'open':
+            depth += 1
+        elif kind == 'close':
+            depth = max(0, depth - 1)
+        elif depth == 0 and (kind == 'move' or kind == 'castling'):
+            yield match.group()
+
+
+# Castling rights are kept as a 4-bit mask
+CASTLE_WK, CASTLE_WQ, CASTLE_BK, CASTLE_BQ = 1, 2, 4, 8
+CASTLING_FLAGS = {'wK': CASTLE_WK, 'wQ': CASTLE_WQ, 'bK': CASTLE_BK, 'bQ': CASTLE_BQ}
+# Rights that survive a move from or to each square (king and rook home squares)
+CASTLING_MASKS = [15] * 64
+CASTLING_MASKS[60] = 15 & ~(CASTLE_WK | CASTLE_WQ)  # e1
+CASTLING_MASKS[63] = 15 & ~CASTLE_WK                # h1
+CASTLING_MASKS[56] = 15 & ~CASTLE_WQ                # a1
+CASTLING_MASKS[4] = 15 & ~(CASTLE_BK | CASTLE_BQ)   # e8
+CASTLING_MASKS[7] = 15 & ~CASTLE_BK                 # h8
+CASTLING_MASKS[0] = 15 & ~CASTLE_BQ                 # a8
+
+# What make_move pushes onto move_history: the packed move, the captured
+# piece, the state a move can't reverse, the Zobrist key of the position
+# before the move and that position's cached move lists, so unmake_move
+# can hand them back.
+UndoRecord = namedtuple('UndoRecord', [
+    'move', 'captured_piece', 'castling', 'en_passant_target', 'halfmove_clock', 'hash',
+    'cache'
+])
+
+# Marks a cached value that hasn't been computed for the current position
+_NOT_COMPUTED = object()
+
+# Zobrist keys, from a fixed seed so hashes are stable between runs
+_zobrist_random = random.Random(20251)
+ZOBRIST_PIECES = {
+    piece: [_zobrist_random.getrandbits(64) for _ in range(64)] for piece in PIECE_NAMES
+}
+ZOBRIST_CASTLING = [_zobrist_random.getrandbits(64) for _ in range(16)]
+ZOBRIST_EN_PASSANT = [_zobrist_random.getrandbits(64) for _ in range(8)]  # by file
+ZOBRIST_BLACK_TO_MOVE = _zobrist_random.getrandbits(64)
+
+
+def _build_leaper_attacks(offsets):
+    """Build a per-square attack table for a piece that jumps by fixed offsets"""
+    table = []
+    for sq in range(64):
+        row, col = SQUARE_COORDS[sq]
+        mask = 0
+        for dr, dc in offsets:
+            r, c = row + dr, col + dc
+            if 0 <= r < 8 and 0 <= c < 8:
+                mask |= 1 << (r * 8 + c)
+        table.append(mask)
+    return table
+
+
+def _build_rays(dr, dc):
+    """Build a per-square table of every square along one direction"""
+    table = []
+    for sq in range(64):
+        row, col = SQUARE_COORDS[sq]
+        mask = 0
+        r, c = row + dr, col + dc
+        while 0 <= r < 8 and 0 <= c < 8:
+            mask |= 1 << (r * 8 + c)
+            r += dr
+            c += dc
+        table.append(mask)
+    return table
+
+
+KNIGHT_ATTACKS = _build_leaper_attacks([
+    (-2, -1), (-2, 1), (-1, -2), (-1, 2),
+    (1, -2), (1, 2), (2, -1), (2, 1)
+])
+KING_ATTACKS = _build_leaper_attacks([
+    (-1, -1), (-1, 0), (-1, 1), (0, -1),
+    (0, 1), (1, -1), (1, 0), (1, 1)
+])
+# Squares attacked by a pawn of the given color standing on each square
+PAWN_ATTACKS = {
+    'w': _build_leaper_attacks([(-1, -1), (-1, 1)]),
+    'b': _build_leaper_attacks([(1, -1), (1, 1)]),
+}
+# Single pushes of a pawn of the given color from each square, and double
+# pushes from its starting rank (the square passed over must also be empty)
+PAWN_PUSHES = {
+    'w': _build_leaper_attacks([(-1, 0)]),
+    'b': _build_leaper_attacks([(1, 0)]),
+}
+PAWN_DOUBLE_PUSHES = {
+    'w': [1 << (sq - 16) if sq // 8 == 6 else 0 for sq in range(64)],
+    'b': [1 << (sq + 16) if sq // 8 == 1 else 0 for sq in range(64)],
+}
+
+# Rays are split by whether they run towards higher square indices (the
+# nearest blocker is the lowest set bit) or lower ones (the highest set bit).
+RAYS = {
+    direction: _build_rays(*direction)
+    for direction in [(-1, -1), (-1, 0), (-1, 1), (0, -1),
+                      (0, 1), (1, -1), (1, 0), (1, 1)]
+}
+_ROOK_RAYS_UP = [RAYS[(1, 0)], RAYS[(0, 1)]]
+_ROOK_RAYS_DOWN = [RAYS[(-1, 0)], RAYS[(0, -1)]]
+_BISHOP_RAYS_UP = [RAYS[(1, 1)], RAYS[(1, -1)]]
+_BISHOP_RAYS_DOWN = [RAYS[(-1, -1)], RAYS[(-1, 1)]]
+
+
+def _slider_attacks(sq, occupied, rays_up, rays_down):
+    """Attacks along the given rays, stopping at (and including) the first blocker"""
+    attacks = 0
+    for rays in rays_up:
+        ray = rays[sq]
+        blockers = ray & occupied
+        if blockers:
+            ray ^= rays[(blockers & -blockers).bit_length() - 1]
+        attacks |= ray
+    for rays in rays_down:
+        ray = rays[sq]
+        blockers = ray & occupied
+        if blockers:
+            ray ^= rays[blockers.bit_length() - 1]
+        attacks |= ray
+    return attacks
+
+
+def rook_attacks(sq, occupied):
+    """Rook attack bitboard from sq for the given occupancy"""
+    return _slider_attacks(sq, occupied, _ROOK_RAYS_UP, _ROOK_RAYS_DOWN)
+
+
+def bishop_attacks(sq, occupied):
+    """Bishop attack bitboard from sq for the given occupancy"""
+    return _slider_attacks(sq, occupied, _BISHOP_RAYS_UP, _BISHOP_RAYS_DOWN)
+
+
+ALL_SQUARES = (1 << 64) - 1
+# Squares on the first and last rank, where pawns promote
+PROMOTION_SQUARES = 0xFF | (0xFF << 56)
+# Empty-board rook and bishop lines from each square
+ROOK_LINES = [rook_attacks(sq, 0) for sq in range(64)]
+BISHOP_LINES = [bishop_attacks(sq, 0) for sq in range(64)]
+
+
+def _build_between():
+    """BETWEEN[a][b] holds the squares strictly between two aligned squares"""
+    table = [[0] * 64 for _ in range(64)]
+    for sq in range(64):
+        for rays in RAYS.values():
+            ray = rays[sq]
+            while ray:
+                lsb = ray & -ray
+                target = lsb.bit_length() - 1
+                table[sq][target] = rays[sq] & ~rays[target] & ~lsb
+                ray ^= lsb
+    return table
+
+
+BETWEEN = _build_between()
+
+
+def iter_squares(bitboard):
+    """Yield the square index of every set bit, lowest first"""
+    while bitboard:
+        lsb = bitboard & -bitboard
+        yield lsb.bit_length() - 1
+        bitboard ^= lsb
+
+
+def bitboard_to_coords(bitboard):
+    """Convert a bitboard to a list of (row, col) tuples"""
+    coords = []
+    while bitboard:
+        lsb = bitboard & -bitboard
+        coords.append(SQUARE_COORDS[lsb.bit_length() - 1])
+        bitboard ^= lsb
+    return coords
+
+
+# The same tables as (row, col) lists, for code that walks the board array
+# instead of bitboards. Rays are ordered nearest square first.
+KNIGHT_TARGETS = [bitboard_to_coords(bb) for bb in KNIGHT_ATTACKS]
+KING_TARGETS = [bitboard_to_coords(bb) for bb in KING_ATTACKS]
+# Where a pawn of the given color must stand to attack each square
+PAWN_ATTACKERS = {
+    'w': [bitboard_to_coords(bb) for bb in PAWN_ATTACKS['b']],
+    'b': [bitboard_to_coords(bb) for bb in PAWN_ATTACKS['w']],
+}
+RAY_SQUARES = {
+    (dr, dc): [
+        [(row + dr * step, col + dc * step) for step in range(1, 8)
+         if 0 <= row + dr * step < 8 and 0 <= col + dc * step < 8]
+        for row, col in SQUARE_COORDS
+    ]
+    for dr, dc in RAYS
+}
+# Rays paired with the slider types that attack along them
+SLIDER_RAYS = [
+    (RAY_SQUARES[direction], ('R', 'Q') if 0 in direction else ('B', 'Q'))
+    for direction in RAYS
+]
+
+
+def _build_ray_beyond():
+    """
+    RAY_BEYOND[a][b] is, for aligned squares, the ray table that continues
+    past b heading away from a, and whether it runs towards higher indices
+    """
+    table = [[None] * 64 for _ in range(64)]
+    for (dr, dc), rays in RAYS.items():
+        up = dr * 8 + dc > 0
+        for sq in range(64):
+            for target in iter_squares(rays[sq]):
+                table[sq][target] = (rays, up)
+    return table
+
+
+RAY_BEYOND = _build_ray_beyond()
+
+
+def _ray_attacks(rays, up, sq, occupied):
+    """Attacks from sq along one ray, stopping at (and including) the first blocker"""
+    ray = rays[sq]
+    blockers = ray & occupied
+    if blockers:
+        if up:
+            ray ^= rays[(blockers & -blockers).bit_length() - 1]
+        else:
+            ray ^= rays[blockers.bit_length() - 1]
+    return ray
+
+
+def _add_attack_counts(counts, bitboard, delta):
+    """Add delta to counts[sq] for every square in bitboard"""
+    while bitboard:
+        lsb = bitboard & -bitboard
+        counts[lsb.bit_length() - 1] += delta
+        bitboard ^= lsb
+
+
 class ChessEngine:
-    def __init__(self, fen_string=None):
+    def __init__(self, fen_string=None, track_attacks=False):
         """
         Initialize chess board.
         If fen_string is provided, load from FEN notation.
         Otherwise, start with standard position.
+
+        With track_attacks, attack_counts[color][sq] holds how many of
+        color's pieces attack each square, updated as pieces move. That
+        makes is_square_attacked a lookup, at some cost to every move.
+
+        The position is stored as bitboards (one 64-bit int per piece,
+        plus occupancy masks per color). self.board is a view of the same
+        position as 8 rows of two-character strings, kept in sync by the
+        engine; change the position through make_move/load_from_fen rather
+        than by writing to it.
         """
-        self.board = [["  " for _ in range(8)] for _ in range(8)]
+        self.board = [[EMPTY for _ in range(8)] for _ in range(8)]
+        self.bitboards = {piece: 0 for piece in PIECE_NAMES}
+        self.occupancy = {'w': 0, 'b': 0}
+        self.occupied = 0
+        self.king_squares = {'w': None, 'b': None}  # square index of each king
+        self.piece_counts = {piece: 0 for piece in PIECE_NAMES}
+        self.bishop_shades = {'w': [0, 0], 'b': [0, 0]}  # bishops on [light, dark] squares
+        self.material = 0  # white's material minus black's, in centipawns
         self.current_turn = 'w'  # 'w' for white, 'b' for black
-        self.castling_rights = {'wK': True, 'wQ': True, 'bK': True, 'bQ': True}
+        self.castling = CASTLE_WK | CASTLE_WQ | CASTLE_BK | CASTLE_BQ
         self.en_passant_target = None  # Square where en passant capture is possible
         self.halfmove_clock = 0  # Moves since last capture or pawn advance
         self.fullmove_number = 1
-        self.move_history = []
+        self.move_history = []  # UndoRecord per move made
+        self.hash = 0  # Zobrist key of the current position
+        self.track_attacks = track_attacks
+        self.attack_counts = None  # per-color attack counts by square, if tracked
+        self._clear_cache()
         
         if fen_string:
             self.load_from_fen(fen_string)
@@ -43,19 +398,146 @@ class ChessEngine:
         self.board[0][7] = "bR"
         for i in range(8):
             self.board[1][i] = "bP"
-    
+
+        self._sync_bitboards()
+        self.hash = self._compute_hash()
+        self._clear_cache()
+
+    def _sync_bitboards(self):
+        """Rebuild bitboards and occupancy masks from the board view"""
+        self.bitboards = {piece: 0 for piece in PIECE_NAMES}
+        for sq in range(64):
+            row, col = SQUARE_COORDS[sq]
+            piece = self.board[row][col]
+            if piece != EMPTY:
+                self.bitboards[piece] |= 1 << sq
+
+        self.occupancy = {'w': 0, 'b': 0}
+        for piece, bitboard in self.bitboards.items():
+            self.occupancy[piece[0]] |= bitboard
+        self.occupied = self.occupancy['w'] | self.occupancy['b']
+
+        self.king_squares = {'w': None, 'b': None}
+        for color in 'wb':
+            king_bitboard = self.bitboards[color + 'K']
+            if king_bitboard:
+                self.king_squares[color] = king_bitboard.bit_length() - 1
+
+        self.piece_counts = {piece: bin(bitboard).count("1") for piece, bitboard in self.bitboards.items()}
+        self.bishop_shades = {'w': [0, 0], 'b': [0, 0]}
+        for color in 'wb':
+            for sq in iter_squares(self.bitboards[color + 'B']):
+                self.bishop_shades[color][SQUARE_SHADES[sq]] += 1
+        self.material = sum(PIECE_VALUES[piece[1]] * count * (1 if piece[0] == 'w' else -1)
+                            for piece, count in self.piece_counts.items())
+
+        if self.track_attacks:
+            self._rebuild_attack_maps()
+
+    def _rebuild_attack_maps(self):
+        """Count the attackers of every square from scratch"""
+        self.attack_counts = {'w': [0] * 64, 'b': [0] * 64}
+        for sq in iter_squares(self.occupied):
+            row, col = SQUARE_COORDS[sq]
+            piece = self.board[row][col]
+            _add_attack_counts(self.attack_counts[piece[0]],
+                               self._piece_attacks(sq, piece, self.occupied), 1)
+
+    def _piece_attacks(self, sq, piece, occupied):
+        """Bitboard of squares attacked by piece standing on sq"""
+        piece_type = piece[1]
+        if piece_type == 'P':
+            return PAWN_ATTACKS[piece[0]][sq]
+        if piece_type == 'N':
+            return KNIGHT_ATTACKS[sq]
+        if piece_type == 'K':
+            return KING_ATTACKS[sq]
+        if piece_type == 'B':
+            return bishop_attacks(sq, occupied)
+        if piece_type == 'R':
+            return rook_attacks(sq, occupied)
+        return bishop_attacks(sq, occupied) | rook_attacks(sq, occupied)
+
+    def _update_rays_through(self, sq, delta):
+        """
+        Adjust the attack counts of every slider whose ray reaches sq for
+        the squares beyond it: -1 when sq gets blocked, +1 when it clears.
+        Neither the sliders found nor the squares beyond depend on whether
+        sq itself is occupied, so this works before or after the change.
+        """
+        occupied = self.occupied
+        bitboards = self.bitboards
+        diagonal = bishop_attacks(sq, occupied)
+        straight = rook_attacks(sq, occupied)
+        for color in 'wb':
+            queens = bitboards[color + 'Q']
+            sliders = ((diagonal & (bitboards[color + 'B'] | queens)) |
+                       (straight & (bitboards[color + 'R'] | queens)))
+            counts = self.attack_counts[color]
+            for slider_sq in iter_squares(sliders):
+                rays, up = RAY_BEYOND[slider_sq][sq]
+                _add_attack_counts(counts, _ray_attacks(rays, up, sq, occupied), delta)
+
+    def _put_piece(self, sq, piece):
+        """Place a piece on an empty square"""
+        if self.track_attacks:
+            self._update_rays_through(sq, -1)
+            _add_attack_counts(self.attack_counts[piece[0]],
+                               self._piece_attacks(sq, piece, self.occupied), 1)
+        row, col = SQUARE_COORDS[sq]
+        self.board[row][col] = piece
+        bit = 1 << sq
+        self.bitboards[piece] |= bit
+        self.occupancy[piece[0]] |= bit
+        self.occupied |= bit
+        self.hash ^= ZOBRIST_PIECES[piece][sq]
+        self.piece_counts[piece] += 1
+        if piece[0] == 'w':
+            self.material += PIECE_VALUES[piece[1]]
+        else:
+            self.material -= PIECE_VALUES[piece[1]]
+        if piece[1] == 'K':
+            self.king_squares[piece[0]] = sq
+        elif piece[1] == 'B':
+            self.bishop_shades[piece[0]][SQUARE_SHADES[sq]] += 1
+
+    def _remove_piece(self, sq):
+        """Clear a square and return the piece that was on it"""
+        row, col = SQUARE_COORDS[sq]
+        piece = self.board[row][col]
+        if piece != EMPTY:
+            if self.track_attacks:
+                _add_attack_counts(self.attack_counts[piece[0]],
+                                   self._piece_attacks(sq, piece, self.occupied), -1)
+                self._update_rays_through(sq, 1)
+            bit = 1 << sq
+            self.bitboards[piece] ^= bit
+            self.occupancy[piece[0]] ^= bit
+            self.occupied ^= bit
+            self.hash ^= ZOBRIST_PIECES[piece][sq]
+            self.board[row][col] = EMPTY
+            self.piece_counts[piece] -= 1
+            if piece[0] == 'w':
+                self.material -= PIECE_VALUES[piece[1]]
+            else:
+                self.material += PIECE_VALUES[piece[1]]
+            if piece[1] == 'B':
+                self.bishop_shades[piece[0]][SQUARE_SHADES[sq]] -= 1
+        return piece
+
     def load_from_fen(self, fen_string):
         """Load position from FEN notation"""
         parts = fen_string.split()
         if len(parts) < 4:
             raise ValueError("Invalid FEN string")
-        
+
         # Parse board position
         board_part = parts[0]
         rows = board_part.split('/')
         if len(rows) != 8:
             raise ValueError("FEN must have 8 rows")
-        
+
+        self.board = [[EMPTY for _ in range(8)] for _ in range(8)]
         for row_idx, row in enumerate(rows):
             col_idx = 0
             for char in row:
@@ -66,38 +548,105 @@ class ChessEngine:
                     piece_type = char.upper()
                     self.board[row_idx][col_idx] = f"{color}{piece_type}"
                     col_idx += 1
-        
+        self._sync_bitboards()
+
         # Parse current turn
         self.current_turn = parts[1].lower()
         
         # Parse castling rights
-        self.castling_rights = {'wK': False, 'wQ': False, 'bK': False, 'bQ': False}
+        self.castling = 0
         if parts[2] != '-':
             for char in parts[2]:
-                if char == 'K': self.castling_rights['wK'] = True
-                elif char == 'Q': self.castling_rights['wQ'] = True
-                elif char == 'k': self.castling_rights['bK'] = True
-                elif char == 'q': self.castling_rights['bQ'] = True
+                if char == 'K': self.castling |= CASTLE_WK
+                elif char == 'Q': self.castling |= CASTLE_WQ
+                elif char == 'k': self.castling |= CASTLE_BK
+                elif char == 'q': self.castling |= CASTLE_BQ
         
         # Parse en passant target
         if parts[3] != '-':
             self.en_passant_target = self.square_to_coords(parts[3])
         else:
             self.en_passant_target = None
+
+        # Parse move counters (optional in shortened FENs)
+        self.halfmove_clock = int(parts[4]) if len(parts) > 4 else 0
+        self.fullmove_number = int(parts[5]) if len(parts) > 5 else 1
+        self.move_history = []
+        self.hash = self._compute_hash()
+        self._clear_cache()
+
+    def _compute_hash(self):
+        """Compute the Zobrist key of the current position from scratch"""
+        key = 0
+        for piece, bitboard in self.bitboards.items():
+            for sq in iter_squares(bitboard):
+                key ^= ZOBRIST_PIECES[piece][sq]
+        return key ^ self._state_hash()
+
+    def _state_hash(self):
+        """Zobrist key of the side to move, castling rights and en passant file"""
+        key = ZOBRIST_CASTLING[self.castling]
+        if self.current_turn == 'b':
+            key ^= ZOBRIST_BLACK_TO_MOVE
+        # Only hash the en passant file when a capture is actually possible,
+        # so the same position after a double push still repeats
+        ep_sq = self._capturable_en_passant()
+        if ep_sq is not None:
+            key ^= ZOBRIST_EN_PASSANT[ep_sq & 7]
+        return key
+
+    def _capturable_en_passant(self, legal=False):
+        """
+        The en passant square if a pawn of the side to move attacks it, else
+        None. With legal=True one of those captures must also be legal (no
+        pin or check stops it), which is when python-chess writes it in a FEN.
+        """
+        if self.en_passant_target is None:
+            return None
+        ep_row, ep_col = self.en_passant_target
+        ep_sq = ep_row * 8 + ep_col
+        mover = self.current_turn
+        other = 'b' if mover == 'w' else 'w'
+        attackers = PAWN_ATTACKS[other][ep_sq] & self.bitboards[mover + 'P']
+        if not attackers:
+            return None
+        if legal and not any(self._is_legal_cached(encode_move(from_sq, ep_sq, flag=MOVE_EN_PASSANT))
+                             for from_sq in iter_squares(attackers)):
+            return None
+        return ep_sq
+
+    @property
+    def castling_rights(self):
+        """
+        Castling rights as a read-only mapping keyed by 'wK', 'wQ', 'bK' and
+        'bQ'. It is a snapshot of the castling bits, so writing to it raises;
+        assign a whole dict to castling_rights to change the rights.
+        """
+        return MappingProxyType({name: bool(self.castling & flag) for name, flag in CASTLING_FLAGS.items()})
+
+    @castling_rights.setter
+    def castling_rights(self, rights):
+        castling = 0
+        for name, flag in CASTLING_FLAGS.items():
+            if rights.get(name):
+                castling |= flag
+        # Keep the Zobrist key in step, and drop moves worked out with the old rights
+        self.hash ^= ZOBRIST_CASTLING[self.castling] ^ ZOBRIST_CASTLING[castling]
+        self.castling = castling
+        self._clear_cache()
     
     def square_to_coords(self, square):
         """Convert algebraic notation to board coordinates"""
-        if len(square) != 2:
+        sq = SQUARE_INDEX.get(square)
+        if sq is None:
             return None
-        col = ord(square[0]) - ord('a')
-        row = 8 - int(square[1])
-        return (row, col)
+        return SQUARE_COORDS[sq]
     
     def coords_to_square(self, coords):
         """Convert board coordinates to algebraic notation"""
         row, col = coords
         if 0 <= row < 8 and 0 <= col < 8:
-            return f"{chr(col + ord('a'))}{8 - row}"
+            return SQUARE_NAMES[row * 8 + col]
         return None
     
     def get_piece_at(self, square):
@@ -119,22 +668,420 @@ class ChessEngine:
         row, col = coords
         return 0 <= row < 8 and 0 <= col < 8
     
+    def piece_squares(self, color):
+        """Get the (row, col) of every piece of the given color"""
+        return bitboard_to_coords(self.occupancy[color])
+
+    def _clear_cache(self):
+        """Forget the legal moves and check status worked out for the old position"""
+        self._cached_check_info = _NOT_COMPUTED
+        self._cached_moves = None
+        self._cached_move_coords = None
+
     def get_all_legal_moves(self, color=None):
-        """Get all legal moves for the given color"""
-        if color is None:
-            color = self.current_turn
-        
-        all_moves = []
-        for row in range(8):
-            for col in range(8):
-                piece = self.board[row][col]
-                if piece != "  " and piece[0] == color:
-                    moves = self.get_legal_moves_for_piece((row, col))
-                    all_moves.extend([((row, col), move) for move in moves])
-        
-        return all_moves
+        """
+        Get all legal moves for the given color as ((row, col), (row, col)).
+        Promotions appear once (make_move takes the piece separately).
+        For the side to move the list is cached until the position changes,
+        so callers must not modify it.
+        """
+        if color is None or color == self.current_turn:
+            if self._cached_move_coords is None:
+                self._cached_move_coords = self._moves_to_coords(self.legal_moves())
+            return self._cached_move_coords
+        return self._moves_to_coords(self.legal_moves(color))
+
+    def _moves_to_coords(self, moves):
+        """Convert packed moves to coordinate pairs, listing each promotion once"""
+        return [(SQUARE_COORDS[move & 63], SQUARE_COORDS[(move >> 6) & 63])
+                for move in moves
+                if move >> 14 != MOVE_PROMOTION or move & 0xF000 == _QUEEN_PROMOTION]
+
+    def legal_moves(self, color=None):
+        """
+        Get all legal moves for the given color as an array('H') of packed moves.
+        Cached for the side to move, like get_all_legal_moves.
+        """
+        if color is None or color == self.current_turn:
+            if self._cached_moves is None:
+                self._cached_moves = self._generate_legal_moves(self.current_turn)
+            return self._cached_moves
+        return self._generate_legal_moves(color)
+
+    def _generate_legal_moves(self, color):
+        """Generate all legal moves for the given color as packed moves"""
+        moves = array('H')
+        check_info = self._check_info(color)
+        if check_info is None:
+            return moves
+
+        append = moves.append
+        ep_sq = -1
+        if self.en_passant_target is not None and color == self.current_turn:
+            ep_row, ep_col = self.en_passant_target
+            ep_sq = ep_row * 8 + ep_col
+        pawns = self.bitboards[color + 'P']
+        king_sq = check_info[0]
+
+        for from_sq in iter_squares(self.occupancy[color]):
+            targets = self._legal_targets(from_sq, check_info)
+            if (pawns >> from_sq) & 1:
+                for to_sq in iter_squares(targets):
+                    move = from_sq | (to_sq << 6)
+                    if (PROMOTION_SQUARES >> to_sq) & 1:
+                        # Queen first, it's the promotion callers want most
+                        for code in (3, 2, 1, 0):
+                            append(move | (code << 12) | (MOVE_PROMOTION << 14))
+                    elif to_sq == ep_sq:
+                        append(move | (MOVE_EN_PASSANT << 14))
+                    else:
+                        append(move)
+            elif from_sq == king_sq:
+                for to_sq in iter_squares(targets):
+                    if abs(to_sq - from_sq) == 2:
+                        append(from_sq | (to_sq << 6) | (MOVE_CASTLING << 14))
+                    else:
+                        append(from_sq | (to_sq << 6))
+            else:
+                while targets:
+                    lsb = targets & -targets
+                    append(from_sq | ((lsb.bit_length() - 1) << 6))
+                    targets ^= lsb
+        return moves
     
-        # Add to ChessEngine class in chess_engine.py
+    def iter_legal_moves(self, hash_move=0, killers=(), captures_only=False):
+        """
+        Yield the side to move's legal moves as packed moves, in stages:
+        the hash move, captures that win material or take an undefended
+        piece, the other captures and queen promotions, the killer moves,
+        then the remaining quiet moves (castling and underpromotions
+        included). Each stage is only built once the caller asks for a
+        move from it; with captures_only the quiet stages are skipped.
+        """
+        color = self.current_turn
+        check_info = self._check_info(color)
+        if check_info is None:
+            return
+
+        if hash_move and self.is_legal(hash_move):
+            yield hash_move
+        else:
+            hash_move = 0
+
+        # Stage 2 and 3: captures and promotions
+        enemy = 'b' if color == 'w' else 'w'
+        enemy_pieces = self.occupancy[enemy]
+        ep_bit = 0
+        if self.en_passant_target is not None:
+            ep_row, ep_col = self.en_passant_target
+            ep_bit = 1 << (ep_row * 8 + ep_col)
+        board = self.board
+        pieces = []
+        winning = []
+        others = []
+        pawn_mask = enemy_pieces | ep_bit | PROMOTION_SQUARES
+        for from_sq in iter_squares(self.occupancy[color]):
+            from_row, from_col = SQUARE_COORDS[from_sq]
+            piece_type = board[from_row][from_col][1]
+            pieces.append((from_sq, piece_type))
+            attacker = PIECE_VALUES[piece_type]
+            is_pawn = piece_type == 'P'
+            # Only the capture (and promotion) targets; quiet ones wait for stage 5
+            targets = self._legal_targets(from_sq, check_info, castling=False,
+                                          mask=pawn_mask if is_pawn else enemy_pieces)
+            captures = targets & (enemy_pieces | ep_bit) if is_pawn else targets
+            occupied = self.occupied ^ (1 << from_sq)
+            for to_sq in iter_squares(captures):
+                move = from_sq | (to_sq << 6)
+                to_row, to_col = SQUARE_COORDS[to_sq]
+                victim = board[to_row][to_col]
+                if victim == EMPTY:
+                    move |= MOVE_EN_PASSANT << 14
+                    victim_value = PIECE_VALUES['P']
+                else:
+                    victim_value = PIECE_VALUES[victim[1]]
+                score = 10 * victim_value - attacker
+                if is_pawn and (PROMOTION_SQUARES >> to_sq) & 1:
+                    move |= _QUEEN_PROMOTION
+                    score += 10 * PIECE_VALUES['Q']
+                if victim_value >= attacker or not self._attackers_to(to_sq, enemy, occupied):
+                    winning.append((score, move))
+                else:
+                    others.append((score, move))
+            if is_pawn:
+                for to_sq in iter_squares(targets & PROMOTION_SQUARES & ~enemy_pieces):
+                    others.append((10 * PIECE_VALUES['Q'], from_sq | (to_sq << 6) | _QUEEN_PROMOTION))
+
+        for stage in (winning, others):
+            stage.sort(reverse=True)
+            for _, move in stage:
+                if move != hash_move:
+                    yield move
+        if captures_only:
+            return
+
+        # Stage 4: killer moves, if they are legal quiet moves here
+        played = [hash_move]
+        for move in killers:
+            if (move and move not in played and not (enemy_pieces >> ((move >> 6) & 63)) & 1 and
+                    move >> 14 != MOVE_EN_PASSANT and move >> 14 != MOVE_PROMOTION and self.is_legal(move)):
+                played.append(move)
+                yield move
+
+        # Stage 5: everything else
+        king_sq = check_info[0]
+        quiet_mask = ~enemy_pieces
+        # Pawns also need every promotion square again, for the underpromotions
+        quiet_pawn_mask = ~(enemy_pieces | ep_bit) | PROMOTION_SQUARES
+        for from_sq, piece_type in pieces:
+            if piece_type == 'P':
+                targets = self._legal_targets(from_sq, check_info, castling=False, mask=quiet_pawn_mask)
+                quiet = targets & ~PROMOTION_SQUARES
+                for to_sq in iter_squares(targets & PROMOTION_SQUARES):
+                    move = from_sq | (to_sq << 6) | (MOVE_PROMOTION << 14)
+                    for code in (2, 1, 0):
+                        if move | (code << 12) != hash_move:
+                            yield move | (code << 12)
+            else:
+                quiet = self._legal_targets(from_sq, check_info, castling=False, mask=quiet_mask)
+                if from_sq == king_sq and not check_info[1]:
+                    for to_sq in iter_squares(self._castling_targets(color)):
+                        move = from_sq | (to_sq << 6) | (MOVE_CASTLING << 14)
+                        if move not in played:
+                            yield move
+            for to_sq in iter_squares(quiet):
+                move = from_sq | (to_sq << 6)
+                if move not in played:
+                    yield move
+
+    def is_legal(self, move):
+        """Check a packed move for the side to move, without building the move list"""
+        from_sq = move & 63
+        to_sq = (move >> 6) & 63
+        flag = move >> 14
+        row, col = SQUARE_COORDS[from_sq]
+        piece = self.board[row][col]
+        if piece == EMPTY or piece[0] != self.current_turn:
+            return False
+        check_info = self._check_info(piece[0])
+        if check_info is None or not (self._legal_targets(from_sq, check_info) >> to_sq) & 1:
+            return False
+
+        # The flag has to be the one the move generator would give it
+        if piece[1] == 'P' and (PROMOTION_SQUARES >> to_sq) & 1:
+            return flag == MOVE_PROMOTION
+        if flag == MOVE_PROMOTION or (move >> 12) & 3:
+            return False
+        if piece[1] == 'P' and SQUARE_COORDS[to_sq] == self.en_passant_target:
+            return flag == MOVE_EN_PASSANT
+        if piece[1] == 'K' and abs(to_sq - from_sq) == 2:
+            return flag == MOVE_CASTLING
+        return flag == MOVE_NORMAL
+
+    def _pseudo_legal_targets(self, color):
+        """
+        (from_sq, targets) for each of color's pieces, where targets follow
+        the piece rules but may leave the king in check. Castling is left
+        out, since its legality needs more than a king-safety test.
+        """
+        own = self.occupancy[color]
+        occupied = self.occupied
+        bitboards = self.bitboards
+        pieces = []
+        for from_sq in iter_squares(bitboards[color + 'P']):
+            pieces.append((from_sq, self._pawn_targets(from_sq, color)))
+        for from_sq in iter_squares(bitboards[color + 'N']):
+            pieces.append((from_sq, KNIGHT_ATTACKS[from_sq] & ~own))
+        for from_sq in iter_squares(bitboards[color + 'B']):
+            pieces.append((from_sq, bishop_attacks(from_sq, occupied) & ~own))
+        for from_sq in iter_squares(bitboards[color + 'R']):
+            pieces.append((from_sq, rook_attacks(from_sq, occupied) & ~own))
+        for from_sq in iter_squares(bitboards[color + 'Q']):
+            pieces.append((from_sq, (bishop_attacks(from_sq, occupied) |
+                                     rook_attacks(from_sq, occupied)) & ~own))
+        for from_sq in iter_squares(bitboards[color + 'K']):
+            pieces.append((from_sq, KING_ATTACKS[from_sq] & ~own))
+        return pieces
+
+    def sample_legal_move(self, rng=random, max_rejections=16):
+        """
+        Pick a uniformly random legal move for the side to move as a packed
+        move (promotions count once, as in get_all_legal_moves), or None.
+
+        Draws a pseudo-legal move by index across the per-piece target
+        bitboards, without listing the moves, and checks only the one
+        drawn, redrawing if it leaves the king in check. Every legal move
+        is equally likely on each draw, so the result stays uniform. After
+        max_rejections misses (e.g. in check, where most moves are
+        illegal) it falls back to the full legal move list.
+        """
+        color = self.current_turn
+        if self._cached_moves is None and self.king_squares[color] is not None:
+            pieces = self._pseudo_legal_targets(color)
+            counts = [bin(targets).count("1") for _, targets in pieces]
+            castling = []
+            if self.castling:
+                king_sq = self.king_squares[color]
+                castling = [king_sq | (to_sq << 6) | (MOVE_CASTLING << 14)
+                            for to_sq in iter_squares(self._castling_targets(color))]
+            total = sum(counts) + len(castling)
+
+            for _ in range(max_rejections if total else 0):
+                index = rng.randrange(total)
+                for (from_sq, targets), count in zip(pieces, counts):
+                    if index < count:
+                        break
+                    index -= count
+                else:
+                    # Castling targets were checked in full already
+                    return castling[index]
+
+                # Take the index-th set bit of the piece's targets
+                for _ in range(index):
+                    targets &= targets - 1
+                to_sq = (targets & -targets).bit_length() - 1
+                if self._is_move_legal(SQUARE_COORDS[from_sq], SQUARE_COORDS[to_sq], color):
+                    return self._encode_legal(from_sq, to_sq)
+
+        moves = [move for move in self.legal_moves()
+                 if move >> 14 != MOVE_PROMOTION or move & 0xF000 == _QUEEN_PROMOTION]
+        return rng.choice(moves) if moves else None
+
+    def _is_legal_cached(self, move):
+        """is_legal, answered from the cached move list when there is one"""
+        if self._cached_moves is not None:
+            return move in self._cached_moves
+        return self.is_legal(move)
+
+    def _encode_legal(self, from_sq, to_sq, promotion='Q'):
+        """Pack a move by the side to move, working out its flag from the board"""
+        row, col = SQUARE_COORDS[from_sq]
+        piece_type = self.board[row][col][1]
+        if piece_type == 'P':
+            if (PROMOTION_SQUARES >> to_sq) & 1:
+                return encode_move(from_sq, to_sq, promotion)
+            if SQUARE_COORDS[to_sq] == self.en_passant_target:
+                return encode_move(from_sq, to_sq, flag=MOVE_EN_PASSANT)
+        elif piece_type == 'K' and abs(to_sq - from_sq) == 2:
+            return encode_move(from_sq, to_sq, flag=MOVE_CASTLING)
+        return from_sq | (to_sq << 6)
+
+    def parse_san(self, san):
+        """
+        Packed move for a move by the side to move in standard algebraic
+        notation, like 'Nbd7', 'exd6', 'e8=Q+' or 'O-O'.
+        Raises ValueError if the move is malformed, illegal or ambiguous.
+        """
+        color = self.current_turn
+        text = san.rstrip('+#!?')
+        if text in CASTLING_SAN:
+            king_sq = self.king_squares[color]
+            move = 0
+            if king_sq is not None:
+                move = king_sq | ((king_sq + CASTLING_SAN[text]) << 6) | (MOVE_CASTLING << 14)
+            if not move or not self.is_legal(move):
+                raise ValueError(f"illegal move {san!r} in {self.get_fen()}")
+            return move
+
+        match = SAN_PATTERN.match(text)
+        if not match:
+            raise ValueError(f"invalid SAN move {san!r}")
+        piece_type, from_file, from_rank, target, promotion = match.groups()
+        to_sq = SQUARE_INDEX[target]
+
+        # Squares a piece of this type could have come from
+        pieces = self.bitboards[color + (piece_type or 'P')]
+        if piece_type is None:
+            if from_file is not None and from_file != target[0]:
+                origins = PAWN_ATTACKS['b' if color == 'w' else 'w'][to_sq]
+            else:
+                step = 8 if color == 'w' else -8
+                origins = 1 << (to_sq + step) if 0 <= to_sq + step < 64 else 0
+                if not origins & pieces and not origins & self.occupied:
+                    double = to_sq + 2 * step
+                    start_row = 6 if color == 'w' else 1
+                    origins = 1 << double if 0 <= double < 64 and double // 8 == start_row else 0
+        elif piece_type == 'N':
+            origins = KNIGHT_ATTACKS[to_sq]
+        elif piece_type == 'B':
+            origins = bishop_attacks(to_sq, self.occupied)
+        elif piece_type == 'R':
+            origins = rook_attacks(to_sq, self.occupied)
+        elif piece_type == 'Q':
+            origins = bishop_attacks(to_sq, self.occupied) | rook_attacks(to_sq, self.occupied)
+        else:
+            origins = KING_ATTACKS[to_sq]
+
+        promoting = piece_type is None and (PROMOTION_SQUARES >> to_sq) & 1
+        if promoting != (promotion is not None):
+            raise ValueError(f"invalid SAN move {san!r}: promotion does not match the target")
+
+        found = []
+        for from_sq in iter_squares(origins & pieces):
+            name = SQUARE_NAMES[from_sq]
+            if (from_file is not None and name[0] != from_file) or \
+                    (from_rank is not None and name[1] != from_rank):
+                continue
+            move = self._encode_legal(from_sq, to_sq, promotion or 'Q')
+            if self.is_legal(move):
+                found.append(move)
+        if len(found) != 1:
+            problem = "illegal" if not found else "ambiguous"
+            raise ValueError(f"{problem} move {san!r} in {self.get_fen()}")
+        return found[0]
+
+    def san(self, move):
+        """Standard algebraic notation for a legal packed move by the side to move"""
+        from_sq = move & 63
+        to_sq = (move >> 6) & 63
+        flag = move >> 14
+        if flag == MOVE_CASTLING:
+            name = 'O-O' if to_sq > from_sq else 'O-O-O'
+        else:
+            row, col = SQUARE_COORDS[from_sq]
+            piece_type = self.board[row][col][1]
+            capture = (self.occupied >> to_sq) & 1 or flag == MOVE_EN_PASSANT
+            if piece_type == 'P':
+                name = SQUARE_NAMES[from_sq][0] + 'x' if capture else ''
+                name += SQUARE_NAMES[to_sq]
+                if flag == MOVE_PROMOTION:
+                    name += '=' + PROMOTION_CODES[(move >> 12) & 3]
+            else:
+                # Disambiguate by file, else by rank, else by both
+                rivals = [other & 63 for other in self.legal_moves()
+                          if (other >> 6) & 63 == to_sq and other & 63 != from_sq
+                          and self.board[(other & 63) // 8][(other & 63) % 8][1] == piece_type]
+                origin = SQUARE_NAMES[from_sq]
+                if not rivals:
+                    name = piece_type
+                elif all(sq % 8 != col for sq in rivals):
+                    name = piece_type + origin[0]
+                elif all(sq // 8 != row for sq in rivals):
+                    name = piece_type + origin[1]
+                else:
+                    name = piece_type + origin
+                name += ('x' if capture else '') + SQUARE_NAMES[to_sq]
+
+        self._make_move_unchecked(move)
+        if self.is_check():
+            name += '+' if self.has_legal_move() else '#'
+        self.unmake_move()
+        return name
+
+    def replay(self, movetext):
+        """
+        Play a game's mainline from the current position, given as PGN
+        movetext or as a sequence of SAN moves. Each packed move is yielded
+        just before it is made, while the engine still shows the position
+        it is played from; no game tree is built along the way.
+        Raises ValueError on a move that can't be played.
+        """
+        moves = tokenize_movetext(movetext) if isinstance(movetext, str) else movetext
+        for san in moves:
+            move = self.parse_san(san)
+            yield move
+            self._make_move_unchecked(move)
+
     def get_all_legal_moves_as_strings(self, color=None):
         """Get all legal moves as algebraic notation strings"""
         if color is None:
@@ -153,303 +1100,258 @@ class ChessEngine:
         """Get legal moves for a specific piece"""
         row, col = position
         piece = self.board[row][col]
-        if piece == "  ":
+        if piece == EMPTY:
             return []
-        
+
+        check_info = self._check_info(piece[0])
+        if check_info is None:
+            return []
+        return bitboard_to_coords(self._legal_targets(row * 8 + col, check_info))
+
+    def _check_info(self, color):
+        """Checks and pins against color's king, cached for the side to move"""
+        if color != self.current_turn:
+            return self._compute_check_info(color)
+        if self._cached_check_info is _NOT_COMPUTED:
+            self._cached_check_info = self._compute_check_info(color)
+        return self._cached_check_info
+
+    def _compute_check_info(self, color):
+        """
+        Work out checks and pins against color's king once per position.
+        Returns (king_sq, checkers, check_mask, pin_masks), or None if color
+        has no king. check_mask holds the squares a non-king move must land
+        on (everything when not in check, the checker and the squares between
+        for a single check, nothing for a double check). pin_masks maps each
+        pinned piece's square to the line it may still move along.
+        """
+        king_sq = self.king_squares[color]
+        if king_sq is None:
+            return None
+        enemy = 'b' if color == 'w' else 'w'
+        bitboards = self.bitboards
+
+        checkers = self._attackers_to(king_sq, enemy, self.occupied)
+        if not checkers:
+            check_mask = ALL_SQUARES
+        elif checkers & (checkers - 1):
+            check_mask = 0
+        else:
+            check_mask = checkers | BETWEEN[king_sq][checkers.bit_length() - 1]
+
+        # Enemy sliders lined up with the king with exactly one of our pieces in between
+        pin_masks = {}
+        queens = bitboards[enemy + 'Q']
+        snipers = ((ROOK_LINES[king_sq] & (bitboards[enemy + 'R'] | queens)) |
+                   (BISHOP_LINES[king_sq] & (bitboards[enemy + 'B'] | queens)))
+        own = self.occupancy[color]
+        for sniper_sq in iter_squares(snipers):
+            between = BETWEEN[king_sq][sniper_sq]
+            blockers = between & self.occupied
+            if blockers and not blockers & (blockers - 1) and blockers & own:
+                pin_masks[blockers.bit_length() - 1] = between | (1 << sniper_sq)
+
+        return king_sq, checkers, check_mask, pin_masks
+
+    def _legal_targets(self, sq, check_info, castling=True, mask=ALL_SQUARES):
+        """
+        Bitboard of legal destination squares for the piece on sq. Only
+        squares in mask are considered, so the king's attack tests and the
+        en passant test are skipped when mask rules their squares out.
+        """
+        king_sq, checkers, check_mask, pin_masks = check_info
+        row, col = SQUARE_COORDS[sq]
+        piece = self.board[row][col]
         color = piece[0]
         piece_type = piece[1]
-        
-        # Get pseudo-legal moves (moves without checking for self-check)
-        pseudo_moves = []
-        
-        if piece_type == 'P':  # Pawn
-            pseudo_moves = self._get_pawn_moves(row, col, color)
-        elif piece_type == 'N':  # Knight
-            pseudo_moves = self._get_knight_moves(row, col, color)
-        elif piece_type == 'B':  # Bishop
-            pseudo_moves = self._get_bishop_moves(row, col, color)
-        elif piece_type == 'R':  # Rook
-            pseudo_moves = self._get_rook_moves(row, col, color)
-        elif piece_type == 'Q':  # Queen
-            pseudo_moves = self._get_queen_moves(row, col, color)
-        elif piece_type == 'K':  # King
-            pseudo_moves = self._get_king_moves(row, col, color)
-        
-        # Filter out moves that leave king in check
-        legal_moves = []
-        for move in pseudo_moves:
-            if self._is_move_legal((row, col), move, color):
-                legal_moves.append(move)
-        
-        return legal_moves
-    
-    def _get_pawn_moves(self, row, col, color):
-        """Calculate pawn moves"""
-        moves = []
-        direction = -1 if color == 'w' else 1  # White moves up (decreasing row), black down
-        
-        # One square forward
-        new_row = row + direction
-        if 0 <= new_row < 8 and self.board[new_row][col] == "  ":
-            moves.append((new_row, col))
-            
-            # Two squares forward from starting position
-            if ((color == 'w' and row == 6) or (color == 'b' and row == 1)):
-                new_row2 = row + 2 * direction
-                if self.board[new_row2][col] == "  ":
-                    moves.append((new_row2, col))
-        
-        # Captures (including en passant)
-        for dcol in [-1, 1]:
-            new_col = col + dcol
-            new_row = row + direction
-            if 0 <= new_row < 8 and 0 <= new_col < 8:
-                # Normal capture
-                target = self.board[new_row][new_col]
-                if target != "  " and target[0] != color:
-                    moves.append((new_row, new_col))
-                
-                # En passant capture
-                if self.en_passant_target == (new_row, new_col):
-                    moves.append((new_row, new_col))
-        
-        return moves
-    
-    def _get_knight_moves(self, row, col, color):
-        """Calculate knight moves"""
-        moves = []
-        knight_moves = [
-            (row-2, col-1), (row-2, col+1),
-            (row-1, col-2), (row-1, col+2),
-            (row+1, col-2), (row+1, col+2),
-            (row+2, col-1), (row+2, col+1)
-        ]
-        
-        for r, c in knight_moves:
-            if 0 <= r < 8 and 0 <= c < 8:
-                target = self.board[r][c]
-                if target == "  " or target[0] != color:
-                    moves.append((r, c))
-        
-        return moves
-    
-    def _get_bishop_moves(self, row, col, color):
-        """Calculate bishop moves"""
-        moves = []
-        directions = [(-1, -1), (-1, 1), (1, -1), (1, 1)]
-        
-        for dr, dc in directions:
-            r, c = row + dr, col + dc
-            while 0 <= r < 8 and 0 <= c < 8:
-                target = self.board[r][c]
-                if target == "  ":
-                    moves.append((r, c))
-                else:
-                    if target[0] != color:
-                        moves.append((r, c))
-                    break
-                r += dr
-                c += dc
-        
-        return moves
-    
-    def _get_rook_moves(self, row, col, color):
-        """Calculate rook moves"""
-        moves = []
-        directions = [(-1, 0), (1, 0), (0, -1), (0, 1)]
-        
-        for dr, dc in directions:
-            r, c = row + dr, col + dc
-            while 0 <= r < 8 and 0 <= c < 8:
-                target = self.board[r][c]
-                if target == "  ":
-                    moves.append((r, c))
-                else:
-                    if target[0] != color:
-                        moves.append((r, c))
-                    break
-                r += dr
-                c += dc
-        
-        return moves
-    
-    def _get_queen_moves(self, row, col, color):
-        """Calculate queen moves (bishop + rook)"""
-        return self._get_bishop_moves(row, col, color) + self._get_rook_moves(row, col, color)
-    
-    def _get_king_moves(self, row, col, color):
-        """Calculate king moves including castling"""
-        moves = []
-        
-        # Normal king moves
-        for dr in [-1, 0, 1]:
-            for dc in [-1, 0, 1]:
-                if dr == 0 and dc == 0:
-                    continue
-                r, c = row + dr, col + dc
-                if 0 <= r < 8 and 0 <= c < 8:
-                    target = self.board[r][c]
-                    if target == "  " or target[0] != color:
-                        # Temporarily make move to check if square is attacked
-                        moves.append((r, c))
-        
-        # Castling moves
+        own = self.occupancy[color]
+
+        # King moves are tested one by one with the king lifted off the board
+        if piece_type == 'K':
+            enemy = 'b' if color == 'w' else 'w'
+            occupied = self.occupied ^ (1 << sq)
+            targets = 0
+            for target in iter_squares(KING_ATTACKS[sq] & ~own & mask):
+                if not self._attackers_to(target, enemy, occupied):
+                    targets |= 1 << target
+            if castling and not checkers:
+                targets |= self._castling_targets(color)
+            return targets
+
+        if piece_type == 'P':
+            targets = self._pawn_targets(sq, color) & mask
+            ep_bit = 0
+            if self.en_passant_target is not None:
+                ep_row, ep_col = self.en_passant_target
+                ep_bit = targets & (1 << (ep_row * 8 + ep_col)) & ~self.occupied
+                targets ^= ep_bit
+        elif piece_type == 'N':
+            targets = KNIGHT_ATTACKS[sq] & ~own
+        elif piece_type == 'B':
+            targets = bishop_attacks(sq, self.occupied) & ~own
+        elif piece_type == 'R':
+            targets = rook_attacks(sq, self.occupied) & ~own
+        else:
+            targets = (bishop_attacks(sq, self.occupied) | rook_attacks(sq, self.occupied)) & ~own
+
+        targets &= check_mask & mask
+        if sq in pin_masks:
+            targets &= pin_masks[sq]
+
+        # En passant removes two pieces from the board, so test it in full
+        if piece_type == 'P' and ep_bit:
+            ep_target = SQUARE_COORDS[ep_bit.bit_length() - 1]
+            if self._is_move_legal((row, col), ep_target, color):
+                targets |= ep_bit
+
+        return targets
+
+    def _pawn_targets(self, sq, color):
+        """Calculate pseudo-legal pawn targets as a bitboard"""
+        enemy = 'b' if color == 'w' else 'w'
+
+        # One square forward, then two from the starting position
+        empty = ~self.occupied
+        targets = PAWN_PUSHES[color][sq] & empty
+        if targets:
+            targets |= PAWN_DOUBLE_PUSHES[color][sq] & empty
+
+        # Captures (including en passant, which only the side to move can play)
+        attacks = PAWN_ATTACKS[color][sq]
+        targets |= attacks & self.occupancy[enemy]
+        if self.en_passant_target is not None and color == self.current_turn:
+            ep_row, ep_col = self.en_passant_target
+            targets |= attacks & (1 << (ep_row * 8 + ep_col)) & ~self.occupied
+
+        return targets
+
+    def _castling_targets(self, color):
+        """Bitboard of castling destinations for color's king"""
+        targets = 0
         if color == 'w':
             # Kingside castling
-            if (self.castling_rights['wK'] and 
-                self.board[7][5] == "  " and 
-                self.board[7][6] == "  " and
+            if (self.castling & CASTLE_WK and
+                self.board[7][5] == EMPTY and
+                self.board[7][6] == EMPTY and
                 not self.is_square_attacked((7, 4), 'b') and
                 not self.is_square_attacked((7, 5), 'b') and
                 not self.is_square_attacked((7, 6), 'b')):
-                moves.append((7, 6))
-            
+                targets |= 1 << 62
+
             # Queenside castling
-            if (self.castling_rights['wQ'] and 
-                self.board[7][1] == "  " and 
-                self.board[7][2] == "  " and
-                self.board[7][3] == "  " and
+            if (self.castling & CASTLE_WQ and
+                self.board[7][1] == EMPTY and
+                self.board[7][2] == EMPTY and
+                self.board[7][3] == EMPTY and
                 not self.is_square_attacked((7, 4), 'b') and
                 not self.is_square_attacked((7, 3), 'b') and
                 not self.is_square_attacked((7, 2), 'b')):
-                moves.append((7, 2))
+                targets |= 1 << 58
         else:
             # Black kingside castling
-            if (self.castling_rights['bK'] and 
-                self.board[0][5] == "  " and 
-                self.board[0][6] == "  " and
+            if (self.castling & CASTLE_BK and
+                self.board[0][5] == EMPTY and
+                self.board[0][6] == EMPTY and
                 not self.is_square_attacked((0, 4), 'w') and
                 not self.is_square_attacked((0, 5), 'w') and
                 not self.is_square_attacked((0, 6), 'w')):
-                moves.append((0, 6))
-            
+                targets |= 1 << 6
+
             # Black queenside castling
-            if (self.castling_rights['bQ'] and 
-                self.board[0][1] == "  " and 
-                self.board[0][2] == "  " and
-                self.board[0][3] == "  " and
+            if (self.castling & CASTLE_BQ and
+                self.board[0][1] == EMPTY and
+                self.board[0][2] == EMPTY and
+                self.board[0][3] == EMPTY and
                 not self.is_square_attacked((0, 4), 'w') and
                 not self.is_square_attacked((0, 3), 'w') and
                 not self.is_square_attacked((0, 2), 'w')):
-                moves.append((0, 2))
-        
-        return moves
+                targets |= 1 << 2
+
+        return targets
     
     def is_square_attacked(self, square, by_color):
         """Check if a square is attacked by pieces of given color"""
         row, col = square
-        
-        # Check knight attacks
-        knight_moves = [
-            (row-2, col-1), (row-2, col+1),
-            (row-1, col-2), (row-1, col+2),
-            (row+1, col-2), (row+1, col+2),
-            (row+2, col-1), (row+2, col+1)
-        ]
-        for r, c in knight_moves:
-            if 0 <= r < 8 and 0 <= c < 8:
-                piece = self.board[r][c]
-                if piece != "  " and piece[0] == by_color and piece[1] == 'N':
-                    return True
-        
-        # Check pawn attacks
-        pawn_dir = 1 if by_color == 'w' else -1  # Pawns attack forward-up for white
-        for dc in [-1, 1]:
-            r, c = row + pawn_dir, col + dc
-            if 0 <= r < 8 and 0 <= c < 8:
-                piece = self.board[r][c]
-                if piece != "  " and piece[0] == by_color and piece[1] == 'P':
-                    return True
-        
-        # Check king attacks
-        for dr in [-1, 0, 1]:
-            for dc in [-1, 0, 1]:
-                if dr == 0 and dc == 0:
-                    continue
-                r, c = row + dr, col + dc
-                if 0 <= r < 8 and 0 <= c < 8:
-                    piece = self.board[r][c]
-                    if piece != "  " and piece[0] == by_color and piece[1] == 'K':
-                        return True
-        
+        sq = row * 8 + col
+        if self.attack_counts is not None:
+            return self.attack_counts[by_color][sq] > 0
+        bitboards = self.bitboards
+
+        # Check knight, pawn and king attacks
+        if KNIGHT_ATTACKS[sq] & bitboards[by_color + 'N']:
+            return True
+        defender = 'b' if by_color == 'w' else 'w'
+        if PAWN_ATTACKS[defender][sq] & bitboards[by_color + 'P']:
+            return True
+        if KING_ATTACKS[sq] & bitboards[by_color + 'K']:
+            return True
+
         # Check sliding pieces (queen, rook, bishop)
-        directions = [(-1, -1), (-1, 0), (-1, 1),
-                      (0, -1),          (0, 1),
-                      (1, -1),  (1, 0),  (1, 1)]
-        
-        for dr, dc in directions:
-            r, c = row + dr, col + dc
-            while 0 <= r < 8 and 0 <= c < 8:
-                piece = self.board[r][c]
-                if piece != "  ":
-                    if piece[0] == by_color:
-                        piece_type = piece[1]
-                        # Check if piece can attack in this direction
-                        if dr == 0 or dc == 0:  # Rook or Queen direction
-                            if piece_type in ['R', 'Q']:
-                                return True
-                        else:  # Bishop or Queen direction
-                            if piece_type in ['B', 'Q']:
-                                return True
-                    break
-                r += dr
-                c += dc
-        
+        queens = bitboards[by_color + 'Q']
+        if bishop_attacks(sq, self.occupied) & (bitboards[by_color + 'B'] | queens):
+            return True
+        if rook_attacks(sq, self.occupied) & (bitboards[by_color + 'R'] | queens):
+            return True
+
         return False
-    
+
+    def influence_map(self):
+        """
+        White attackers minus black attackers for each (row, col), e.g. to
+        draw a heat map of who controls the board. Needs track_attacks.
+        """
+        if self.attack_counts is None:
+            raise ValueError("influence_map needs ChessEngine(track_attacks=True)")
+        white, black = self.attack_counts['w'], self.attack_counts['b']
+        return [[white[row * 8 + col] - black[row * 8 + col] for col in range(8)]
+                for row in range(8)]
+
+    def mobility(self, color):
+        """Number of squares color attacks (own pieces included). Needs track_attacks"""
+        if self.attack_counts is None:
+            raise ValueError("mobility needs ChessEngine(track_attacks=True)")
+        return sum(1 for count in self.attack_counts[color] if count)
+
+    def _attackers_to(self, sq, by_color, occupied):
+        """Bitboard of pieces of by_color attacking sq, for a given occupancy"""
+        bitboards = self.bitboards
+        defender = 'b' if by_color == 'w' else 'w'
+        queens = bitboards[by_color + 'Q']
+        return ((KNIGHT_ATTACKS[sq] & bitboards[by_color + 'N'])
+                | (PAWN_ATTACKS[defender][sq] & bitboards[by_color + 'P'])
+                | (KING_ATTACKS[sq] & bitboards[by_color + 'K'])
+                | (bishop_attacks(sq, occupied) & (bitboards[by_color + 'B'] | queens))
+                | (rook_attacks(sq, occupied) & (bitboards[by_color + 'R'] | queens)))
+
     def _is_move_legal(self, from_pos, to_pos, color):
         """Check if a move doesn't leave king in check"""
-        # Make a copy of the board and try the move
-        board_copy = [row[:] for row in self.board]
-        
-        # Make the move on the copy
         from_row, from_col = from_pos
         to_row, to_col = to_pos
-        
-        moving_piece = board_copy[from_row][from_col]
-        captured_piece = board_copy[to_row][to_col]
-        
+        from_sq = from_row * 8 + from_col
+        to_sq = to_row * 8 + to_col
+        moving_piece = self.board[from_row][from_col]
+
+        # Occupancy after the move; captured holds the enemy pieces taken off
+        occupied = (self.occupied & ~(1 << from_sq)) | (1 << to_sq)
+        captured = 1 << to_sq
+
         # Handle en passant capture
-        is_en_passant = False
-        if moving_piece[1] == 'P' and captured_piece == "  " and from_col != to_col:
-            if self.en_passant_target == (to_row, to_col):
-                is_en_passant = True
-                # Remove the captured pawn
-                captured_row = to_row + 1 if color == 'w' else to_row - 1
-                board_copy[captured_row][to_col] = "  "
-        
-        # Move the piece
-        board_copy[to_row][to_col] = moving_piece
-        board_copy[from_row][from_col] = "  "
-        
-        # Handle castling - move rook too
-        if moving_piece[1] == 'K' and abs(from_col - to_col) == 2:
-            # Kingside castling
-            if to_col > from_col:
-                board_copy[to_row][5] = board_copy[to_row][7]
-                board_copy[to_row][7] = "  "
-            # Queenside castling
-            else:
-                board_copy[to_row][3] = board_copy[to_row][0]
-                board_copy[to_row][0] = "  "
-        
-        # Find king position
-        king_pos = None
-        for r in range(8):
-            for c in range(8):
-                piece = board_copy[r][c]
-                if piece == f"{color}K":
-                    king_pos = (r, c)
-                    break
-            if king_pos:
-                break
-        
-        if not king_pos:
-            return False
-        
+        if (moving_piece[1] == 'P' and from_col != to_col and
+                self.board[to_row][to_col] == EMPTY):
+            captured_sq = to_sq + 8 if color == 'w' else to_sq - 8
+            captured = 1 << captured_sq
+            occupied &= ~captured
+
+        if moving_piece[1] == 'K':
+            king_sq = to_sq
+        else:
+            king_sq = self.king_squares[color]
+            if king_sq is None:
+                return False
+
         # Check if king is in check
         opponent_color = 'b' if color == 'w' else 'w'
-        return not self._is_king_in_check_on_board(board_copy, king_pos, opponent_color)
+        return not self._attackers_to(king_sq, opponent_color, occupied) & ~captured
     
     def _is_king_in_check_on_board(self, board, king_pos, opponent_color):
         """Check if king is in check on a given board"""
@@ -458,71 +1360,42 @@ class ChessEngine:
     def is_square_attacked_on_board(self, board, square, by_color):
         """Check if a square is attacked on a given board"""
         row, col = square
-        
-        # Similar logic to is_square_attacked but using given board
-        # (Implement simplified version for brevity)
-        # Check immediate surroundings for kings
-        for dr in [-1, 0, 1]:
-            for dc in [-1, 0, 1]:
-                if dr == 0 and dc == 0:
-                    continue
-                r, c = row + dr, col + dc
-                if 0 <= r < 8 and 0 <= c < 8:
-                    piece = board[r][c]
-                    if piece != "  " and piece[0] == by_color and piece[1] == 'K':
-                        return True
-        
-        # Check knights
-        knight_moves = [
-            (row-2, col-1), (row-2, col+1),
-            (row-1, col-2), (row-1, col+2),
-            (row+1, col-2), (row+1, col+2),
-            (row+2, col-1), (row+2, col+1)
-        ]
-        for r, c in knight_moves:
-            if 0 <= r < 8 and 0 <= c < 8:
-                piece = board[r][c]
-                if piece != "  " and piece[0] == by_color and piece[1] == 'N':
-                    return True
-        
-        # Check pawns
-        pawn_dir = 1 if by_color == 'w' else -1
-        for dc in [-1, 1]:
-            r, c = row + pawn_dir, col + dc
-            if 0 <= r < 8 and 0 <= c < 8:
-                piece = board[r][c]
-                if piece != "  " and piece[0] == by_color and piece[1] == 'P':
-                    return True
-        
-        # Check sliding pieces
-        directions = [(-1, -1), (-1, 0), (-1, 1),
-                      (0, -1),          (0, 1),
-                      (1, -1),  (1, 0),  (1, 1)]
-        
-        for dr, dc in directions:
-            r, c = row + dr, col + dc
-            while 0 <= r < 8 and 0 <= c < 8:
+        sq = row * 8 + col
+
+        # Check kings, knights and pawns
+        king, knight, pawn = by_color + 'K', by_color + 'N', by_color + 'P'
+        for r, c in KING_TARGETS[sq]:
+            if board[r][c] == king:
+                return True
+        for r, c in KNIGHT_TARGETS[sq]:
+            if board[r][c] == knight:
+                return True
+        for r, c in PAWN_ATTACKERS[by_color][sq]:
+            if board[r][c] == pawn:
+                return True
+
+        # Check sliding pieces, stopping each ray at its first piece
+        for rays, piece_types in SLIDER_RAYS:
+            for r, c in rays[sq]:
                 piece = board[r][c]
-                if piece != "  ":
-                    if piece[0] == by_color:
-                        piece_type = piece[1]
-                        if dr == 0 or dc == 0:  # Rook/Queen direction
-                            if piece_type in ['R', 'Q']:
-                                return True
-                        else:  # Bishop/Queen direction
-                            if piece_type in ['B', 'Q']:
-                                return True
+                if piece != EMPTY:
+                    if piece[0] == by_color and piece[1] in piece_types:
+                        return True
                     break
-                r += dr
-                c += dc
-        
+
         return False
     
-    def make_move(self, from_square, to_square, promotion_piece='Q'):
+    def make_move(self, from_square, to_square=None, promotion_piece='Q'):
         """
-        Make a move on the board.
+        Make a move on the board, given as two squares or as one packed move.
         Returns True if move was successful, False otherwise.
         """
+        if isinstance(from_square, int):
+            if not self._is_legal_cached(from_square):
+                return False
+            self._make_move_unchecked(from_square)
+            return True
+
         if isinstance(from_square, str):
             from_pos = self.square_to_coords(from_square)
         else:
@@ -543,123 +1416,166 @@ class ChessEngine:
         if moving_piece == "  " or moving_piece[0] != self.current_turn:
             return False
         
+        from_sq = from_row * 8 + from_col
+        to_sq = to_row * 8 + to_col
+        promotion = promotion_piece.upper() if promotion_piece else 'Q'
+        if promotion not in PROMOTION_CODES:
+            if moving_piece[1] == 'P' and (PROMOTION_SQUARES >> to_sq) & 1:
+                return False
+            promotion = 'Q'
+
         # Check if move is legal
-        legal_moves = self.get_legal_moves_for_piece(from_pos)
-        if to_pos not in legal_moves:
+        move = self._encode_legal(from_sq, to_sq, promotion)
+        if not self._is_legal_cached(move):
             return False
         
-        # Save game state for undo
-        game_state = {
-            'board': [row[:] for row in self.board],
-            'current_turn': self.current_turn,
-            'castling_rights': self.castling_rights.copy(),
-            'en_passant_target': self.en_passant_target,
-            'halfmove_clock': self.halfmove_clock
-        }
-        self.move_history.append(game_state)
-        
-        # Handle en passant capture
-        captured_piece = self.board[to_row][to_col]
-        is_en_passant = False
-        if moving_piece[1] == 'P' and captured_piece == "  " and from_col != to_col:
-            if self.en_passant_target == (to_row, to_col):
-                is_en_passant = True
-                # Remove the captured pawn
-                captured_row = to_row + 1 if self.current_turn == 'w' else to_row - 1
-                self.board[captured_row][to_col] = "  "
-                captured_piece = f"{'b' if self.current_turn == 'w' else 'w'}P"
-        
-        # Handle castling - move rook
-        is_castling = False
-        if moving_piece[1] == 'K' and abs(from_col - to_col) == 2:
-            is_castling = True
-            # Kingside castling
-            if to_col > from_col:
-                # Move rook from h-file to f-file
-                self.board[to_row][5] = self.board[to_row][7]
-                self.board[to_row][7] = "  "
-            # Queenside castling
+        self._make_move_unchecked(move)
+        return True
+
+    def _make_move_unchecked(self, move):
+        """
+        Play a pseudo-legal packed move without validating it.
+        Pushes an UndoRecord so unmake_move can reverse it in place.
+        """
+        color = self.current_turn
+        from_sq = move & 63
+        to_sq = (move >> 6) & 63
+        flag = move >> 14
+        previous_hash = self.hash
+        previous_cache = (self._cached_check_info, self._cached_moves, self._cached_move_coords)
+        self._clear_cache()
+        self.hash ^= self._state_hash()
+        moving_piece = self._remove_piece(from_sq)
+        captured_piece = self._remove_piece(to_sq)
+
+        if flag == MOVE_EN_PASSANT:
+            # Remove the captured pawn
+            captured_piece = self._remove_piece(to_sq + 8 if color == 'w' else to_sq - 8)
+        elif flag == MOVE_CASTLING:
+            row_start = to_sq & ~7
+            # Kingside castling: rook from h-file to f-file
+            if to_sq > from_sq:
+                self._put_piece(row_start + 5, self._remove_piece(row_start + 7))
+            # Queenside castling: rook from a-file to d-file
             else:
-                # Move rook from a-file to d-file
-                self.board[to_row][3] = self.board[to_row][0]
-                self.board[to_row][0] = "  "
-        
-        # Move the piece
-        self.board[to_row][to_col] = moving_piece
-        self.board[from_row][from_col] = "  "
-        
-        # Handle pawn promotion
-        if moving_piece[1] == 'P' and (to_row == 0 or to_row == 7):
-            self.board[to_row][to_col] = f"{self.current_turn}{promotion_piece}"
-        
-        # Update castling rights
-        if moving_piece[1] == 'K':
-            self.castling_rights[f"{self.current_turn}K"] = False
-            self.castling_rights[f"{self.current_turn}Q"] = False
-        elif moving_piece[1] == 'R':
-            # Lost castling right if rook moves from starting position
-            if from_row == 7 and from_col == 0:  # White queenside rook
-                self.castling_rights['wQ'] = False
-            elif from_row == 7 and from_col == 7:  # White kingside rook
-                self.castling_rights['wK'] = False
-            elif from_row == 0 and from_col == 0:  # Black queenside rook
-                self.castling_rights['bQ'] = False
-            elif from_row == 0 and from_col == 7:  # Black kingside rook
-                self.castling_rights['bK'] = False
-        
+                self._put_piece(row_start + 3, self._remove_piece(row_start))
+
+        # Move the piece, handling pawn promotion
+        if flag == MOVE_PROMOTION:
+            self._put_piece(to_sq, color + PROMOTION_CODES[(move >> 12) & 3])
+        else:
+            self._put_piece(to_sq, moving_piece)
+
+        self.move_history.append(UndoRecord(
+            move, captured_piece,
+            self.castling, self.en_passant_target, self.halfmove_clock,
+            previous_hash, previous_cache
+        ))
+
+        # Update castling rights (a king or rook moved, or a rook was captured)
+        self.castling &= CASTLING_MASKS[from_sq] & CASTLING_MASKS[to_sq]
+
         # Update en passant target
         self.en_passant_target = None
-        if moving_piece[1] == 'P' and abs(from_row - to_row) == 2:
+        if moving_piece[1] == 'P' and abs(from_sq - to_sq) == 16:
             # Pawn moved two squares, set en passant target
-            en_passant_row = (from_row + to_row) // 2
-            self.en_passant_target = (en_passant_row, from_col)
-        
+            self.en_passant_target = SQUARE_COORDS[(from_sq + to_sq) // 2]
+
         # Update halfmove clock (for 50-move rule)
-        if moving_piece[1] == 'P' or captured_piece != "  ":
+        if moving_piece[1] == 'P' or captured_piece != EMPTY:
             self.halfmove_clock = 0
         else:
             self.halfmove_clock += 1
-        
+
         # Update fullmove number after black's move
-        if self.current_turn == 'b':
+        if color == 'b':
             self.fullmove_number += 1
-        
+
         # Switch turns
-        self.current_turn = 'b' if self.current_turn == 'w' else 'w'
-        
-        return True
-    
+        self.current_turn = 'b' if color == 'w' else 'w'
+        self.hash ^= self._state_hash()
+
+    def unmake_move(self):
+        """Reverse the last move in place using its undo record"""
+        record = self.move_history.pop()
+        move = record.move
+        from_sq = move & 63
+        to_sq = (move >> 6) & 63
+        flag = move >> 14
+        color = 'b' if self.current_turn == 'w' else 'w'
+
+        # Move the piece back, turning a promoted piece back into a pawn
+        moving_piece = self._remove_piece(to_sq)
+        if flag == MOVE_PROMOTION:
+            moving_piece = f"{color}P"
+        self._put_piece(from_sq, moving_piece)
+
+        # Put back the captured piece
+        captured_piece = record.captured_piece
+        if flag == MOVE_EN_PASSANT:
+            self._put_piece(to_sq + 8 if color == 'w' else to_sq - 8, captured_piece)
+        elif captured_piece != EMPTY:
+            self._put_piece(to_sq, captured_piece)
+
+        # Move the rook back after castling
+        if flag == MOVE_CASTLING:
+            row_start = to_sq & ~7
+            if to_sq > from_sq:
+                self._put_piece(row_start + 7, self._remove_piece(row_start + 5))
+            else:
+                self._put_piece(row_start, self._remove_piece(row_start + 3))
+
+        # Restore the state the move overwrote
+        self.castling = record.castling
+        self.en_passant_target = record.en_passant_target
+        self.halfmove_clock = record.halfmove_clock
+        if color == 'b':
+            self.fullmove_number -= 1
+        self.current_turn = color
+        self.hash = record.hash
+        self._cached_check_info, self._cached_moves, self._cached_move_coords = record.cache
+
     def undo_move(self):
         """Undo the last move"""
         if not self.move_history:
             return False
-        
-        game_state = self.move_history.pop()
-        self.board = game_state['board']
-        self.current_turn = game_state['current_turn']
-        self.castling_rights = game_state['castling_rights']
-        self.en_passant_target = game_state['en_passant_target']
-        self.halfmove_clock = game_state['halfmove_clock']
-        
+
+        self.unmake_move()
         return True
-    
+
+    def perft(self, depth):
+        """Count the leaf nodes of the legal move tree to the given depth"""
+        if depth == 0:
+            return 1
+
+        moves = self.legal_moves()
+        # Bulk counting: at the last ply the move count is the node count
+        if depth == 1:
+            return len(moves)
+
+        nodes = 0
+        for move in moves:
+            self._make_move_unchecked(move)
+            nodes += self.perft(depth - 1)
+            self.unmake_move()
+        return nodes
+
+    def divide(self, depth):
+        """Perft split by root move, as a dict like {'e2e4': 600, 'a7a8q': 12}"""
+        counts = {}
+        for move in self.legal_moves():
+            self._make_move_unchecked(move)
+            counts[move_to_uci(move)] = self.perft(depth - 1) if depth > 1 else 1
+            self.unmake_move()
+        return counts
+
     def is_check(self):
         """Check if current player's king is in check"""
-        king_pos = None
-        for row in range(8):
-            for col in range(8):
-                piece = self.board[row][col]
-                if piece == f"{self.current_turn}K":
-                    king_pos = (row, col)
-                    break
-            if king_pos:
-                break
-        
-        if not king_pos:
+        check_info = self._check_info(self.current_turn)
+        if check_info is None:
             return False
         
-        opponent_color = 'b' if self.current_turn == 'w' else 'w'
-        return self.is_square_attacked(king_pos, opponent_color)
+        return check_info[1] != 0
     
     def is_checkmate(self):
         """Check if current player is in checkmate"""
@@ -667,7 +1583,7 @@ class ChessEngine:
             return False
         
         # If in check and no legal moves available, it's checkmate
-        return len(self.get_all_legal_moves()) == 0
+        return not self.has_legal_move()
     
     def is_stalemate(self):
         """Check if current player is in stalemate"""
@@ -675,82 +1591,145 @@ class ChessEngine:
             return False
         
         # If not in check but no legal moves available, it's stalemate
-        return len(self.get_all_legal_moves()) == 0
-    
-    def is_insufficient_material(self):
-        """Check if there's insufficient material to checkmate"""
-        pieces = []
-        for row in range(8):
-            for col in range(8):
-                piece = self.board[row][col]
-                if piece != "  ":
-                    pieces.append(piece)
-        
-        # King vs king
-        if len(pieces) == 2:
-            return True
-        
-        # King and bishop vs king
-        # King and knight vs king
-        if len(pieces) == 3:
-            for piece in pieces:
-                if piece[1] in ['B', 'N']:
+        return not self.has_legal_move()
+
+    def has_legal_move(self):
+        """
+        Check if the side to move has any legal move, stopping at the first one.
+        Tries the king first, then pieces roughly in order of mobility.
+        """
+        if self._cached_moves is not None:
+            return len(self._cached_moves) > 0
+
+        color = self.current_turn
+        check_info = self._check_info(color)
+        if check_info is None:
+            return False
+        king_sq, checkers, check_mask, pin_masks = check_info
+
+        # King steps (castling is only legal when a king step to f1/d1 is too)
+        enemy = 'b' if color == 'w' else 'w'
+        occupied = self.occupied ^ (1 << king_sq)
+        for target in iter_squares(KING_ATTACKS[king_sq] & ~self.occupancy[color]):
+            if not self._attackers_to(target, enemy, occupied):
+                return True
+
+        # In double check only the king can move
+        if checkers and not check_mask:
+            return False
+
+        for piece_type in 'QRBNP':
+            for sq in iter_squares(self.bitboards[color + piece_type]):
+                if self._legal_targets(sq, check_info):
                     return True
-        
-        # Other cases with more pieces
         return False
     
+    def is_insufficient_material(self):
+        """
+        Check if neither side can ever checkmate (a dead position), from
+        the tracked piece counts: king against king, a single knight or
+        bishop against a bare king, or only bishops left besides the kings,
+        all on squares of the same color. Positions where mate is merely
+        unlikely (two knights, bishop against knight, bishops on both
+        colors) are not dead.
+        """
+        counts = self.piece_counts
+        if (counts['wP'] or counts['bP'] or counts['wR'] or counts['bR'] or
+                counts['wQ'] or counts['bQ']):
+            return False
+
+        knights = counts['wN'] + counts['bN']
+        bishops = counts['wB'] + counts['bB']
+        if knights + bishops <= 1:
+            return True
+        if knights:
+            return False
+
+        # Bishops only: dead if they all stand on one color of square
+        white_shades, black_shades = self.bishop_shades['w'], self.bishop_shades['b']
+        return not (white_shades[0] + black_shades[0]) or not (white_shades[1] + black_shades[1])
+
+    def repetition_count(self):
+        """Count how many times the current position has occurred, this time included"""
+        # Only positions since the last capture or pawn move can repeat, and
+        # only every other one has the same side to move
+        count = 1
+        history = self.move_history
+        limit = min(self.halfmove_clock, len(history))
+        for ply in range(2, limit + 1, 2):
+            if history[-ply].hash == self.hash:
+                count += 1
+        return count
+
+    def is_threefold_repetition(self):
+        """Check if the current position has occurred three times"""
+        return self.repetition_count() >= 3
+
+    def is_fifty_moves(self):
+        """Check if fifty moves have passed without a capture or pawn move"""
+        return self.halfmove_clock >= 100
+
+    def game_status(self):
+        """
+        Work out check, checkmate, stalemate and draws in one pass.
+        Returns a dict with 'check', 'checkmate' and 'stalemate' flags,
+        'draw' (the reason, or None) and 'result' (as get_game_result).
+        """
+        in_check = self.is_check()
+        no_moves = not self.has_legal_move()
+        checkmate = in_check and no_moves
+        stalemate = no_moves and not in_check
+
+        draw = None
+        if stalemate:
+            draw = "stalemate"
+        elif not checkmate:
+            if self.is_insufficient_material():
+                draw = "insufficient material"
+            elif self.is_threefold_repetition():
+                draw = "threefold repetition"
+            elif self.is_fifty_moves():
+                draw = "fifty-move rule"
+
+        return {
+            'check': in_check,
+            'checkmate': checkmate,
+            'stalemate': stalemate,
+            'draw': draw,
+            'result': "checkmate" if checkmate else draw,
+        }
+
     def is_game_over(self):
         """Check if game is over"""
-        return self.is_checkmate() or self.is_stalemate() or self.is_insufficient_material()
+        return self.game_status()['result'] is not None
     
     def get_game_result(self):
         """Get game result if game is over"""
-        if self.is_checkmate():
-            return "checkmate"
-        elif self.is_stalemate():
-            return "stalemate"
-        elif self.is_insufficient_material():
-            return "insufficient material"
-        return None
+        return self.game_status()['result']
     
     def get_fen(self):
         """Generate FEN notation for current position"""
-        fen_parts = []
-        
-        # Board position
-        for row in range(8):
-            empty_count = 0
-            row_str = ""
-            for col in range(8):
-                piece = self.board[row][col]
-                if piece == "  ":
-                    empty_count += 1
-                else:
-                    if empty_count > 0:
-                        row_str += str(empty_count)
-                        empty_count = 0
-                    piece_char = piece[1] if piece[0] == 'w' else piece[1].lower()
-                    row_str += piece_char
-            if empty_count > 0:
-                row_str += str(empty_count)
-            fen_parts.append(row_str)
-        
-        board_fen = "/".join(fen_parts)
+        # Board position: one character per square, then runs of empty
+        # squares collapsed into counts, longest first
+        board_fen = "/".join("".join(map(FEN_CHARS.__getitem__, row)) for row in self.board)
+        for run in _EMPTY_RUNS:
+            board_fen = board_fen.replace(run, str(len(run)))
         
         # Current turn
         turn_fen = self.current_turn
         
         # Castling rights
         castling_fen = ""
-        if self.castling_rights['wK']: castling_fen += 'K'
-        if self.castling_rights['wQ']: castling_fen += 'Q'
-        if self.castling_rights['bK']: castling_fen += 'k'
-        if self.castling_rights['bQ']: castling_fen += 'q'
+        if self.castling & CASTLE_WK: castling_fen += 'K'
+        if self.castling & CASTLE_WQ: castling_fen += 'Q'
+        if self.castling & CASTLE_BK: castling_fen += 'k'
+        if self.castling & CASTLE_BQ: castling_fen += 'q'
         if not castling_fen: castling_fen = '-'
         
-        # En passant target
-        en_passant_fen = self.coords_to_square(self.en_passant_target) if self.en_passant_target else '-'
+        # En passant target, only when it can legally be taken (as python-chess
+        # writes it), so a double push alone doesn't change the FEN
+        ep_sq = self._capturable_en_passant(legal=True)
+        en_passant_fen = SQUARE_NAMES[ep_sq] if ep_sq is not None else '-'
         
         # Halfmove clock and fullmove number
         return f"{board_fen} {turn_fen} {castling_fen} {en_passant_fen} {self.halfmove_clock} {self.fullmove_number}"
@@ -781,11 +1760,12 @@ class ChessEngine:
         print("   a  b  c  d  e  f  g  h")
         
         # Print game status
-        if self.is_checkmate():
+        status = self.game_status()
+        if status['checkmate']:
             print(f"\nCheckmate! {'Black' if self.current_turn == 'w' else 'White'} wins!")
-        elif self.is_stalemate():
+        elif status['stalemate']:
             print("\nStalemate! Game is a draw.")
-        elif self.is_check():
+        elif status['check']:
             print(f"\n{'White' if self.current_turn == 'w' else 'Black'} is in check!")
         
         print(f"\nTurn: {'White' if self.current_turn == 'w' else 'Black'}")
@@ -798,19 +1778,8 @@ class ChessEngine:
         print(f"FEN: {self.get_fen()}")
         
         # Count pieces
-        white_pieces = []
-        black_pieces = []
-        for row in range(8):
-            for col in range(8):
-                piece = self.board[row][col]
-                if piece != "  ":
-                    if piece[0] == 'w':
-                        white_pieces.append(piece)
-                    else:
-                        black_pieces.append(piece)
-        
-        print(f"White pieces: {len(white_pieces)}")
-        print(f"Black pieces: {len(black_pieces)}")
+        print(f"White pieces: {len(self.piece_squares('w'))}")
+        print(f"Black pieces: {len(self.piece_squares('b'))}")
         print(f"White legal moves: {len(self.get_all_legal_moves('w'))}")
         print(f"Black legal moves: {len(self.get_all_legal_moves('b'))}")
         print("=" * 20)
@@ -0,0 +1,193 @@
+from typing import List, Sequence, Union
+
+import numpy as np
+
+from Game.chess_engine import (
+    ChessEngine, PIECE_NAMES, SQUARE_NAMES, SQUARE_INDEX, PROMOTION_CODES, KNIGHT_ATTACKS,
+    PAWN_ATTACKS, MOVE_EN_PASSANT, MOVE_CASTLING, CASTLE_WK, CASTLE_WQ, CASTLE_BK, CASTLE_BQ,
+    rook_attacks, bishop_attacks, iter_squares, encode_move
+)
+
+# Planes of an encoded position, each 8x8 with row 0 = rank 8 like ChessEngine.board:
+#   0-11  one per piece, in PIECE_NAMES order (wP ... wK, bP ... bK)
+#   12    all ones when white is to move
+#   13-16 all ones for each castling right still held: K, Q, k, q
+#   17    the en passant target square, when it can legally be taken
+PIECE_PLANES = len(PIECE_NAMES)
+TURN_PLANE = 12
+CASTLING_PLANES = {'K': 13, 'Q': 14, 'k': 15, 'q': 16}
+EN_PASSANT_PLANE = 17
+NUM_PLANES = 18
+
+# FEN character -> piece plane; anything else (empty squares) is 255
+_CHAR_PLANE = np.full(256, 255, dtype=np.uint8)
+for _plane, _piece in enumerate(PIECE_NAMES):
+    _CHAR_PLANE[ord(_piece[1] if _piece[0] == 'w' else _piece[1].lower())] = _plane
+_PLANE_IDS = np.arange(PIECE_PLANES, dtype=np.uint8)[None, :, None]
+
+# Expands the board field of a FEN to one character per square
+_EXPAND_BOARD = str.maketrans({**{str(n): '.' * n for n in range(1, 9)}, '/': None})
+
+
+def _empty_batch(count: int, dtype) -> np.ndarray:
+    return np.zeros((count, NUM_PLANES, 64), dtype=dtype)
+
+
+def _fill_state_planes(out: np.ndarray, white_to_move, castling, en_passant):
+    """Side to move, castling and en passant planes; castling is an (N, 4) bool array"""
+    out[:, TURN_PLANE, :] = np.asarray(white_to_move, dtype=bool)[:, None]
+    out[:, CASTLING_PLANES['K']:CASTLING_PLANES['q'] + 1, :] = castling[:, :, None]
+    en_passant = np.asarray(en_passant, dtype=np.int64)
+    rows = np.nonzero(en_passant >= 0)[0]
+    out[rows, EN_PASSANT_PLANE, en_passant[rows]] = 1
+
+
+def _fen_en_passant(fen: str, board: str, white_to_move: bool, ep_sq: int) -> int:
+    """
+    The FEN's en passant square if it can legally be taken, else -1, so a
+    FEN that writes the square after every double push encodes the same as
+    the position loaded into a ChessEngine
+    """
+    pawn = 'P' if white_to_move else 'p'
+    if not any(board[sq] == pawn for sq in iter_squares(PAWN_ATTACKS['b' if white_to_move else 'w'][ep_sq])):
+        return -1
+    # A pawn is in place; only the full position shows whether a pin or check stops it
+    ep_sq = ChessEngine(fen)._capturable_en_passant(legal=True)
+    return -1 if ep_sq is None else ep_sq
+
+
+def encode_fens(fens: Sequence[str], dtype=np.uint8) -> np.ndarray:
+    """
+    Encode N FEN strings as an (N, NUM_PLANES, 8, 8) array. The board
+    fields are expanded and joined into one buffer, so the piece planes
+    are built for the whole batch at once. The en passant field is
+    kept only when the capture is legal, as encode_engines does.
+    """
+    count = len(fens)
+    boards = []
+    white_to_move = []
+    castling = []
+    en_passant = []
+    for fen in fens:
+        fields = fen.split()
+        board = fields[0].translate(_EXPAND_BOARD)
+        boards.append(board)
+        white = len(fields) < 2 or fields[1] == 'w'
+        white_to_move.append(white)
+        rights = fields[2] if len(fields) > 2 else '-'
+        castling.append(rights)
+        ep_sq = SQUARE_INDEX.get(fields[3], -1) if len(fields) > 3 else -1
+        if ep_sq >= 0 and len(board) == 64:
+            ep_sq = _fen_en_passant(fen, board, white, ep_sq)
+        en_passant.append(ep_sq)
+
+    joined = ''.join(boards)
+    if len(joined) != 64 * count:
+        bad = next(fen for fen, board in zip(fens, boards) if len(board) != 64)
+        raise ValueError(f"bad board in FEN {bad!r}")
+    squares = np.frombuffer(joined.encode('ascii'), dtype=np.uint8).reshape(count, 64)
+
+    out = _empty_batch(count, dtype)
+    out[:, :PIECE_PLANES, :] = _CHAR_PLANE[squares][:, None, :] == _PLANE_IDS
+    rights = np.array([[right in field for right in 'KQkq'] for field in castling],
+                      dtype=bool).reshape(count, 4)
+    _fill_state_planes(out, white_to_move, rights, en_passant)
+    return out.reshape(count, NUM_PLANES, 8, 8)
+
+
+def encode_engines(engines: Sequence[ChessEngine], dtype=np.uint8) -> np.ndarray:
+    """
+    Encode N engine positions as an (N, NUM_PLANES, 8, 8) array straight
+    from their bitboards: bit i of a bitboard is square i, so unpacking
+    the little-endian bytes gives the planes in board order.
+    """
+    count = len(engines)
+    bitboards = np.array([[engine.bitboards[piece] for piece in PIECE_NAMES] for engine in engines],
+                         dtype='<u8').reshape(count, PIECE_PLANES)
+    pieces = np.unpackbits(bitboards.view(np.uint8), bitorder='little').reshape(count, PIECE_PLANES, 64)
+
+    out = _empty_batch(count, dtype)
+    out[:, :PIECE_PLANES, :] = pieces
+    rights = np.array([engine.castling for engine in engines], dtype=np.uint8)
+    castling = np.stack([rights & flag != 0 for flag in (CASTLE_WK, CASTLE_WQ, CASTLE_BK, CASTLE_BQ)],
+                        axis=1)
+    # Like get_fen, only an en passant square that can legally be taken
+    en_passant = [engine._capturable_en_passant(legal=True) for engine in engines]
+    en_passant = [-1 if ep_sq is None else ep_sq for ep_sq in en_passant]
+    _fill_state_planes(out, [engine.current_turn == 'w' for engine in engines], castling, en_passant)
+    return out.reshape(count, NUM_PLANES, 8, 8)
+
+
+def encode_positions(positions: Sequence[Union[str, ChessEngine]], dtype=np.uint8) -> np.ndarray:
+    """Encode a batch of FEN strings or of ChessEngine positions (not a mix)"""
+    if len(positions) and isinstance(positions[0], ChessEngine):
+        return encode_engines(positions, dtype)
+    return encode_fens(positions, dtype)
+
+
+def _build_move_vocabulary() -> List[str]:
+    """
+    Every move any piece could make on an empty board, as UCI: queen lines
+    and knight jumps from each square, plus the four promotions of each
+    pawn step onto the last rank. Castling is the king's two-square move.
+    """
+    vocabulary = []
+    for from_sq in range(64):
+        targets = rook_attacks(from_sq, 0) | bishop_attacks(from_sq, 0) | KNIGHT_ATTACKS[from_sq]
+        for to_sq in iter_squares(targets):
+            vocabulary.append(SQUARE_NAMES[from_sq] + SQUARE_NAMES[to_sq])
+    for from_row, to_row in ((1, 0), (6, 7)):
+        for from_col in range(8):
+            for to_col in (from_col - 1, from_col, from_col + 1):
+                if 0 <= to_col < 8:
+                    name = SQUARE_NAMES[from_row * 8 + from_col] + SQUARE_NAMES[to_row * 8 + to_col]
+                    vocabulary.extend(name + piece.lower() for piece in PROMOTION_CODES)
+    return vocabulary
+
+
+MOVE_VOCABULARY = _build_move_vocabulary()
+MOVE_INDEX = {name: index for index, name in enumerate(MOVE_VOCABULARY)}
+
+
+def _build_packed_index() -> np.ndarray:
+    """Vocabulary index of every packed move ChessEngine can produce, -1 for the rest"""
+    table = np.full(1 << 16, -1, dtype=np.int16)
+    castling_moves = {'e1g1', 'e1c1', 'e8g8', 'e8c8'}
+    for index, name in enumerate(MOVE_VOCABULARY):
+        from_sq, to_sq = SQUARE_INDEX[name[:2]], SQUARE_INDEX[name[2:4]]
+        if len(name) == 5:
+            table[encode_move(from_sq, to_sq, name[4].upper())] = index
+            continue
+        table[encode_move(from_sq, to_sq)] = index
+        # The same squares can also carry an en passant or castling flag
+        if name[1] in '45' and name[3] in '36' and abs(from_sq - to_sq) in (7, 9):
+            table[encode_move(from_sq, to_sq, flag=MOVE_EN_PASSANT)] = index
+        if name in castling_moves:
+            table[encode_move(from_sq, to_sq, flag=MOVE_CASTLING)] = index
+    return table
+
+
+_PACKED_INDEX = _build_packed_index()
+
+
+def encode_moves(moves) -> np.ndarray:
+    """
+    Vocabulary indices of a batch of moves, given as packed moves (a
+    sequence of ints, array('H') or integer array) or as UCI strings.
+    Raises ValueError for a move outside the vocabulary.
+    """
+    if len(moves) and isinstance(moves[0], str):
+        try:
+            return np.array([MOVE_INDEX[move] for move in moves], dtype=np.int64)
+        except KeyError as error:
+            raise ValueError(f"move {error.args[0]!r} is not in the vocabulary") from None
+    indices = _PACKED_INDEX[np.asarray(moves, dtype=np.uint16)].astype(np.int64)
+    if (indices < 0).any():
+        bad = int(np.asarray(moves, dtype=np.uint16)[indices < 0][0])
+        raise ValueError(f"packed move {bad} is not in the vocabulary")
+    return indices
+
+
+def decode_moves(indices) -> List[str]:
+    """UCI names of vocabulary indices"""
+    return [MOVE_VOCABULARY[index] for index in np.asarray(indices).ravel()]
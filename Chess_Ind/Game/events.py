@@ -0,0 +1,124 @@
+import json
+import sys
+from collections import deque
+from typing import Optional, TextIO
+
+COLOR_NAMES = {'w': 'White', 'b': 'Black'}
+
+
+class NullSink:
+    """
+    Event sink that drops everything. Bots and ChessGame report what they
+    do through a sink; this one is the headless default, so nothing gets
+    formatted unless someone is listening.
+    """
+    def game_start(self, white: str, black: str):
+        pass
+
+    def move(self, bot: str, color: str, piece: str, from_sq: str, to_sq: str, info: Optional[dict] = None):
+        pass
+
+    def status(self, engine, turn: int):
+        pass
+
+    def game_end(self, result: Optional[str], plies: int, engine=None):
+        pass
+
+    def flush(self):
+        pass
+
+
+# Shared default, since a NullSink has no state
+NULL_SINK = NullSink()
+
+
+class TextSink(NullSink):
+    """
+    Human-readable log. Lines are kept in memory and written to stream on
+    flush() (ChessGame.run flushes when a game ends), or every
+    buffer_lines lines if that is set. With no stream the text is only
+    kept, for getvalue(). Only the last history_lines flushed lines are
+    kept (None keeps them all), so a sink left running through a long
+    tournament doesn't grow without limit.
+    """
+    def __init__(self, stream: Optional[TextIO] = None, buffer_lines: Optional[int] = None,
+                 show_board: bool = True, history_lines: Optional[int] = 10000):
+        self.stream = stream
+        self.buffer_lines = buffer_lines
+        self.show_board = show_board
+        self.lines = []
+        self._written = deque(maxlen=history_lines)
+
+    def _emit(self, line: str):
+        self.lines.append(line)
+        if self.buffer_lines is not None and len(self.lines) >= self.buffer_lines:
+            self.flush()
+
+    def game_start(self, white, black):
+        self._emit(f"\n=== {white} (White) vs {black} (Black) ===")
+
+    def move(self, bot, color, piece, from_sq, to_sq, info=None):
+        details = ""
+        if info:
+            details = " (" + ", ".join(f"{key} {value}" for key, value in info.items()) + ")"
+        self._emit(f"{bot}({color}): {piece} {from_sq} -> {to_sq}{details}")
+
+    def status(self, engine, turn):
+        self._emit(f"\n--- Turn {turn} ---")
+        self._emit(f"Current player: {COLOR_NAMES[engine.current_turn]}")
+        if self.show_board:
+            self._emit(engine.get_board_ascii())
+        status = engine.game_status()
+        if status['check'] and not status['checkmate']:
+            self._emit(f"{COLOR_NAMES[engine.current_turn]} is in check!")
+
+    def game_end(self, result, plies, engine=None):
+        if result:
+            self._emit(f"\nGame Over: {result}")
+        self._emit(f"\n=== Game ended after {plies} plies ===")
+        if engine is not None and self.show_board:
+            self._emit(engine.get_board_ascii())
+
+    def flush(self):
+        if self.stream is not None and self.lines:
+            self.stream.write("\n".join(self.lines) + "\n")
+            self.stream.flush()
+        self._written.extend(self.lines)
+        self.lines = []
+
+    def getvalue(self) -> str:
+        """What has been logged, flushed or not (up to history_lines of the flushed lines)"""
+        return "\n".join(list(self._written) + self.lines)
+
+
+class JsonLinesSink(NullSink):
+    """One JSON object per event, written to stream as it happens"""
+    def __init__(self, stream: Optional[TextIO] = None):
+        self.stream = stream or sys.stdout
+
+    def _emit(self, event: dict):
+        self.stream.write(json.dumps(event) + "\n")
+
+    def game_start(self, white, black):
+        self._emit({'event': 'game_start', 'white': white, 'black': black})
+
+    def move(self, bot, color, piece, from_sq, to_sq, info=None):
+        event = {'event': 'move', 'bot': bot, 'color': color, 'piece': piece,
+                 'from': from_sq, 'to': to_sq}
+        if info:
+            event['info'] = info
+        self._emit(event)
+
+    def status(self, engine, turn):
+        status = engine.game_status()
+        self._emit({'event': 'status', 'turn': turn, 'fen': engine.get_fen(),
+                    'check': status['check']})
+
+    def game_end(self, result, plies, engine=None):
+        event = {'event': 'game_end', 'result': result, 'plies': plies}
+        if engine is not None:
+            event['fen'] = engine.get_fen()
+        self._emit(event)
+
+    def flush(self):
+        self.stream.flush()
@@ -0,0 +1,155 @@
+import contextlib
+import cProfile
+import functools
+import json
+import pstats
+import sys
+import time
+from collections import Counter
+from typing import Optional
+
+from Game import bots
+from Game.chess_engine import ChessEngine
+from Game.game import ChessGame
+
+# ChessEngine methods whose calls are counted
+COUNTED_METHODS = [
+    "get_legal_moves_for_piece",
+    "_is_move_legal",
+    "is_square_attacked",
+    "is_square_attacked_on_board",
+    "make_move",
+    "undo_move",
+    "_make_move_unchecked",
+    "unmake_move",
+    "_generate_legal_moves",
+]
+
+
+def _timed_methods():
+    """(class, method name) pairs that get timers: every bot's get_move and play_turn"""
+    timed = [(ChessGame, "play_turn")]
+    for value in vars(bots).values():
+        if isinstance(value, type) and "get_move" in vars(value):
+            timed.append((value, "get_move"))
+    return timed
+
+
+class Instrumentation:
+    """
+    Opt-in call counters and timers for the engine, bots and ChessGame.
+
+    enable() swaps the watched methods on their classes for wrappers and
+    disable() puts the originals back, so with instrumentation off the
+    code runs exactly as it would without this module. Also usable as a
+    context manager.
+    """
+    def __init__(self):
+        self.counts = Counter()
+        self.timings = {}  # name -> [calls, total seconds]
+        self._active = Counter()  # method name -> timed calls in progress
+        self._originals = []
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self._originals)
+
+    def enable(self):
+        """Install the wrappers (does nothing if already enabled)"""
+        if self.enabled:
+            return
+        for name in COUNTED_METHODS:
+            self._swap(ChessEngine, name, self._counting(f"ChessEngine.{name}", vars(ChessEngine)[name]))
+        for cls, name in _timed_methods():
+            self._swap(cls, name, self._timing(f"{cls.__name__}.{name}", name, vars(cls)[name]))
+
+    def disable(self):
+        """Put the original methods back"""
+        while self._originals:
+            cls, name, original = self._originals.pop()
+            setattr(cls, name, original)
+
+    def reset(self):
+        """Zero the counters and timers"""
+        self.counts.clear()
+        self.timings.clear()
+
+    def _swap(self, cls, name, wrapper):
+        self._originals.append((cls, name, vars(cls)[name]))
+        setattr(cls, name, wrapper)
+
+    def _counting(self, label, method):
+        counts = self.counts
+
+        @functools.wraps(method)
+        def wrapper(*args, **kwargs):
+            counts[label] += 1
+            return method(*args, **kwargs)
+        return wrapper
+
+    def _timing(self, label, name, method):
+        timings = self.timings
+        perf_counter = time.perf_counter
+        # Wrapped methods of the same name share a depth count, so when a
+        # subclass get_move calls super().get_move only the outermost call
+        # is timed and the time isn't counted twice
+        active = self._active
+
+        @functools.wraps(method)
+        def wrapper(*args, **kwargs):
+            if active[name]:
+                return method(*args, **kwargs)
+            active[name] += 1
+            start = perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                active[name] -= 1
+                entry = timings.setdefault(label, [0, 0.0])
+                entry[0] += 1
+                entry[1] += perf_counter() - start
+        return wrapper
+
+    def stats(self) -> dict:
+        """Snapshot of the counters and timers as plain data"""
+        return {
+            'counts': dict(sorted(self.counts.items())),
+            'timers': {
+                label: {'calls': calls, 'total_s': total, 'mean_s': total / calls if calls else 0.0}
+                for label, (calls, total) in sorted(self.timings.items())
+            },
+        }
+
+    def stats_json(self, indent: Optional[int] = 2) -> str:
+        return json.dumps(self.stats(), indent=indent)
+
+    def __enter__(self):
+        self.enable()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.disable()
+
+
+@contextlib.contextmanager
+def profiled(profile_path: str, stream=None):
+    """
+    Run the body under cProfile with instrumentation on, then write the
+    profile to profile_path (readable with pstats or snakeviz) and print
+    the instrumentation stats and the top functions to stream.
+    """
+    stream = stream or sys.stdout
+    instrumentation = Instrumentation()
+    profiler = cProfile.Profile()
+    with instrumentation:
+        profiler.enable()
+        try:
+            yield instrumentation
+        finally:
+            profiler.disable()
+    profiler.dump_stats(profile_path)
+
+    stream.write("\n=== Instrumentation ===\n")
+    stream.write(instrumentation.stats_json() + "\n")
+    stream.write(f"\n=== Profile (full output in {profile_path}) ===\n")
+    pstats.Stats(profiler, stream=stream).sort_stats("cumulative").print_stats(15)
@@ -0,0 +1,55 @@
+import re
+from typing import Dict, Iterator, List, Optional, TextIO, Tuple
+
+from Game.chess_engine import ChessEngine, move_to_uci
+
+TAG_PATTERN = re.compile(r'^\[(\w+)\s+"(.*)"\]')
+
+
+def read_games(stream: TextIO) -> Iterator[Tuple[Dict[str, str], str]]:
+    """
+    Yield (headers, movetext) for each game in a PGN stream, one game at a
+    time. A game starts at the first tag line that follows movetext.
+    """
+    headers = {}
+    movetext = []
+    seen_movetext = False
+    for line in stream:
+        if line.startswith('['):
+            if seen_movetext:
+                yield headers, ''.join(movetext)
+                headers, movetext, seen_movetext = {}, [], False
+            match = TAG_PATTERN.match(line)
+            if match:
+                headers[match.group(1)] = match.group(2)
+        elif line.strip():
+            seen_movetext = True
+            movetext.append(line)
+    if headers or movetext:
+        yield headers, ''.join(movetext)
+
+
+def game_records(headers: Dict[str, str], movetext: str,
+                 errors: Optional[List[ValueError]] = None) -> Iterator[Tuple[str, str, str]]:
+    """
+    Replay one game's mainline with ChessEngine, yielding (fen, uci move,
+    result) for every move. FEN is the position the move is played from.
+    Like python-chess, a game with an illegal move stops at the last good
+    one (a bad FEN header gives no records); the ValueError is appended to
+    errors if a list is given, so a dump with a bad game still converts.
+    """
+    result = headers.get('Result', '*')
+    try:
+        engine = ChessEngine(headers.get('FEN'))
+        for move in engine.replay(movetext):
+            yield engine.get_fen(), move_to_uci(move), result
+    except ValueError as error:
+        if errors is not None:
+            errors.append(error)
+
+
+def iter_records(stream: TextIO,
+                 errors: Optional[List[ValueError]] = None) -> Iterator[Tuple[str, str, str]]:
+    """(fen, uci move, result) for every mainline move of every game in a PGN stream"""
+    for headers, movetext in read_games(stream):
+        yield from game_records(headers, movetext, errors)
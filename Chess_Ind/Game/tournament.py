@@ -0,0 +1,288 @@
+import itertools
+import math
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from Game.chess_engine import ChessEngine
+
+# Game results, from white's point of view
+WHITE_WIN = "1-0"
+BLACK_WIN = "0-1"
+DRAW = "1/2-1/2"
+
+
+def _bot_name(bot_spec) -> str:
+    """Display name of a bot class or (class, kwargs) pair"""
+    bot_class = bot_spec[0] if isinstance(bot_spec, tuple) else bot_spec
+    return bot_class.__name__
+
+
+def _make_bot(bot_spec, color: str):
+    """Build a bot from a class or a (class, kwargs) pair"""
+    if isinstance(bot_spec, tuple):
+        bot_class, kwargs = bot_spec
+        return bot_class(color, **kwargs)
+    return bot_spec(color)
+
+
+def play_game(white_spec, black_spec, max_plies: int = 200, seed: Optional[int] = None,
+              fen: Optional[str] = None) -> Tuple[str, str, int]:
+    """
+    Play one headless game. Bots are given as classes or (class, kwargs)
+    pairs so they can be sent to worker processes.
+    Returns (result, reason, plies); a game still going after max_plies is
+    scored as a draw.
+    """
+    if seed is not None:
+        random.seed(seed)
+    engine = ChessEngine(fen)
+    bots = {'w': _make_bot(white_spec, 'w'), 'b': _make_bot(black_spec, 'b')}
+
+    plies = 0
+    while plies < max_plies:
+        status = engine.game_status()
+        if status['checkmate']:
+            result = BLACK_WIN if engine.current_turn == 'w' else WHITE_WIN
+            return result, "checkmate", plies
+        if status['draw']:
+            return DRAW, status['draw'], plies
+
+        color = engine.current_turn
+        move = bots[color].get_move(engine)
+        if not move or not engine.make_move(*move):
+            # A bot that can't produce a legal move forfeits
+            return (BLACK_WIN if color == 'w' else WHITE_WIN), "illegal move", plies
+        plies += 1
+
+    return DRAW, "move limit", plies
+
+
+def _play_game_job(job):
+    """Worker entry point: job is (white_spec, black_spec, max_plies, seed, fen)"""
+    return play_game(*job)
+
+
+def _run_jobs(jobs, workers: Optional[int]):
+    """Play game jobs in order, over a process pool unless workers is 1"""
+    if workers == 1:
+        yield from map(_play_game_job, jobs)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        yield from executor.map(_play_game_job, jobs, chunksize=max(1, len(jobs) // 64))
+
+
+class Score:
+    """Wins, draws and losses of one side of a match"""
+    def __init__(self, wins: int = 0, draws: int = 0, losses: int = 0):
+        self.wins = wins
+        self.draws = draws
+        self.losses = losses
+
+    @property
+    def games(self) -> int:
+        return self.wins + self.draws + self.losses
+
+    @property
+    def points(self) -> float:
+        return self.wins + 0.5 * self.draws
+
+    def add(self, points: float):
+        """Record one game worth 1, 0.5 or 0 points"""
+        if points == 1:
+            self.wins += 1
+        elif points == 0:
+            self.losses += 1
+        else:
+            self.draws += 1
+
+    def elo(self) -> Tuple[float, float]:
+        """Elo difference this score implies, with its 95% error margin"""
+        return elo_difference(self.wins, self.draws, self.losses)
+
+    def __repr__(self):
+        return f"Score(+{self.wins} ={self.draws} -{self.losses})"
+
+
+def _elo_from_score(score: float) -> float:
+    """Elo difference for an expected score strictly between 0 and 1"""
+    return -400 * math.log10(1 / score - 1) or 0.0  # no "-0" for an even score
+
+
+def elo_difference(wins: int, draws: int, losses: int) -> Tuple[float, float]:
+    """
+    Elo difference and its 95% error margin for a W/D/L record.
+    A one-sided record (no losses, or no wins) gives an infinite margin.
+    """
+    games = wins + draws + losses
+    if games == 0:
+        return 0.0, math.inf
+    score = (wins + 0.5 * draws) / games
+    if score <= 0 or score >= 1:
+        return (math.inf if score >= 1 else -math.inf), math.inf
+
+    # Standard error of the mean per-game score
+    variance = (wins * (1 - score) ** 2 + draws * (0.5 - score) ** 2 +
+                losses * score ** 2) / games
+    error = 1.96 * math.sqrt(variance / games)
+    low, high = score - error, score + error
+    if low <= 0 or high >= 1:
+        return _elo_from_score(score), math.inf
+    return _elo_from_score(score), (_elo_from_score(high) - _elo_from_score(low)) / 2
+
+
+def sprt_llr(wins: int, draws: int, losses: int, elo0: float, elo1: float) -> float:
+    """
+    Log-likelihood ratio of H1 (difference is elo1) against H0 (elo0),
+    using the normal approximation to the trinomial W/D/L distribution.
+    """
+    games = wins + draws + losses
+    if games == 0 or wins + draws == 0 or losses + draws == 0:
+        return 0.0
+    score = (wins + 0.5 * draws) / games
+    variance = (wins + 0.25 * draws) / games - score ** 2
+    if variance <= 0:
+        return 0.0
+    score0 = 1 / (1 + 10 ** (-elo0 / 400))
+    score1 = 1 / (1 + 10 ** (-elo1 / 400))
+    return (score1 - score0) * (2 * score - score0 - score1) / (2 * variance / games)
+
+
+def sprt_bounds(alpha: float = 0.05, beta: float = 0.05) -> Tuple[float, float]:
+    """LLR bounds: below the first accept H0, above the second accept H1"""
+    return math.log(beta / (1 - alpha)), math.log((1 - beta) / alpha)
+
+
+class TournamentResult:
+    """Per-pairing and per-bot scores of a tournament or match"""
+    def __init__(self, names: Sequence[str]):
+        self.names = list(names)
+        self.scores = {name: Score() for name in self.names}
+        self.pairings: Dict[Tuple[str, str], Score] = {}
+        self.games: List[Tuple[str, str, str, str, int]] = []  # white, black, result, reason, plies
+        self.sprt: Optional[str] = None  # "H0", "H1" or None when undecided
+
+    def record(self, white: str, black: str, result: str, reason: str, plies: int):
+        """Add one finished game"""
+        white_points = {WHITE_WIN: 1, BLACK_WIN: 0, DRAW: 0.5}[result]
+        self.scores[white].add(white_points)
+        self.scores[black].add(1 - white_points)
+        # Pairings are kept once per pair, from the first-listed bot's side
+        first, second = sorted((white, black), key=self.names.index)
+        pairing = self.pairings.setdefault((first, second), Score())
+        pairing.add(white_points if first == white else 1 - white_points)
+        self.games.append((white, black, result, reason, plies))
+
+    def table(self) -> str:
+        """Standings as text, best score first"""
+        lines = [f"{'bot':<20}{'games':>7}{'W':>6}{'D':>6}{'L':>6}{'points':>8}{'elo':>14}"]
+        ranked = sorted(self.names, key=lambda name: self.scores[name].points, reverse=True)
+        for name in ranked:
+            score = self.scores[name]
+            elo, margin = score.elo()
+            lines.append(f"{name:<20}{score.games:>7}{score.wins:>6}{score.draws:>6}"
+                         f"{score.losses:>6}{score.points:>8}{_format_elo(elo, margin):>14}")
+        return "\n".join(lines)
+
+
+def _format_elo(elo: float, margin: float) -> str:
+    if math.isinf(elo):
+        return "+inf" if elo > 0 else "-inf"
+    if math.isinf(margin):
+        return f"{elo:+.0f} +/- inf"
+    return f"{elo:+.0f} +/- {margin:.0f}"
+
+
+def _unique_names(bot_specs) -> List[str]:
+    """Bot names, numbered when the same class appears twice"""
+    names = [_bot_name(spec) for spec in bot_specs]
+    for name in set(names):
+        if names.count(name) > 1:
+            numbering = itertools.count(1)
+            names = [f"{n}#{next(numbering)}" if n == name else n for n in names]
+    return names
+
+
+def round_robin(bot_specs, rounds: int = 1, max_plies: int = 200, workers: Optional[int] = None,
+                seed: int = 0) -> TournamentResult:
+    """
+    Play every pair of bots against each other, rounds times with each
+    color assignment, spread over a process pool (workers=None uses every
+    core, 1 plays in this process). Each game gets its own seed derived
+    from seed, so a run can be repeated.
+    """
+    names = _unique_names(bot_specs)
+    jobs = []
+    labels = []
+    for round_number in range(rounds):
+        for i, j in itertools.combinations(range(len(bot_specs)), 2):
+            for white, black in ((i, j), (j, i)):
+                jobs.append((bot_specs[white], bot_specs[black], max_plies,
+                             seed + len(jobs), None))
+                labels.append((names[white], names[black]))
+
+    result = TournamentResult(names)
+    for (white, black), outcome in zip(labels, _run_jobs(jobs, workers)):
+        result.record(white, black, *outcome)
+    return result
+
+
+def sprt_match(candidate_spec, baseline_spec, elo0: float = 0, elo1: float = 10,
+               alpha: float = 0.05, beta: float = 0.05, max_games: int = 2000,
+               max_plies: int = 200, workers: Optional[int] = None, seed: int = 0) -> TournamentResult:
+    """
+    Play candidate against baseline in color-swapped pairs until the SPRT
+    decides between H0 (the candidate is elo0 better) and H1 (elo1
+    better), or max_games is reached. result.sprt is "H0", "H1" or None.
+    Games already running when the test is decided are still counted.
+    """
+    names = _unique_names([candidate_spec, baseline_spec])
+    specs = dict(zip(names, (candidate_spec, baseline_spec)))
+    candidate, baseline = names
+    lower, upper = sprt_bounds(alpha, beta)
+    result = TournamentResult(names)
+
+    def jobs():
+        for number in range(max_games):
+            white, black = (candidate, baseline) if number % 2 == 0 else (baseline, candidate)
+            yield white, black, (specs[white], specs[black], max_plies, seed + number, None)
+
+    def decided():
+        score = result.scores[candidate]
+        llr = sprt_llr(score.wins, score.draws, score.losses, elo0, elo1)
+        if llr <= lower:
+            result.sprt = "H0"
+        elif llr >= upper:
+            result.sprt = "H1"
+        return result.sprt is not None
+
+    pending_jobs = jobs()
+    if workers == 1:
+        for white, black, job in pending_jobs:
+            result.record(white, black, *play_game(*job))
+            if decided():
+                break
+        return result
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # Keep a couple of games per worker queued so nothing sits idle
+        queue_size = 2 * (workers or os.cpu_count() or 1)
+        running = {}
+        for white, black, job in itertools.islice(pending_jobs, queue_size):
+            running[executor.submit(_play_game_job, job)] = (white, black)
+        while running:
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                white, black = running.pop(future)
+                result.record(white, black, *future.result())
+            if result.sprt is not None:
+                continue
+            if decided():
+                # Drop the queued games; the ones already started finish
+                running = {future: labels for future, labels in running.items()
+                           if not future.cancel()}
+            else:
+                for white, black, job in itertools.islice(pending_jobs, len(done)):
+                    running[executor.submit(_play_game_job, job)] = (white, black)
+    return result
@@ -0,0 +1,111 @@
+from array import array
+from typing import Optional, Tuple
+
+# Bound types stored with each score
+EXACT = 0
+LOWER_BOUND = 1  # search failed high: the real score is at least this
+UPPER_BOUND = 2  # search failed low: the real score is at most this
+
+# Each entry is a 64-bit key plus one 64-bit word of packed data:
+#   bits 0-15   best move (0 for none)
+#   bits 16-23  depth
+#   bits 24-25  bound type
+#   bits 26-57  score + SCORE_OFFSET
+#   bit  63     set on every stored entry, so an empty slot reads as 0
+ENTRY_BYTES = 16
+SCORE_OFFSET = 1 << 31
+_VALID = 1 << 63
+_MASK_64 = (1 << 64) - 1
+
+
+class TranspositionTable:
+    """
+    Fixed-size hash table of search results keyed by Zobrist hash.
+
+    Slots come in pairs: the first keeps the deepest result seen for its
+    index, the second is overwritten on every store that doesn't go into
+    the first. Storage is two preallocated arrays, so memory stays at the
+    size given no matter how many positions are stored.
+    """
+    def __init__(self, size_mb: float = 16):
+        entries = max(2, int(size_mb * 1024 * 1024) // ENTRY_BYTES)
+        self.buckets = entries // 2
+        self.keys = array('Q', [0]) * (self.buckets * 2)
+        self.data = array('Q', [0]) * (self.buckets * 2)
+        self.hits = 0
+        self.misses = 0
+        self.collisions = 0
+        self.stores = 0
+
+    def clear(self):
+        """Empty the table and reset the counters"""
+        # One slice copy instead of a Python loop over every entry
+        empty = array('Q', [0]) * len(self.keys)
+        self.keys[:] = empty
+        self.data[:] = empty
+        self.hits = self.misses = self.collisions = self.stores = 0
+
+    def probe(self, key: int) -> Optional[Tuple[int, int, int, int]]:
+        """Look up a position. Returns (depth, bound, score, move) or None"""
+        key &= _MASK_64
+        slot = (key % self.buckets) * 2
+        keys = self.keys
+        for i in (slot, slot + 1):
+            if keys[i] == key and self.data[i]:
+                self.hits += 1
+                packed = self.data[i]
+                return ((packed >> 16) & 0xFF,
+                        (packed >> 24) & 0x3,
+                        ((packed >> 26) & 0xFFFFFFFF) - SCORE_OFFSET,
+                        packed & 0xFFFF)
+
+        self.misses += 1
+        if self.data[slot] or self.data[slot + 1]:
+            self.collisions += 1
+        return None
+
+    def store(self, key: int, depth: int, bound: int, score: int, move: int = 0):
+        """Save a search result, replacing by depth in the first slot of the pair"""
+        key &= _MASK_64
+        slot = (key % self.buckets) * 2
+        packed = (_VALID | ((score + SCORE_OFFSET) << 26) | (bound << 24) |
+                  (min(depth, 255) << 16) | (move & 0xFFFF))
+
+        keys = self.keys
+        data = self.data
+        if keys[slot] == key:
+            # Keep the best move we already had if this result has none
+            if not move:
+                packed |= data[slot] & 0xFFFF
+            data[slot] = packed
+        elif not data[slot] or depth >= (data[slot] >> 16) & 0xFF:
+            # The deeper result takes the first slot; the one it displaces
+            # moves to the always-replace slot
+            keys[slot + 1] = keys[slot]
+            data[slot + 1] = data[slot]
+            keys[slot] = key
+            data[slot] = packed
+        else:
+            if not move and keys[slot + 1] == key:
+                packed |= data[slot + 1] & 0xFFFF
+            keys[slot + 1] = key
+            data[slot + 1] = packed
+        self.stores += 1
+
+    def usage(self) -> float:
+        """Fraction of slots in use"""
+        used = sum(1 for packed in self.data if packed)
+        return used / len(self.data)
+
+    def stats(self) -> dict:
+        """Counters for hit rate and table pressure"""
+        probes = self.hits + self.misses
+        return {
+            'size_mb': len(self.keys) * ENTRY_BYTES / (1024 * 1024),
+            'entries': len(self.keys),
+            'hits': self.hits,
+            'misses': self.misses,
+            'collisions': self.collisions,
+            'stores': self.stores,
+            'hit_rate': self.hits / probes if probes else 0.0,
+        }
@@ -0,0 +1,24 @@
+from benchmark import compare, percentile, time_per_op
+from Game.positions import POSITIONS
+from Game.chess_engine import ChessEngine
+
+def test_compare_flags_slowdowns_past_threshold():
+    baseline = {"results": {"make_undo": 1.0e-6, "fen.load": 5.0e-5, "gone": 1.0}}
+    current = {"results": {"make_undo": 1.2e-6, "fen.load": 5.2e-5, "new": 1.0}}
+    rows, regressions = compare(baseline, current, threshold=0.10)
+    # Only benchmarks present in both runs are compared
+    assert [row[0] for row in rows] == ["fen.load", "make_undo"]
+    assert regressions == ["make_undo"]
+
+def test_percentile_and_timer():
+    values = list(range(1, 101))
+    assert percentile(values, 0.5) == 50
+    assert percentile(values, 0.99) == 99
+    assert time_per_op(lambda: None, 1, min_time=0.001, repeat=2) > 0
+
+def test_benchmark_positions_are_valid():
+    for fens in POSITIONS.values():
+        for fen in fens:
+            engine = ChessEngine(fen)
+            assert engine.get_fen().split()[:4] == fen.split()[:4]
+            assert engine.legal_moves()
@@ -1,6 +1,7 @@
 # Tests/test_board.py
 import pytest
 from Game.chess_engine import ChessEngine
+from Game.positions import ALL_POSITIONS
 
 def test_board_creation():
     engine = ChessEngine()
@@ -68,3 +69,259 @@ def test_coordinate_conversion():
     
     square = engine.coords_to_square((4, 4))
     assert square == "e4", f"(4,4) should be e4, got {square}"
+
+def test_bitboards_match_board_view():
+    """Bitboards and the board[row][col] view describe the same position"""
+    engine = ChessEngine("r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1")
+    engine.make_move("e1", "g1")  # castling moves the rook as well
+    engine.make_move("h3", "g2")
+    engine.undo_move()
+
+    for row in range(8):
+        for col in range(8):
+            piece = engine.board[row][col]
+            bit = 1 << (row * 8 + col)
+            if piece == "  ":
+                assert not engine.occupied & bit
+            else:
+                assert engine.bitboards[piece] & bit
+                assert engine.occupancy[piece[0]] & bit
+    assert engine.board[7][5] == "wR"
+
+def test_undo_restores_position_and_counters():
+    """Undoing moves brings back the exact FEN, including the move counters"""
+    fen = "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 3 12"
+    engine = ChessEngine(fen)
+    fens = [engine.get_fen()]
+    for from_sq, to_sq in [("e1", "c1"), ("h3", "g2"), ("a2", "a4"), ("b4", "a3"), ("e5", "f7"), ("g2", "h1")]:
+        assert engine.make_move(from_sq, to_sq), f"{from_sq}{to_sq} should be legal"
+        fens.append(engine.get_fen())
+
+    assert engine.fullmove_number == 15
+    while len(fens) > 1:
+        fens.pop()
+        assert engine.undo_move()
+        assert engine.get_fen() == fens[-1]
+    assert engine.get_fen() == fen
+    assert engine.undo_move() == False
+
+def test_pins_and_checks_limit_legal_moves():
+    """Pinned pieces stay on the pin line and checks must be answered"""
+    # Bishop on e2 is pinned by the rook on e8; it has no legal moves
+    engine = ChessEngine("4r1k1/8/8/8/8/8/4B3/4K3 w - - 0 1")
+    assert engine.get_legal_moves_for_piece(engine.square_to_coords("e2")) == []
+
+    # Rook on e4 is pinned on the file and can only slide along it
+    engine = ChessEngine("4r1k1/8/8/8/4R3/8/8/4K3 w - - 0 1")
+    moves = engine.get_legal_moves_for_piece(engine.square_to_coords("e4"))
+    assert sorted(engine.coords_to_square(m) for m in moves) == ["e2", "e3", "e5", "e6", "e7", "e8"]
+
+    # In check from the queen on a5: block with the knight or move the king
+    engine = ChessEngine("4k3/8/8/q7/8/3P4/8/1N2K3 w - - 0 1")
+    moves = sorted(engine.get_all_legal_moves_as_strings())
+    assert moves == [("b1", "c3"), ("b1", "d2"), ("e1", "d1"), ("e1", "e2"), ("e1", "f1"), ("e1", "f2")]
+
+    # En passant that would expose the king along the rank is illegal
+    engine = ChessEngine("8/8/8/K2pP2r/8/8/8/7k w - d6 0 1")
+    moves = engine.get_legal_moves_for_piece(engine.square_to_coords("e5"))
+    assert engine.square_to_coords("d6") not in moves
+
+def test_king_squares_and_piece_squares_are_tracked():
+    """King squares and piece lists follow make_move/undo_move"""
+    engine = ChessEngine("r3k2r/8/8/8/8/8/8/R3K2R w KQkq - 0 1")
+    assert engine.king_squares == {'w': 60, 'b': 4}
+    assert sorted(engine.piece_squares('w')) == [(7, 0), (7, 4), (7, 7)]
+
+    engine.make_move("e1", "c1")
+    assert engine.king_squares['w'] == 58
+    assert sorted(engine.piece_squares('w')) == [(7, 2), (7, 3), (7, 7)]
+
+    engine.undo_move()
+    assert engine.king_squares['w'] == 60
+    assert sorted(engine.piece_squares('w')) == [(7, 0), (7, 4), (7, 7)]
+
+def test_legal_moves_generated_once_per_position(monkeypatch):
+    """Bots, move validation and status checks share one cached move list"""
+    import random
+    from Game.game import ChessGame
+    from Game.bots import CaptureBot, CenterControlBot
+
+    calls = []
+    original = ChessEngine._generate_legal_moves
+    def counting(self, color):
+        calls.append((color, self.hash))
+        return original(self, color)
+    monkeypatch.setattr(ChessEngine, "_generate_legal_moves", counting)
+
+    game = ChessGame(CenterControlBot('w'), CenterControlBot('b'))
+    for _ in range(4):
+        game.play_turn()
+        game.engine.is_game_over()
+        game.engine.get_game_result()
+        game.engine.is_check()
+    # One generation per position a bot moved in; the status checks
+    # stop at the first legal move without building the list
+    assert len(calls) == 4
+
+    # Undoing hands back the cached list of the earlier position
+    game.engine.undo_move()
+    game.engine.get_all_legal_moves()
+    assert len(calls) == 4
+
+    # CaptureBot looks for captures with the staged generator and only
+    # builds the full list when there is nothing to take, so it may
+    # generate less than once per position, but never twice for one
+    calls.clear()
+    random.seed(0)
+    game = ChessGame(CaptureBot('w'), CaptureBot('b'))
+    for _ in range(8):
+        game.play_turn()
+        game.engine.is_game_over()
+        game.engine.get_game_result()
+        game.engine.is_check()
+    assert 0 < len(calls) <= 8
+    assert len(set(calls)) == len(calls)
+
+def test_packed_moves():
+    """Moves pack into 16 bits and make_move takes them directly"""
+    from Game.chess_engine import encode_move, move_to_uci, SQUARE_INDEX, MOVE_CASTLING
+
+    e2e4 = encode_move(SQUARE_INDEX["e2"], SQUARE_INDEX["e4"])
+    assert e2e4 < 1 << 16
+    assert move_to_uci(e2e4) == "e2e4"
+    assert move_to_uci(encode_move(SQUARE_INDEX["a7"], SQUARE_INDEX["a8"], 'N')) == "a7a8n"
+
+    engine = ChessEngine()
+    moves = engine.legal_moves()
+    assert moves.typecode == 'H' and len(moves) == 20
+    assert engine.make_move(e2e4)
+    assert engine.board[4][4] == "wP"
+    assert not engine.make_move(e2e4)  # not legal for black
+
+    # Every promotion piece is its own move, the tuple API lists each once
+    engine.load_from_fen("8/P6k/8/8/8/8/8/K7 w - - 0 1")
+    assert sorted(move_to_uci(m) for m in engine.legal_moves() if m & 63 == SQUARE_INDEX["a7"]) == \
+        ["a7a8b", "a7a8n", "a7a8q", "a7a8r"]
+    assert engine.get_all_legal_moves_as_strings().count(("a7", "a8")) == 1
+    assert engine.make_move("a7", "a8", 'n')
+    assert engine.board[0][0] == "wN"
+
+    engine.load_from_fen("4k3/8/8/8/8/8/8/4K2R w K - 0 1")
+    castle = encode_move(SQUARE_INDEX["e1"], SQUARE_INDEX["g1"], flag=MOVE_CASTLING)
+    assert castle in engine.legal_moves()
+    engine.make_move(castle)
+    assert engine.board[7][5] == "wR"
+    engine.undo_move()
+    assert engine.board[7][7] == "wR"
+
+def test_board_attack_check_matches_bitboards():
+    """The board-array attack test and the bitboard one agree on every square"""
+    for fen in ALL_POSITIONS:
+        engine = ChessEngine(fen)
+        for row in range(8):
+            for col in range(8):
+                for color in 'wb':
+                    assert (engine.is_square_attacked_on_board(engine.board, (row, col), color) ==
+                            engine.is_square_attacked((row, col), color))
+
+def test_attack_maps_follow_moves():
+    """Tracked attack counts match a full recount after moves and undos"""
+    import random
+    engine = ChessEngine("r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+                         track_attacks=True)
+    rng = random.Random(7)
+    for _ in range(30):
+        moves = engine.legal_moves()
+        if not moves:
+            break
+        engine.make_move(rng.choice(moves))
+        tracked = {color: counts[:] for color, counts in engine.attack_counts.items()}
+        engine._rebuild_attack_maps()
+        assert tracked == engine.attack_counts
+    while engine.undo_move():
+        pass
+
+    fresh = ChessEngine("r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+                        track_attacks=True)
+    assert engine.attack_counts == fresh.attack_counts
+    plain = ChessEngine("r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1")
+    for row in range(8):
+        for col in range(8):
+            for color in 'wb':
+                assert engine.is_square_attacked((row, col), color) == plain.is_square_attacked((row, col), color)
+
+    # d5: the e4 pawn and c3 knight against the e6 pawn, b6 and f6 knights
+    assert engine.influence_map()[3][3] == 2 - 3
+    assert engine.mobility('w') == sum(1 for count in engine.attack_counts['w'] if count)
+
+def test_staged_move_generator():
+    """The staged generator yields every legal move once, captures first"""
+    from Game.chess_engine import SQUARE_INDEX, encode_move, move_to_uci
+    engine = ChessEngine("r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1")
+    staged = list(engine.iter_legal_moves())
+    assert sorted(staged) == sorted(engine.legal_moves())
+
+    captures = list(engine.iter_legal_moves(captures_only=True))
+    assert staged[:len(captures)] == captures
+    assert all(engine.occupied >> ((move >> 6) & 63) & 1 for move in captures)
+    # Even trades and pawn takes come first, then captures into defended squares by MVV-LVA
+    names = [move_to_uci(move) for move in captures]
+    assert names[:3] == ["e2a6", "g2h3", "d5e6"]
+    assert names[3] == "f3f6" and names[-1] == "f3h3"
+
+    # The hash move comes first and isn't repeated; a bogus hash move is ignored
+    castle = encode_move(SQUARE_INDEX["e1"], SQUARE_INDEX["g1"], flag=3)
+    staged = list(engine.iter_legal_moves(hash_move=castle))
+    assert staged[0] == castle and staged.count(castle) == 1
+    bogus = encode_move(SQUARE_INDEX["a1"], SQUARE_INDEX["a8"])
+    assert not engine.is_legal(bogus)
+    assert bogus not in engine.iter_legal_moves(hash_move=bogus)
+
+def test_staged_generator_defers_quiet_moves(monkeypatch):
+    """The capture stages only look at capture squares, and all stages together match legal_moves"""
+    from Game.chess_engine import PROMOTION_SQUARES, SQUARE_INDEX
+    fens = [
+        "r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1",
+        "rnbqkbnr/ppp1p1pp/8/3pPp2/8/8/PPPP1PPP/RNBQKBNR w KQkq f6 0 3",
+        "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1",
+    ]
+    for fen in fens:
+        engine = ChessEngine(fen)
+        assert sorted(engine.iter_legal_moves()) == sorted(engine.legal_moves())
+
+    engine = ChessEngine(fens[1])
+    masks = []
+    legal_targets = ChessEngine._legal_targets
+
+    def recording(self, sq, check_info, castling=True, mask=-1):
+        masks.append(mask)
+        return legal_targets(self, sq, check_info, castling, mask)
+
+    monkeypatch.setattr(ChessEngine, "_legal_targets", recording)
+    captures = list(engine.iter_legal_moves(captures_only=True))
+    assert captures and masks
+    allowed = engine.occupancy['b'] | PROMOTION_SQUARES | (1 << SQUARE_INDEX["f6"])
+    assert all(mask & ~allowed == 0 for mask in masks)
+
+def test_castling_rights_mapping():
+    """Item writes raise instead of being lost; assigning a dict updates the bits and hash"""
+    engine = ChessEngine("r3k2r/8/8/8/8/8/8/R3K2R w KQkq - 0 1")
+    assert dict(engine.castling_rights) == {'wK': True, 'wQ': True, 'bK': True, 'bQ': True}
+    with pytest.raises(TypeError):
+        engine.castling_rights['wK'] = False
+
+    engine.legal_moves()
+    engine.castling_rights = {'wK': False, 'wQ': True, 'bK': True, 'bQ': False}
+    assert engine.get_fen().split()[2] == "Qk"
+    assert engine.hash == ChessEngine(engine.get_fen()).hash
+    moves = engine.get_all_legal_moves_as_strings()
+    assert ('e1', 'c1') in moves and ('e1', 'g1') not in moves
+
+def test_fen_en_passant_only_when_capturable():
+    """The FEN keeps the en passant square only if a legal capture exists, like python-chess"""
+    # Nothing can take on e3
+    assert ChessEngine("4k3/8/8/8/4P3/8/8/4K3 b - e3 0 1").get_fen().split()[3] == "-"
+    # d5xc6 is on offer
+    assert ChessEngine("4k3/8/8/2pP4/8/8/8/4K3 w - c6 0 2").get_fen().split()[3] == "c6"
+    # d5xc6 would leave the king in check from the b1 queen
+    assert ChessEngine("4k3/8/8/2pP4/8/3K4/8/1q6 w - c6 0 2").get_fen().split()[3] == "-"
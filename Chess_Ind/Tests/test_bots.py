@@ -1,4 +1,4 @@
-from Game.bots import RandomBot, CaptureBot, CenterControlBot
+from Game.bots import RandomBot, CaptureBot, CenterControlBot, SearchBot
 from Game.chess_engine import ChessEngine
 
 def test_random_bot():
@@ -105,3 +105,46 @@ def test_bot_colors_correct():
         piece = engine.board[coords[0]][coords[1]]
 
         assert piece[0] == 'b', f"Black bot tried to move white piece {piece}"
+
+def test_search_bot_finds_mate_in_one():
+    engine = ChessEngine("6k1/5ppp/8/8/8/8/8/R5K1 w - - 0 1")
+    bot = SearchBot('w', time_limit=None, max_depth=3)
+    assert bot.get_move(engine) == ("a1", "a8")
+
+def test_search_bot_wins_material():
+    engine = ChessEngine("4k3/8/8/3q4/8/8/3R4/4K3 w - - 0 1")
+    bot = SearchBot('w', time_limit=None, max_depth=3)
+    assert bot.get_move(engine) == ("d2", "d5")
+
+def test_search_bot_respects_node_budget():
+    """A tiny budget still returns a legal move and leaves the engine untouched"""
+    engine = ChessEngine("r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1")
+    fen = engine.get_fen()
+    bot = SearchBot('w', time_limit=None, node_limit=500)
+    move = bot.get_move(engine)
+    assert bot.nodes <= 500
+    assert engine.get_fen() == fen
+    assert move in engine.get_all_legal_moves_as_strings()
+    assert engine.make_move(*move)
+
+
+def test_random_bot_sampling():
+    """Sampling mode only plays legal moves and can reach every one of them"""
+    import random
+    from collections import Counter
+
+    # In check: most pseudo-legal moves are illegal
+    engine = ChessEngine("4k3/8/8/8/1b6/8/8/r3K3 w - - 0 1")
+    rng = random.Random(3)
+    seen = Counter(engine.sample_legal_move(rng) for _ in range(2000))
+    legal = set(engine.legal_moves())
+    assert set(seen) == legal
+    assert min(seen.values()) > 2000 / len(legal) * 0.8
+
+    engine = ChessEngine()
+    bot = RandomBot('w', sampling=True)
+    for _ in range(4):
+        move = bot.get_move(engine)
+        assert move in engine.get_all_legal_moves_as_strings()
+        bot.color = 'b' if bot.color == 'w' else 'w'
+        assert engine.make_move(*move)
@@ -0,0 +1,111 @@
+from Game.chess_engine import ChessEngine
+
+def test_hash_matches_for_same_position():
+    """Transposed move orders reach the same Zobrist key"""
+    engine1 = ChessEngine()
+    for from_sq, to_sq in [("g1", "f3"), ("g8", "f6"), ("b1", "c3")]:
+        engine1.make_move(from_sq, to_sq)
+
+    engine2 = ChessEngine()
+    for from_sq, to_sq in [("b1", "c3"), ("g8", "f6"), ("g1", "f3")]:
+        engine2.make_move(from_sq, to_sq)
+
+    assert engine1.hash == engine2.hash
+    assert engine1.hash == ChessEngine(engine1.get_fen()).hash
+    engine1.undo_move()
+    assert engine1.hash != engine2.hash
+
+def test_threefold_repetition():
+    """Shuffling knights back and forth ends the game on the third repetition"""
+    engine = ChessEngine()
+    shuffle = [("g1", "f3"), ("g8", "f6"), ("f3", "g1"), ("f6", "g8")]
+    for from_sq, to_sq in shuffle:
+        engine.make_move(from_sq, to_sq)
+    assert engine.repetition_count() == 2
+    assert not engine.is_game_over()
+
+    for from_sq, to_sq in shuffle:
+        engine.make_move(from_sq, to_sq)
+    assert engine.repetition_count() == 3
+    assert engine.is_game_over()
+    assert engine.get_game_result() == "threefold repetition"
+
+def test_fifty_move_rule():
+    """A hundred halfmoves without captures or pawn moves is a draw"""
+    engine = ChessEngine("4k3/8/8/8/8/8/4P3/R3K3 w - - 99 80")
+    assert not engine.is_game_over()
+    engine.make_move("a1", "a7")
+    assert engine.get_game_result() == "fifty-move rule"
+
+    engine.undo_move()
+    engine.make_move("e2", "e4")  # pawn move resets the clock
+    assert engine.halfmove_clock == 0
+    assert not engine.is_game_over()
+
+def test_game_status_checkmate_and_stalemate():
+    # Back-rank mate
+    engine = ChessEngine("R5k1/5ppp/8/8/8/8/8/6K1 b - - 0 1")
+    assert not engine.has_legal_move()
+    status = engine.game_status()
+    assert status['check'] and status['checkmate'] and not status['stalemate']
+    assert status['result'] == "checkmate"
+
+    # Black king in the corner with no moves, not in check
+    engine = ChessEngine("k7/2Q5/1K6/8/8/8/8/8 b - - 0 1")
+    status = engine.game_status()
+    assert status['stalemate'] and status['draw'] == "stalemate"
+    assert engine.get_game_result() == "stalemate"
+
+    # Double check where only the king can answer
+    engine = ChessEngine("4k3/8/8/8/1b6/8/8/r3K3 w - - 0 1")
+    assert engine.game_status()['check']
+    assert engine.has_legal_move() == (len(engine.get_all_legal_moves()) > 0)
+
+def test_has_legal_move_matches_move_list():
+    engine = ChessEngine()
+    assert engine.has_legal_move()
+    status = engine.game_status()
+    assert status == {'check': False, 'checkmate': False, 'stalemate': False,
+                      'draw': None, 'result': None}
+
+def test_insufficient_material_dead_positions():
+    """Only the minor-piece endings where mate is impossible are drawn"""
+    dead = [
+        "4k3/8/8/8/8/8/8/4K3 w - - 0 1",       # K vs K
+        "4k3/8/8/8/8/8/8/2B1K3 w - - 0 1",     # KB vs K
+        "4k3/8/8/8/8/8/8/1N2K3 b - - 0 1",     # KN vs K
+        "4kb2/8/8/8/8/8/8/2B1K3 w - - 0 1",    # KB vs KB, same color
+        "4k3/8/8/8/8/8/1B6/2B1K3 w - - 0 1",   # two bishops on one color
+    ]
+    alive = [
+        "2b1k3/8/8/8/8/8/8/2B1K3 w - - 0 1",   # bishops on opposite colors
+        "4k3/8/8/8/8/8/8/1NN1K3 w - - 0 1",    # KNN vs K
+        "1n2k3/8/8/8/8/8/8/1N2K3 w - - 0 1",   # KN vs KN
+        "1n2k3/8/8/8/8/8/8/2B1K3 w - - 0 1",   # KB vs KN
+        "4k3/8/8/8/8/8/8/R3K3 w - - 0 1",
+        "4k3/8/8/8/8/8/4P3/4K3 w - - 0 1",
+    ]
+    for fen in dead:
+        assert ChessEngine(fen).is_insufficient_material(), fen
+    for fen in alive:
+        assert not ChessEngine(fen).is_insufficient_material(), fen
+
+    # Capturing the last pawn leaves same-colored bishops only
+    engine = ChessEngine("4kb2/8/8/8/8/8/3p4/2B1K3 w - - 0 1")
+    assert not engine.is_insufficient_material()
+    engine.make_move("e1", "d2")
+    assert engine.get_game_result() == "insufficient material"
+    engine.undo_move()
+    assert not engine.is_insufficient_material()
+
+def test_incremental_material_matches_rebuild():
+    """Counts, bishop colors and material stay in step through make/undo"""
+    engine = ChessEngine("r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1")
+    for move in engine.legal_moves():
+        engine._make_move_unchecked(move)
+        fresh = ChessEngine(engine.get_fen())
+        assert engine.piece_counts == fresh.piece_counts
+        assert engine.bishop_shades == fresh.bishop_shades
+        assert engine.material == fresh.material
+        engine.unmake_move()
+    assert engine.material == 0
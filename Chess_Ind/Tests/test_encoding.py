@@ -0,0 +1,66 @@
+import pytest
+
+# Game.encoding needs numpy, which the engine itself doesn't
+np = pytest.importorskip("numpy")
+
+from Game.chess_engine import ChessEngine, move_to_uci
+from Game.encoding import (
+    encode_fens, encode_engines, encode_positions, encode_moves, decode_moves,
+    MOVE_VOCABULARY, NUM_PLANES, TURN_PLANE, CASTLING_PLANES, EN_PASSANT_PLANE
+)
+from Game.positions import ALL_POSITIONS
+
+def test_start_position_planes():
+    planes = encode_fens([ChessEngine().get_fen()])
+    assert planes.shape == (1, NUM_PLANES, 8, 8) and planes.dtype == np.uint8
+    assert planes[0, 0, 6].all()           # white pawns on rank 2
+    assert planes[0, 5, 7, 4] == 1         # white king on e1
+    assert planes[0, 11, 0, 4] == 1        # black king on e8
+    assert planes[0, :12].sum() == 32
+    assert planes[0, TURN_PLANE].all()
+    assert all(planes[0, plane].all() for plane in CASTLING_PLANES.values())
+    assert not planes[0, EN_PASSANT_PLANE].any()
+
+def test_state_planes():
+    planes = encode_fens(["r3k3/8/8/8/3Pp3/8/8/4K2R b Kq d3 0 2"], dtype=np.float32)
+    assert planes.dtype == np.float32
+    assert not planes[0, TURN_PLANE].any()
+    assert planes[0, CASTLING_PLANES['K']].all() and planes[0, CASTLING_PLANES['q']].all()
+    assert not planes[0, CASTLING_PLANES['Q']].any()
+    assert planes[0, EN_PASSANT_PLANE].sum() == 1 and planes[0, EN_PASSANT_PLANE, 5, 3] == 1
+
+def test_fen_en_passant_is_normalised():
+    fens = [
+        "rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b KQkq e3 0 1",  # nothing can take on e3
+        "4k3/8/8/2pP4/8/3K4/8/1q6 w - c6 0 2",  # d5xc6 leaves the king in check
+        "4k3/8/8/2pP4/8/8/8/4K3 w - c6 0 2",  # d5xc6 is legal
+    ]
+    planes = encode_fens(fens)
+    assert [int(planes[n, EN_PASSANT_PLANE].sum()) for n in range(3)] == [0, 0, 1]
+    assert np.array_equal(planes, encode_engines([ChessEngine(fen) for fen in fens]))
+
+def test_fen_and_engine_encodings_agree():
+    engines = [ChessEngine(fen) for fen in ALL_POSITIONS]
+    # Double pawn pushes: no pawn can take after 1. e4, one can after 2... d5
+    engines.append(ChessEngine())
+    engines[-1].make_move("e2", "e4")
+    assert engines[-1].get_fen().split()[3] == '-'
+    for from_sq, to_sq in (("e2", "e4"), ("a7", "a6"), ("e4", "e5"), ("d7", "d5")):
+        engines[0].make_move(from_sq, to_sq)
+    assert engines[0].get_fen().split()[3] == 'd6'
+    fens = [engine.get_fen() for engine in engines]
+    assert np.array_equal(encode_fens(fens), encode_engines(engines))
+    assert np.array_equal(encode_positions(engines), encode_positions(fens))
+    assert encode_fens([]).shape == (0, NUM_PLANES, 8, 8)
+    with pytest.raises(ValueError):
+        encode_fens(["8/8/8 w - - 0 1"])
+
+def test_move_vocabulary_covers_legal_moves():
+    assert len(MOVE_VOCABULARY) == len(set(MOVE_VOCABULARY)) == 1968
+    for fen in ALL_POSITIONS + ["r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1"]:
+        moves = ChessEngine(fen).legal_moves()
+        indices = encode_moves(moves)
+        assert decode_moves(indices) == [move_to_uci(move) for move in moves]
+        assert np.array_equal(encode_moves([move_to_uci(move) for move in moves]), indices)
+    with pytest.raises(ValueError):
+        encode_moves(["a1h2"])
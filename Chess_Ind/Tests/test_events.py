@@ -0,0 +1,48 @@
+import io
+import json
+
+from Game.game import ChessGame
+from Game.bots import RandomBot, CaptureBot
+from Game.events import TextSink, JsonLinesSink
+
+def test_headless_game_prints_nothing(capsys):
+    game = ChessGame(RandomBot('w'), CaptureBot('b'))
+    game.run(max_turns=6)
+    assert capsys.readouterr().out == ""
+
+def test_text_sink_buffers_until_game_end():
+    stream = io.StringIO()
+    sink = TextSink(stream)
+    game = ChessGame(RandomBot('w'), CaptureBot('b'), sink)
+    # Bots pick up the game's sink
+    assert game.white_bot.sink is sink
+
+    sink.game_start("RandomBot", "CaptureBot")
+    assert stream.getvalue() == ""
+    sink.flush()
+    game.run(max_turns=4)
+    text = stream.getvalue()
+    assert "RandomBot (White) vs CaptureBot (Black)" in text
+    assert "--- Turn 4 ---" in text
+    assert "RandomBot(w):" in text and "CaptureBot(b):" in text
+    assert sink.getvalue().strip() == text.strip()
+
+def test_json_lines_sink():
+    stream = io.StringIO()
+    game = ChessGame(RandomBot('w'), RandomBot('b'), JsonLinesSink(stream))
+    game.run(max_turns=3)
+    events = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert events[0] == {'event': 'game_start', 'white': 'RandomBot', 'black': 'RandomBot'}
+    assert [event['event'] for event in events[1:7]] == ['status', 'move'] * 3
+    assert events[-1]['event'] == 'game_end' and events[-1]['plies'] == 3
+
+def test_text_sink_history_is_bounded():
+    stream = io.StringIO()
+    sink = TextSink(stream, buffer_lines=10, history_lines=25)
+    for number in range(100):
+        sink.move("RandomBot", 'w', 'wP', 'e2', f"e{number}")
+    sink.flush()
+    # Everything reaches the stream, only the tail stays in memory
+    assert stream.getvalue().count("RandomBot(w)") == 100
+    kept = sink.getvalue().splitlines()
+    assert len(kept) == 25 and kept[-1].endswith("e99")
@@ -0,0 +1,46 @@
+import json
+
+from Game.chess_engine import ChessEngine
+from Game.bots import RandomBot, SearchBot
+from Game.game import ChessGame
+from Game.instrumentation import Instrumentation
+
+def test_instrumentation_counts_and_restores():
+    original_make_move = ChessEngine.make_move
+    original_get_move = SearchBot.get_move
+
+    instrumentation = Instrumentation()
+    with instrumentation:
+        assert ChessEngine.make_move is not original_make_move
+        game = ChessGame(RandomBot('w'), RandomBot('b'))
+        for _ in range(4):
+            game.play_turn()
+        game.engine.undo_move()
+
+    # Disabled again: the original methods are back
+    assert ChessEngine.make_move is original_make_move
+    assert SearchBot.get_move is original_get_move
+
+    stats = instrumentation.stats()
+    assert stats['counts']['ChessEngine.make_move'] == 4
+    assert stats['counts']['ChessEngine.undo_move'] == 1
+    assert stats['timers']['ChessGame.play_turn']['calls'] == 4
+    assert stats['timers']['RandomBot.get_move']['calls'] == 4
+    assert json.loads(instrumentation.stats_json()) == stats
+
+    # Nothing is counted while disabled
+    ChessEngine().make_move("e2", "e4")
+    assert instrumentation.stats() == stats
+
+def test_instrumentation_times_only_the_outermost_get_move():
+    # Off its turn SearchBot.get_move falls back to RandomBot.get_move via
+    # super(); that inner call isn't timed a second time
+    instrumentation = Instrumentation()
+    with instrumentation:
+        bot = SearchBot('b')
+        for _ in range(3):
+            bot.get_move(ChessEngine())
+
+    timers = instrumentation.stats()['timers']
+    assert timers['SearchBot.get_move']['calls'] == 3
+    assert 'RandomBot.get_move' not in timers
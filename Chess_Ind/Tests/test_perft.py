@@ -0,0 +1,35 @@
+from Game.chess_engine import ChessEngine
+
+def test_perft_start_position():
+    engine = ChessEngine()
+    assert engine.perft(1) == 20
+    assert engine.perft(2) == 400
+    assert engine.perft(3) == 8902
+
+def test_perft_kiwipete():
+    """Castling, pins and en passant all show up within two plies"""
+    engine = ChessEngine("r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1")
+    assert engine.perft(1) == 48
+    assert engine.perft(2) == 2039
+
+def test_perft_en_passant_and_promotion():
+    engine = ChessEngine("8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1")
+    assert engine.perft(3) == 2812
+
+    engine = ChessEngine("r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1")
+    assert engine.perft(3) == 9467
+
+def test_perft_leaves_position_unchanged():
+    engine = ChessEngine("rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8")
+    fen = engine.get_fen()
+    key = engine.hash
+    assert engine.perft(2) == 1486
+    assert engine.get_fen() == fen
+    assert engine.hash == key
+
+def test_divide_sums_to_perft():
+    engine = ChessEngine("rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8")
+    counts = engine.divide(2)
+    assert len(counts) == 44
+    assert {"d7c8q", "d7c8r", "d7c8b", "d7c8n"} <= set(counts)
+    assert sum(counts.values()) == engine.perft(2)
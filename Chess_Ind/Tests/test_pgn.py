@@ -0,0 +1,74 @@
+import io
+
+import pytest
+from Game.chess_engine import ChessEngine, tokenize_movetext, move_to_uci
+from Game.pgn import read_games, iter_records
+from Game.positions import SAMPLE_MOVETEXT
+
+def test_tokenizer_keeps_only_mainline_moves():
+    movetext = ("1. e4 {best by test} e5 2. Nf3 $1 (2. f4 exf4 (2... d5) 3. Nf3) "
+                "2... Nc6 ; a comment to the end of the line\n3. Bb5!? a6 4. O-O 1/2-1/2")
+    assert list(tokenize_movetext(movetext)) == ["e4", "e5", "Nf3", "Nc6", "Bb5!?", "a6", "O-O"]
+
+def test_replay_sample_game_to_mate():
+    engine = ChessEngine()
+    sans = [engine.san(move) for move in engine.replay(SAMPLE_MOVETEXT)]
+    assert sans == list(tokenize_movetext(SAMPLE_MOVETEXT))
+    assert engine.is_checkmate()
+    assert len(engine.move_history) == 33
+
+def test_san_round_trip():
+    """Every legal move's SAN parses back to the same move"""
+    fens = [
+        "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+        "r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1",
+        "rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8",
+        "4k3/8/8/3pP3/8/8/8/4K3 w - d6 0 2",
+    ]
+    for fen in fens:
+        engine = ChessEngine(fen)
+        for move in engine.legal_moves():
+            assert engine.parse_san(engine.san(move)) == move, (fen, engine.san(move))
+
+def test_san_disambiguation_and_special_moves():
+    engine = ChessEngine("4k3/8/8/8/8/R6R/1P6/4K2R w K - 0 1")
+    assert engine.san(engine.parse_san("R3h2")) == "R3h2"
+    assert engine.san(engine.parse_san("Rad3")) == "Rad3"
+    assert move_to_uci(engine.parse_san("Rhd3")) == "h3d3"
+    assert move_to_uci(engine.parse_san("O-O")) == "e1g1"
+    with pytest.raises(ValueError):
+        engine.parse_san("Rd3")  # either rook
+    with pytest.raises(ValueError):
+        engine.parse_san("O-O-O")  # no queenside right
+
+    engine = ChessEngine("4k3/P7/8/3pP3/8/8/8/4K3 w - d6 0 2")
+    assert move_to_uci(engine.parse_san("exd6")) == "e5d6"
+    assert move_to_uci(engine.parse_san("a8=N+")) == "a7a8n"
+    with pytest.raises(ValueError):
+        engine.parse_san("a8")  # promotion piece missing
+
+def test_read_games_and_records():
+    text = ('[Event "one"]\n[Result "1-0"]\n\n' + SAMPLE_MOVETEXT + '\n\n'
+            '[Event "two"]\n[Result "*"]\n[FEN "4k3/8/8/8/8/8/4P3/4K3 w - - 0 1"]\n\n1. e4 Kd7 *\n')
+    games = list(read_games(io.StringIO(text)))
+    assert [headers["Event"] for headers, _ in games] == ["one", "two"]
+
+    records = list(iter_records(io.StringIO(text)))
+    assert len(records) == 35
+    assert records[0] == (ChessEngine().get_fen(), "e2e4", "1-0")
+    assert records[-1][1:] == ("e8d7", "*")
+
+def test_bad_game_stops_at_its_last_good_move():
+    good = '[Event "good"]\n[Result "1-0"]\n\n' + SAMPLE_MOVETEXT + '\n\n'
+    text = (good +
+            '[Event "illegal"]\n[Result "0-1"]\n\n1. e4 e5 2. Ke3 Nc6 0-1\n\n' +
+            '[Event "bad fen"]\n[FEN "not a fen"]\n\n1. e4 *\n\n' + good)
+    errors = []
+    records = list(iter_records(io.StringIO(text), errors))
+    # Both good games come through whole; the illegal one keeps 1. e4 e5
+    assert len(records) == 33 + 2 + 33
+    assert [move for _, move, _ in records[33:35]] == ["e2e4", "e7e5"]
+    assert records[35:] == records[:33]
+    assert len(errors) == 2 and "Ke3" in str(errors[0])
+    # Without an errors list the bad games are still passed over
+    assert list(iter_records(io.StringIO(text))) == records
@@ -0,0 +1,44 @@
+import math
+
+from Game.bots import RandomBot, CaptureBot, SearchBot
+from Game.tournament import (
+    elo_difference, sprt_llr, sprt_bounds, play_game, round_robin, sprt_match, DRAW
+)
+
+def test_elo_difference():
+    assert elo_difference(10, 0, 10) == (0.0, elo_difference(10, 0, 10)[1])
+    elo, margin = elo_difference(60, 20, 20)
+    # 70% score is about +147 Elo
+    assert round(elo) == 147
+    assert 0 < margin < 100
+    assert elo_difference(5, 0, 0)[0] == math.inf
+
+def test_sprt_decides_lopsided_records():
+    lower, upper = sprt_bounds(0.05, 0.05)
+    assert sprt_llr(80, 10, 10, 0, 10) > upper
+    assert sprt_llr(10, 10, 80, 0, 10) < lower
+    assert lower < sprt_llr(50, 0, 50, 0, 10) < upper
+
+def test_play_game_is_repeatable():
+    first = play_game(RandomBot, CaptureBot, max_plies=40, seed=5)
+    assert first == play_game(RandomBot, CaptureBot, max_plies=40, seed=5)
+    result, reason, plies = first
+    assert plies <= 40
+    if reason == "move limit":
+        assert result == DRAW
+
+def test_round_robin_counts_every_game():
+    result = round_robin([RandomBot, CaptureBot, RandomBot], rounds=1, max_plies=20, workers=1)
+    # Three pairs, both colors each
+    assert len(result.games) == 6
+    assert result.names == ["RandomBot#1", "CaptureBot", "RandomBot#2"]
+    assert all(score.games == 4 for score in result.scores.values())
+    total = sum(score.points for score in result.scores.values())
+    assert total == 6
+
+def test_sprt_match_stops_early():
+    strong = (SearchBot, {'time_limit': None, 'max_depth': 1})
+    result = sprt_match(strong, RandomBot, elo0=0, elo1=50, max_games=40,
+                        max_plies=120, workers=1)
+    assert result.sprt == "H1"
+    assert len(result.games) < 40
@@ -0,0 +1,52 @@
+from Game.transposition import TranspositionTable, EXACT, LOWER_BOUND, UPPER_BOUND
+
+def test_store_and_probe():
+    tt = TranspositionTable(size_mb=1)
+    assert tt.probe(12345) is None
+    tt.store(12345, depth=4, bound=LOWER_BOUND, score=-250, move=0x0ABC)
+    assert tt.probe(12345) == (4, LOWER_BOUND, -250, 0x0ABC)
+    assert tt.stats()['hits'] == 1
+    assert tt.stats()['misses'] == 1
+
+def test_memory_is_fixed():
+    tt = TranspositionTable(size_mb=1)
+    entries = tt.stats()['entries']
+    for key in range(1, 100000):
+        tt.store(key * 7919, depth=key % 10, bound=EXACT, score=key)
+    assert tt.stats()['entries'] == entries
+    assert len(tt.keys) == len(tt.data) == entries
+
+def test_depth_preferred_and_always_replace_slots():
+    tt = TranspositionTable(size_mb=1)
+    buckets = tt.buckets
+    deep, shallow, newer = 5, 5 + buckets, 5 + 2 * buckets  # all share one bucket
+
+    tt.store(deep, depth=8, bound=EXACT, score=1)
+    tt.store(shallow, depth=2, bound=UPPER_BOUND, score=2)
+    assert tt.probe(deep) is not None
+    assert tt.probe(shallow) is not None
+
+    # A shallow store only replaces the always-replace slot
+    tt.store(newer, depth=1, bound=EXACT, score=3)
+    assert tt.probe(deep) == (8, EXACT, 1, 0)
+    assert tt.probe(newer) == (1, EXACT, 3, 0)
+    assert tt.probe(shallow) is None
+    assert tt.stats()['collisions'] == 1
+
+def test_keeps_best_move_when_result_has_none():
+    tt = TranspositionTable(size_mb=1)
+    tt.store(99, depth=3, bound=EXACT, score=10, move=0x123)
+    tt.store(99, depth=4, bound=UPPER_BOUND, score=5)
+    assert tt.probe(99) == (4, UPPER_BOUND, 5, 0x123)
+
+def test_clear_empties_the_table():
+    tt = TranspositionTable(size_mb=1)
+    keys = tt.keys
+    for key in range(1, 1000):
+        tt.store(key, depth=1, bound=EXACT, score=key)
+    tt.probe(1)
+    tt.clear()
+    assert tt.keys is keys and len(tt.keys) == len(tt.data) == tt.stats()['entries']
+    assert not any(tt.keys) and not any(tt.data)
+    assert tt.stats()['hits'] == tt.stats()['stores'] == 0
+    assert tt.probe(1) is None
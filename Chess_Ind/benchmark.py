@@ -0,0 +1,295 @@
+"""
+Micro-benchmarks for the engine and bots, with JSON results and regression checks.
+
+A reference run is kept in benchmarks/baseline.json; check a change with
+
+    python benchmark.py run
+    python benchmark.py compare benchmarks/baseline.json benchmark_results.json
+
+Numbers only compare fairly on the same machine, so regenerate the
+baseline (run --output benchmarks/baseline.json) before comparing
+elsewhere. benchmark_results.json itself is not committed.
+"""
+import argparse
+import datetime
+import itertools
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+
+from Game.chess_engine import ChessEngine
+from Game.bots import RandomBot, CaptureBot, CenterControlBot, SearchBot
+from Game.pgn import read_games, game_records
+from Game.positions import POSITIONS, ALL_POSITIONS, SAMPLE_MOVETEXT
+
+BOTS = {
+    "RandomBot": lambda color: RandomBot(color),
+    "CaptureBot": lambda color: CaptureBot(color),
+    "CenterControlBot": lambda color: CenterControlBot(color),
+    "SearchBot": lambda color: SearchBot(color, time_limit=None, node_limit=2000),
+}
+
+
+def time_per_op(function, ops_per_call, min_time=0.2, repeat=5):
+    """
+    Best time per operation over repeat runs. Each run calls function
+    (which does ops_per_call operations) until min_time has passed.
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        calls = 0
+        start = time.perf_counter()
+        while True:
+            function()
+            calls += 1
+            elapsed = time.perf_counter() - start
+            if elapsed >= min_time:
+                break
+        best = min(best, elapsed / (calls * ops_per_call))
+    return best
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def bench_fen(min_time, repeat):
+    engine = ChessEngine()
+    fens = ALL_POSITIONS
+    # get_fen is timed on its own, on engines loaded beforehand
+    engines = [ChessEngine(fen) for fen in fens]
+
+    def load():
+        for fen in fens:
+            engine.load_from_fen(fen)
+
+    def write():
+        for loaded in engines:
+            loaded.get_fen()
+
+    return {"fen.load": time_per_op(load, len(fens), min_time, repeat),
+            "fen.write": time_per_op(write, len(engines), min_time, repeat)}
+
+
+def bench_move_generation(min_time, repeat):
+    results = {}
+    for phase, fens in POSITIONS.items():
+        engines = [ChessEngine(fen) for fen in fens]
+        moves = sum(len(engine.legal_moves()) for engine in engines)
+
+        def generate():
+            for engine in engines:
+                engine._clear_cache()
+                engine.legal_moves()
+
+        # Per generated move, so phases with more moves compare fairly
+        results[f"legal_moves.{phase}"] = time_per_op(generate, moves, min_time, repeat)
+    return results
+
+
+def bench_make_undo(min_time, repeat):
+    engines = [ChessEngine(fen) for fen in ALL_POSITIONS]
+    moves = sum(len(engine.legal_moves()) for engine in engines)
+
+    def make_undo():
+        for engine in engines:
+            for move in engine.legal_moves():
+                engine._make_move_unchecked(move)
+                engine.unmake_move()
+
+    return {"make_undo": time_per_op(make_undo, moves, min_time, repeat)}
+
+
+def bench_game_over(min_time, repeat):
+    engines = [ChessEngine(fen) for fen in ALL_POSITIONS]
+
+    def game_over():
+        for engine in engines:
+            engine._clear_cache()
+            engine.is_game_over()
+
+    return {"is_game_over": time_per_op(game_over, len(engines), min_time, repeat)}
+
+
+def bench_san(min_time, repeat):
+    moves = len(list(ChessEngine().replay(SAMPLE_MOVETEXT)))
+
+    def replay():
+        for _ in ChessEngine().replay(SAMPLE_MOVETEXT):
+            pass
+
+    return {"san_replay": time_per_op(replay, moves, min_time, repeat)}
+
+
+def bench_pgn_file(path, max_games=None):
+    """
+    Seconds per game to turn a PGN file into (fen, move, result) records,
+    with ChessEngine's replay and, if it is installed, with python-chess
+    game trees. Both do the same work: parse, replay the mainline and
+    write a FEN before every move.
+    """
+    games = 0
+    start = time.perf_counter()
+    with open(path) as f:
+        for headers, movetext in itertools.islice(read_games(f), max_games):
+            for _ in game_records(headers, movetext):
+                pass
+            games += 1
+    results = {"pgn.engine": (time.perf_counter() - start) / max(games, 1)}
+
+    try:
+        import chess.pgn
+    except ImportError:
+        return results, games
+    start = time.perf_counter()
+    with open(path) as f:
+        for _ in range(games):
+            game = chess.pgn.read_game(f)
+            if game is None:
+                break
+            board = game.board()
+            for move in game.mainline_moves():
+                board.fen()
+                move.uci()
+                board.push(move)
+    results["pgn.python_chess"] = (time.perf_counter() - start) / max(games, 1)
+    return results, games
+
+
+def bench_bots(samples, seed=0):
+    """p50 and p99 get_move latency of each bot over the position corpus"""
+    results = {}
+    for name, make_bot in BOTS.items():
+        random.seed(seed)
+        times = []
+        for index in range(samples):
+            engine = ChessEngine(ALL_POSITIONS[index % len(ALL_POSITIONS)])
+            bot = make_bot(engine.current_turn)
+            start = time.perf_counter()
+            bot.get_move(engine)
+            times.append(time.perf_counter() - start)
+        times.sort()
+        results[f"bot.{name}.p50"] = percentile(times, 0.50)
+        results[f"bot.{name}.p99"] = percentile(times, 0.99)
+    return results
+
+
+def machine_metadata():
+    """Where and when the results were taken"""
+    metadata = {
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+    }
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                                text=True, timeout=5, cwd=os.path.dirname(os.path.abspath(__file__)))
+        if commit.returncode == 0:
+            metadata["commit"] = commit.stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        pass
+    return metadata
+
+
+def run_benchmarks(quick=False):
+    """Run the suite; every result is seconds per operation, lower is better"""
+    min_time, repeat, samples = (0.05, 3, 24) if quick else (0.2, 5, 120)
+    results = {}
+    for bench in (bench_fen, bench_move_generation, bench_make_undo, bench_game_over, bench_san):
+        results.update(bench(min_time, repeat))
+    results.update(bench_bots(samples))
+    return {"metadata": machine_metadata(), "results": results}
+
+
+def compare(baseline, current, threshold):
+    """
+    Compare two result files' contents. Returns (rows, regressions) where
+    each row is (name, baseline, current, ratio) and regressions lists the
+    names more than threshold (e.g. 0.1 for 10%) slower than baseline.
+    """
+    rows = []
+    regressions = []
+    for name, base_value in sorted(baseline["results"].items()):
+        if name not in current["results"]:
+            continue
+        value = current["results"][name]
+        ratio = value / base_value if base_value > 0 else float("inf")
+        rows.append((name, base_value, value, ratio))
+        if ratio > 1 + threshold:
+            regressions.append(name)
+    return rows, regressions
+
+
+def print_results(report):
+    for key, value in report["metadata"].items():
+        print(f"{key}: {value}")
+    print(f"\n{'benchmark':<30}{'time/op':>14}{'ops/s':>14}")
+    for name, seconds in report["results"].items():
+        ops = f"{1 / seconds:,.0f}" if seconds > 0 else "-"
+        print(f"{name:<30}{seconds * 1e6:>12.2f}us{ops:>14}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Engine and bot micro-benchmarks")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="run the suite and write JSON results")
+    run_parser.add_argument("--output", default="benchmark_results.json",
+                            help="where to write results (default benchmark_results.json)")
+    run_parser.add_argument("--quick", action="store_true", help="shorter runs, noisier numbers")
+
+    compare_parser = subparsers.add_parser("compare", help="check results against a baseline")
+    compare_parser.add_argument("baseline", help="baseline results JSON")
+    compare_parser.add_argument("current", help="new results JSON")
+    compare_parser.add_argument("--threshold", type=float, default=0.10,
+                                help="slowdown that counts as a regression (default 0.10 = 10%%)")
+
+    pgn_parser = subparsers.add_parser("pgn", help="time PGN replay against python-chess")
+    pgn_parser.add_argument("file", help="PGN file to convert")
+    pgn_parser.add_argument("--games", type=int, default=None, help="only the first N games")
+    args = parser.parse_args(argv)
+
+    if args.command == "pgn":
+        results, games = bench_pgn_file(args.file, args.games)
+        print(f"{games} games")
+        for name, seconds in results.items():
+            print(f"{name:<30}{seconds * 1e3:>10.2f}ms/game")
+        if "pgn.python_chess" in results:
+            print(f"speedup: {results['pgn.python_chess'] / results['pgn.engine']:.2f}x")
+        else:
+            print("python-chess is not installed, nothing to compare against")
+        return 0
+
+    if args.command == "run":
+        report = run_benchmarks(args.quick)
+        print_results(report)
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults written to {args.output}")
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+    rows, regressions = compare(baseline, current, args.threshold)
+    print(f"{'benchmark':<30}{'baseline':>12}{'current':>12}{'change':>10}")
+    for name, base_value, value, ratio in rows:
+        flag = "  REGRESSION" if name in regressions else ""
+        print(f"{name:<30}{base_value * 1e6:>10.2f}us{value * 1e6:>10.2f}us{ratio - 1:>+10.1%}{flag}")
+    print(f"\n{len(regressions)} regression(s) beyond {args.threshold:.0%}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
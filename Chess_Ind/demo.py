@@ -1,29 +1,56 @@
 """Demo of Chess Engine with Three Bots"""
+import argparse
+import contextlib
+import sys
+
 from Game.game import ChessGame
 from Game.bots import RandomBot, CaptureBot, CenterControlBot
+from Game.events import TextSink
+from Game.instrumentation import profiled
+
+
+def run_demo():
+    # Print each game's log when it ends
+    sink = TextSink(sys.stdout)
+
+    print("=== Chess Engine with Three Bots ===")
+    print("Testing different bot strategies against each other")
+
+    print("\n" + "="*60)
+    print("GAME 1: Random Bot vs Capture Bot")
+    print("="*60)
+    game1 = ChessGame(RandomBot('w'), CaptureBot('b'), sink)
+    game1.run(max_turns=6)
+
+    print("\n" + "="*60)
+    print("GAME 2: Capture Bot vs Center Control Bot")
+    print("="*60)
+    game2 = ChessGame(CaptureBot('w'), CenterControlBot('b'), sink)
+    game2.run(max_turns=6)
+
+    print("\n" + "="*60)
+    print("GAME 3: Center Control Bot vs Random Bot")
+    print("="*60)
+    game3 = ChessGame(CenterControlBot('w'), RandomBot('b'), sink)
+    game3.run(max_turns=6)
+
+    print("\n" + "="*60)
+    print("ALL TESTS COMPLETED!")
 
-print("=== Chess Engine with Three Bots ===")
-print("Testing different bot strategies against each other")
+    print("="*60)
 
-print("\n" + "="*60)
-print("GAME 1: Random Bot vs Capture Bot")
-print("="*60)
-game1 = ChessGame(RandomBot('w'), CaptureBot('b'))
-game1.run(max_turns=6)
 
-print("\n" + "="*60)
-print("GAME 2: Capture Bot vs Center Control Bot")
-print("="*60)
-game2 = ChessGame(CaptureBot('w'), CenterControlBot('b'))
-game2.run(max_turns=6)
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Play three short demo games")
+    parser.add_argument("--profile", nargs="?", const="demo.prof", metavar="FILE",
+                        help="count engine calls, time bots and write cProfile output to FILE "
+                             "(default demo.prof)")
+    args = parser.parse_args(argv)
 
-print("\n" + "="*60)
-print("GAME 3: Center Control Bot vs Random Bot")
-print("="*60)
-game3 = ChessGame(CenterControlBot('w'), RandomBot('b'))
-game3.run(max_turns=6)
+    with profiled(args.profile) if args.profile else contextlib.nullcontext():
+        run_demo()
+    return 0
 
-print("\n" + "="*60)
-print("ALL TESTS COMPLETED!")
 
-print("="*60)
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,80 @@
+"""Perft runner: checks move generation against known node counts and times it"""
+import argparse
+import sys
+import time
+
+from Game.chess_engine import ChessEngine
+
+# (name, FEN, node counts for depth 1, 2, ...)
+PERFT_SUITE = [
+    ("start", "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1",
+     [20, 400, 8902, 197281, 4865609]),
+    ("kiwipete", "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+     [48, 2039, 97862, 4085603]),
+    ("en passant", "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1",
+     [14, 191, 2812, 43238, 674624]),
+    ("promotion", "r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1",
+     [6, 264, 9467, 422333]),
+    ("promotion mirrored", "r2q1rk1/pP1p2pp/Q4n2/bbp1p3/Np6/1B3NBn/pPPP1PPP/R3K2R b KQ - 0 1",
+     [6, 264, 9467, 422333]),
+    ("discovered check", "rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8",
+     [44, 1486, 62379, 2103487]),
+    ("middlegame", "r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10",
+     [46, 2079, 89890, 3894594]),
+]
+
+
+def run_suite(max_depth):
+    """Run every suite position up to max_depth. Returns the number of mismatches"""
+    mismatches = 0
+    total_nodes = 0
+    total_time = 0.0
+
+    print(f"{'position':<20}{'depth':>6}{'nodes':>12}{'expected':>12}{'nps':>10}")
+    for name, fen, expected_counts in PERFT_SUITE:
+        engine = ChessEngine(fen)
+        for depth, expected in enumerate(expected_counts[:max_depth], start=1):
+            start = time.perf_counter()
+            nodes = engine.perft(depth)
+            elapsed = time.perf_counter() - start
+            total_nodes += nodes
+            total_time += elapsed
+
+            nps = int(nodes / elapsed) if elapsed > 0 else 0
+            status = "" if nodes == expected else "  MISMATCH"
+            if nodes != expected:
+                mismatches += 1
+            print(f"{name:<20}{depth:>6}{nodes:>12}{expected:>12}{nps:>10}{status}")
+
+    overall_nps = int(total_nodes / total_time) if total_time > 0 else 0
+    print(f"\nTotal: {total_nodes} nodes in {total_time:.2f}s ({overall_nps} nodes/s)")
+    print(f"Mismatches: {mismatches}")
+    return mismatches
+
+
+def run_divide(fen, depth):
+    """Print the perft count below each root move of one position"""
+    engine = ChessEngine(fen)
+    counts = engine.divide(depth)
+    for move in sorted(counts):
+        print(f"{move}: {counts[move]}")
+    print(f"\nMoves: {len(counts)}")
+    print(f"Nodes: {sum(counts.values())}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Perft tests for ChessEngine")
+    parser.add_argument("--depth", type=int, default=3,
+                        help="maximum depth to run for each suite position (default 3)")
+    parser.add_argument("--divide", metavar="FEN",
+                        help="print a divide for this position instead of running the suite")
+    args = parser.parse_args(argv)
+
+    if args.divide:
+        run_divide(args.divide, args.depth)
+        return 0
+    return 1 if run_suite(args.depth) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
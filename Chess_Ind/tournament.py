@@ -0,0 +1,95 @@
+"""Tournament runner: round robins and SPRT matches between bots, over all cores"""
+import argparse
+import ast
+import sys
+import time
+
+from Game import bots
+from Game.instrumentation import profiled
+from Game.tournament import round_robin, sprt_match, sprt_bounds, sprt_llr
+
+DEFAULT_BOTS = ["RandomBot", "CaptureBot", "CenterControlBot", "SearchBot:time_limit=None,max_depth=2"]
+
+
+def parse_bot(text):
+    """
+    Turn 'Name' or 'Name:key=value,...' into a bot class or (class, kwargs),
+    e.g. 'SearchBot:time_limit=None,max_depth=2'
+    """
+    name, _, options = text.partition(":")
+    bot_class = getattr(bots, name, None)
+    if not isinstance(bot_class, type):
+        raise argparse.ArgumentTypeError(f"unknown bot {name!r}")
+    if not options:
+        return bot_class
+    kwargs = {}
+    for option in options.split(","):
+        key, _, value = option.partition("=")
+        try:
+            kwargs[key.strip()] = ast.literal_eval(value.strip())
+        except (ValueError, SyntaxError):
+            raise argparse.ArgumentTypeError(f"bad value in {option!r}")
+    return bot_class, kwargs
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Play bots against each other")
+    parser.add_argument("bots", nargs="*", type=parse_bot,
+                        help="bots to play, as Name or Name:key=value,... "
+                             "(default: every bot, SearchBot at depth 2)")
+    parser.add_argument("--rounds", type=int, default=2,
+                        help="games per pairing with each color (default 2)")
+    parser.add_argument("--max-plies", type=int, default=200,
+                        help="plies before a game is scored as a draw (default 200)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="worker processes (default: one per core, 1 runs in-process)")
+    parser.add_argument("--seed", type=int, default=0, help="base random seed (default 0)")
+    parser.add_argument("--sprt", nargs=2, type=float, metavar=("ELO0", "ELO1"),
+                        help="play the first bot against the second until an SPRT of "
+                             "ELO0 against ELO1 is decided")
+    parser.add_argument("--max-games", type=int, default=2000,
+                        help="game limit for --sprt (default 2000)")
+    parser.add_argument("--profile", nargs="?", const="tournament.prof", metavar="FILE",
+                        help="play every game in this process with engine call counts and "
+                             "bot timers on, and write cProfile output to FILE "
+                             "(default tournament.prof)")
+    args = parser.parse_args(argv)
+    bot_specs = args.bots or [parse_bot(text) for text in DEFAULT_BOTS]
+
+    if args.profile:
+        # Worker processes wouldn't show up in the profile
+        args.workers = 1
+        with profiled(args.profile):
+            return run(parser, args, bot_specs)
+    return run(parser, args, bot_specs)
+
+
+def run(parser, args, bot_specs):
+    """Play the tournament or match the parsed arguments describe"""
+    start = time.perf_counter()
+    if args.sprt:
+        if len(bot_specs) != 2:
+            parser.error("--sprt needs exactly two bots: candidate and baseline")
+        elo0, elo1 = args.sprt
+        result = sprt_match(bot_specs[0], bot_specs[1], elo0, elo1, max_games=args.max_games,
+                            max_plies=args.max_plies, workers=args.workers, seed=args.seed)
+        score = result.scores[result.names[0]]
+        lower, upper = sprt_bounds()
+        llr = sprt_llr(score.wins, score.draws, score.losses, elo0, elo1)
+        print(result.table())
+        print(f"\nSPRT [{elo0:g}, {elo1:g}]: LLR {llr:.2f} ({lower:.2f}, {upper:.2f}) "
+              f"-> {result.sprt or 'undecided'}")
+    else:
+        if len(bot_specs) < 2:
+            parser.error("a round robin needs at least two bots")
+        result = round_robin(bot_specs, rounds=args.rounds, max_plies=args.max_plies,
+                             workers=args.workers, seed=args.seed)
+        print(result.table())
+
+    elapsed = time.perf_counter() - start
+    print(f"\n{len(result.games)} games in {elapsed:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
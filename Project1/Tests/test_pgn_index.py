@@ -0,0 +1,66 @@
+import pytest
+
+from pgn_index import GameEntry, INDEX_SUFFIX, PgnIndex, build_index, scan_pgn
+
+GAMES = [
+  b'[Event "One"]\n[WhiteElo "2600"]\n[BlackElo "2450"]\n[Result "1-0"]\n[ECO "C42"]\n'
+  b'[Date "2020.12.31"]\n\n1. e4 e5 2. Nf3 Nf6 1-0\n\n',
+  # Unrated players, an unknown date and a non-ascii ECO that can't be stored
+  b'[Event "Two"]\n[WhiteElo "?"]\n[BlackElo "-"]\n[Result "1/2-1/2"]\n[ECO "B\xc3\xa9"]\n'
+  b'[Date "????.??.??"]\n\n1. d4 d5 1/2-1/2\n\n',
+  b'[Event "Three"]\n[Result "0-1"]\n[ECO "Z99"]\n[UTCDate "2021.01.02"]\n\n'
+  b'1. f3 e5 2. g4 Qh4# 0-1\n',
+]
+
+
+@pytest.fixture
+def pgn_path(tmp_path):
+  path = tmp_path / "games.pgn"
+  path.write_bytes(b"".join(GAMES))
+  return str(path)
+
+def test_scan_pgn_finds_offsets_and_headers(pgn_path):
+  entries = list(scan_pgn(pgn_path))
+  offsets = [sum(map(len, GAMES[:n])) for n in range(len(GAMES))]
+  assert [entry.offset for entry in entries] == offsets
+  assert [entry.length for entry in entries] == [len(game) for game in GAMES]
+  assert entries[0] == GameEntry(offsets[0], len(GAMES[0]), 2600, 2450, "1-0", "C42", 20201231)
+  assert entries[1][2:] == (0, 0, "1/2-1/2", "", 0)
+  assert entries[2][2:] == (0, 0, "0-1", "", 20210102)
+
+def test_index_round_trip_and_random_access(pgn_path):
+  index_path, count = build_index(pgn_path)
+  assert index_path == pgn_path + INDEX_SUFFIX
+  assert count == len(GAMES)
+
+  with PgnIndex(pgn_path) as index:
+    assert list(index) == list(scan_pgn(pgn_path))
+    assert index[-1] == index[2]
+    with pytest.raises(IndexError):
+      index[len(GAMES)]
+    # Game N comes straight out of the memory map
+    for n, game in enumerate(GAMES):
+      assert index.text(index[n]) == game.decode("utf-8")
+    assert [entry.eco for entry in index.select(lambda entry: entry.white_elo > 2500)] == ["C42"]
+
+def test_stale_index_is_rebuilt(pgn_path):
+  build_index(pgn_path, pgn_path + INDEX_SUFFIX)
+  with open(pgn_path, "ab") as pgn_file:
+    pgn_file.write(b'\n[Event "Four"]\n[Result "*"]\n\n1. e4 *\n')
+  with PgnIndex(pgn_path) as index:
+    assert len(index) == len(GAMES) + 1
+    assert index.text(index[-1]).startswith('[Event "Four"]')
+
+def test_empty_pgn(tmp_path):
+  path = tmp_path / "empty.pgn"
+  path.write_bytes(b"")
+  with PgnIndex(str(path)) as index:
+    assert len(index) == 0
+    assert list(index.select()) == []
+
+def test_read_game_parses_one_game(pgn_path):
+  pytest.importorskip("chess")
+  with PgnIndex(pgn_path) as index:
+    game = index.read_game(2)
+    assert game.headers["Event"] == "Three"
+    assert [move.uci() for move in game.mainline_moves()] == ["f2f3", "e7e5", "g2g4", "d8h4"]
@@ -0,0 +1,104 @@
+import multiprocessing
+from collections import Counter
+
+import pytest
+
+from pgn_parallel import ConvertStats, iter_game_texts, parallel_records, split_pgn
+
+# Games of different lengths, so shard cuts land all over the place
+GAMES = [
+  f'[Event "Game {n}"]\n[Result "*"]\n\n' + " ".join(f"{move}. e4 e5" for move in range(1, n % 7 + 2)) + " *\n\n"
+  for n in range(40)
+]
+
+
+# Stands in for pgn_records.game_records: one record per movetext token, so
+# the tests don't need python-chess. Module level, so workers can reach it.
+def stub_records(text):
+  headers, _, movetext = text.partition("\n\n")
+  event = headers.splitlines()[0]
+  return [(event, index, token) for index, token in enumerate(movetext.split())]
+
+# Like stub_records, but a game whose movetext says "bad" can't be converted
+def strict_records(text):
+  if "bad" in text:
+    raise ValueError("malformed game")
+  return stub_records(text)
+
+def _write(tmp_path, games):
+  path = tmp_path / "games.pgn"
+  path.write_text("".join(games))
+  return str(path)
+
+def _sequential(games):
+  return [record for game in games for record in stub_records(game)]
+
+
+def test_shards_split_only_between_games(tmp_path):
+  pgn_path = _write(tmp_path, GAMES)
+  size = len("".join(GAMES))
+  for shard_size in (1, 50, 97, 200, 1000):
+    shards = split_pgn(pgn_path, shard_size)
+    # The shards cover the file exactly, in order
+    assert shards[0][0] == 0 and shards[-1][1] == size
+    assert all(end == next_start for (_, end), (next_start, _) in zip(shards, shards[1:]))
+    # A game straddling a cut goes whole into the shard where it starts
+    texts = [text for start, end in shards for text in iter_game_texts(pgn_path, start, end)]
+    assert texts == GAMES
+
+def test_file_smaller_than_a_shard(tmp_path):
+  pgn_path = _write(tmp_path, GAMES[:3])
+  size = len("".join(GAMES[:3]))
+  assert split_pgn(pgn_path) == [(0, size)]
+  assert list(iter_game_texts(pgn_path, 0, size)) == GAMES[:3]
+
+def test_ordered_records_match_a_sequential_pass(tmp_path):
+  pgn_path = _write(tmp_path, GAMES)
+  stats = ConvertStats()
+  records = list(parallel_records(pgn_path, workers=3, shard_size=120, batch_size=4,
+                                  stats=stats, window=2, convert=stub_records))
+  assert records == _sequential(GAMES)
+  totals = stats.totals()
+  assert totals.games == len(GAMES)
+  assert totals.records == len(records)
+
+def test_unordered_records_are_the_same_multiset(tmp_path):
+  pgn_path = _write(tmp_path, GAMES)
+  records = parallel_records(pgn_path, workers=3, ordered=False, shard_size=120, batch_size=4,
+                             convert=stub_records)
+  assert Counter(records) == Counter(_sequential(GAMES))
+
+def test_closing_early_stops_the_workers(tmp_path):
+  pgn_path = _write(tmp_path, GAMES * 5)
+  records = parallel_records(pgn_path, workers=2, shard_size=100, batch_size=2, queue_size=1,
+                             convert=stub_records)
+  assert next(records) == stub_records(GAMES[0])[0]
+  records.close()
+  assert multiprocessing.active_children() == []
+
+def test_malformed_game_is_skipped(tmp_path):
+  bad = '[Event "Bad"]\n[Result "*"]\n\n1. bad *\n\n'
+  games = GAMES[:20] + [bad] + GAMES[20:]
+  pgn_path = _write(tmp_path, games)
+  stats = ConvertStats()
+  records = list(parallel_records(pgn_path, workers=3, shard_size=120, batch_size=4,
+                                  stats=stats, convert=strict_records))
+  # Everything around the bad game still comes through, in file order
+  assert records == _sequential(GAMES)
+  totals = stats.totals()
+  assert (totals.games, totals.skipped, totals.records) == (len(GAMES), 1, len(records))
+  assert "skipped" in stats.table()
+
+def test_empty_file(tmp_path):
+  pgn_path = _write(tmp_path, [])
+  assert split_pgn(pgn_path) == []
+  assert list(parallel_records(pgn_path, workers=2, convert=stub_records)) == []
+
+def test_default_converter_follows_the_mainline(tmp_path):
+  pytest.importorskip("chess")
+  game = '[Event "Mainline"]\n[Result "1-0"]\n\n1. e4 (1. d4 d5) 1... e5 2. Qh5 {threat} Nc6 1-0\n'
+  pgn_path = _write(tmp_path, [game])
+  records = list(parallel_records(pgn_path, workers=1))
+  assert [move for _, move, _ in records] == ["e2e4", "e7e5", "d1h5", "b8c6"]
+  assert records[0][0] == "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
+  assert {result for _, _, result in records} == {"1-0"}
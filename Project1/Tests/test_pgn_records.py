@@ -0,0 +1,64 @@
+import io
+
+import pytest
+
+pytest.importorskip("chess")
+
+import pgn_records
+from pgn_records import iter_games, iter_records, load_pgn, read_records
+
+GOOD = '[Event "Good {n}"]\n[Result "1-0"]\n\n1. e4 e5 2. Qh5 Nc6 3. Bc4 Nf6 4. Qxf7# 1-0\n\n'
+# The white king can't reach e3 from e1
+BAD = '[Event "Bad"]\n[Result "0-1"]\n\n1. e4 e5 2. Ke3 Nc6 0-1\n\n'
+
+
+def test_mainline_only():
+  records = read_records(io.StringIO("1. e4 (1. d4 d5) 1... e5 {comment} 2. Nf3 $1 *\n"))
+  assert [move for _, move, _ in records] == ["e2e4", "e7e5", "g1f3"]
+  assert records[0] == ("rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1", "e2e4", "*")
+
+def test_bad_game_is_truncated_and_reading_goes_on(caplog):
+  pgn_file = io.StringIO(GOOD.format(n=1) + BAD + GOOD.format(n=2))
+  games = []
+  while True:
+    records = read_records(pgn_file)
+    if records is None:
+      break
+    games.append(records)
+
+  assert len(games) == 3
+  assert len(games[0]) == len(games[2]) == 7
+  # The bad game keeps the moves before the illegal one
+  assert games[1] == [("rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1", "e2e4", "0-1"),
+                      ("rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b KQkq - 0 1", "e7e5", "0-1")]
+  assert "Ke3" in caplog.text
+
+def _write(tmp_path, text):
+  path = tmp_path / "games.pgn"
+  path.write_text(text)
+  return str(path)
+
+def test_headers_only_skips_the_movetext(tmp_path):
+  pgn_path = _write(tmp_path, GOOD.format(n=1) + BAD + GOOD.format(n=2))
+  # Full parsing runs into the illegal move in the second game
+  games = load_pgn(pgn_path)
+  assert [len(game.errors) for game in games] == [0, 1, 0]
+  # Headers only never looks at the moves, so nothing goes wrong
+  headers = list(iter_games(pgn_path, headers_only=True))
+  assert [header["Event"] for header in headers] == ["Good 1", "Bad", "Good 2"]
+  assert all(not hasattr(header, "mainline_moves") for header in headers)
+
+def test_records_stream_one_game_at_a_time(tmp_path, monkeypatch):
+  pgn_path = _write(tmp_path, "".join(GOOD.format(n=n) for n in range(50)))
+  reads = []
+  read = pgn_records.read_records
+  monkeypatch.setattr(pgn_records, "read_records", lambda pgn_file: reads.append(1) or read(pgn_file))
+
+  records = iter_records(pgn_path)
+  for _ in range(7):
+    next(records)
+  # The first game's records came out before the second game was read
+  assert len(reads) == 1
+  next(records)
+  assert len(reads) == 2
+  assert sum(1 for _ in records) == 49 * 7 - 1
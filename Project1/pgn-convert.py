@@ -1,29 +1,22 @@
-import chess
-from chess import pgn
 import os
-from tqdm import tqdm
 
-files =["lichess_elite_2020-12.pgn"]#file for file in os.listdir("Data") if file.endswith(".pgn")]
+from pgn_records import iter_games, iter_records
 
-print(len(files))
+if __name__ == "__main__":
+  from tqdm import tqdm
 
-# Load_pgn takes a pgn file_path and returns an array of the files as now readable games
-def load_pgn(file_path):
-  games = []
-  with open(file_path, 'r') as pgn_file:
-    while True:
-      game = pgn.read_game(pgn_file)
-      if game is None:
-        break
-      games.append(game)
-  return games
+  files =["lichess_elite_2020-12.pgn"]#file for file in os.listdir("Data") if file.endswith(".pgn")]
 
-games = []
-i = 1
-for file in tqdm(files):
-  games.extend(load_pgn(f"Data/{file}"))
-  if i >= 2:
-    break
-  i += 1
+  game_count = 0
+  record_count = 0
+  i = 1
+  for file in tqdm(files):
+    for record in iter_records(f"Data/{file}"):
+      record_count += 1
+    for headers in iter_games(f"Data/{file}", headers_only=True):
+      game_count += 1
+    if i >= 2:
+      break
+    i += 1
 
-print(len(games))
\ No newline at end of file
+  print(game_count, record_count)
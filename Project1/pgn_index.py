@@ -0,0 +1,192 @@
+import io
+import mmap
+import os
+import re
+import struct
+import sys
+from collections import namedtuple
+
+# Sidecar layout: a small file header, then one fixed-size record per game
+INDEX_MAGIC = b"PGNIDX1\0"
+INDEX_SUFFIX = ".idx"
+# offset, length, WhiteElo, BlackElo, result, ECO, date as YYYYMMDD
+RECORD = struct.Struct("<QIHHB3sI")
+
+RESULT_CODES = {"*": 0, "1-0": 1, "0-1": 2, "1/2-1/2": 3}
+RESULT_NAMES = {code: name for name, code in RESULT_CODES.items()}
+
+INDEXED_TAGS = {b"WhiteElo", b"BlackElo", b"Result", b"ECO", b"Date", b"UTCDate"}
+TAG_PATTERN = re.compile(rb'^\[(\w+)\s+"(.*)"\]')
+ECO_PATTERN = re.compile(rb"[A-E]\d\d")
+
+GameEntry = namedtuple("GameEntry", "offset length white_elo black_elo result eco date")
+
+
+def _elo(value):
+  # Unrated players show up as "?" or "-"
+  return int(value) if value.isdigit() else 0
+
+def _date(value):
+  # "2020.12.31" -> 20201231, unknown parts ("????.??.??") count as 0
+  parts = value.split(".")
+  if len(parts) != 3:
+    return 0
+  year, month, day = (int(part) if part.isdigit() else 0 for part in parts)
+  return year * 10000 + month * 100 + day
+
+def _entry(offset, length, tags):
+  # Anything that isn't a real code ("?", junk, non-ascii bytes) is stored as ""
+  eco = tags.get(b"ECO", b"")
+  return GameEntry(
+    offset, length,
+    _elo(tags.get(b"WhiteElo", b"")),
+    _elo(tags.get(b"BlackElo", b"")),
+    RESULT_NAMES[RESULT_CODES.get(tags.get(b"Result", b"*").decode("ascii", "replace"), 0)],
+    eco.decode("ascii") if ECO_PATTERN.fullmatch(eco) else "",
+    _date(tags.get(b"Date", tags.get(b"UTCDate", b"")).decode("ascii", "replace")),
+  )
+
+
+# scan_pgn reads a pgn file once, line by line, and yields a GameEntry per game.
+# Only the tag lines are looked at; movetext is skipped without parsing.
+# A game starts at the first tag line after movetext (or at the top of the file).
+def scan_pgn(pgn_path):
+  with open(pgn_path, "rb") as pgn_file:
+    start = None
+    tags = {}
+    in_headers = False
+    offset = 0
+    for line in pgn_file:
+      if line.startswith(b"["):
+        if not in_headers:
+          if start is not None:
+            yield _entry(start, offset - start, tags)
+          start = offset
+          tags = {}
+          in_headers = True
+        match = TAG_PATTERN.match(line)
+        if match and match.group(1) in INDEXED_TAGS:
+          tags[match.group(1)] = match.group(2)
+      elif line.strip():
+        in_headers = False
+      offset += len(line)
+    if start is not None:
+      yield _entry(start, offset - start, tags)
+
+def _pack(entry):
+  return RECORD.pack(entry.offset, entry.length, min(entry.white_elo, 0xFFFF),
+                     min(entry.black_elo, 0xFFFF), RESULT_CODES[entry.result],
+                     entry.eco.encode("ascii").ljust(3, b"\0"), entry.date)
+
+def _unpack(data, position):
+  offset, length, white_elo, black_elo, result, eco, date = RECORD.unpack_from(data, position)
+  return GameEntry(offset, length, white_elo, black_elo, RESULT_NAMES[result],
+                   eco.rstrip(b"\0").decode("ascii"), date)
+
+
+# build_index writes the sidecar next to the pgn (Data/x.pgn -> Data/x.pgn.idx)
+# and returns its path and the number of games indexed.
+def build_index(pgn_path, index_path=None):
+  index_path = index_path or pgn_path + INDEX_SUFFIX
+  count = 0
+  with open(index_path + ".tmp", "wb") as index_file:
+    index_file.write(INDEX_MAGIC)
+    index_file.write(struct.pack("<Q", os.path.getsize(pgn_path)))
+    for entry in scan_pgn(pgn_path):
+      index_file.write(_pack(entry))
+      count += 1
+  # Only replace an old index once the new one is complete
+  os.replace(index_path + ".tmp", index_path)
+  return index_path, count
+
+
+class PgnIndex:
+  """
+  Random access to the games of an indexed pgn file. The pgn is memory
+  mapped, so only the games that are actually read get paged in.
+
+    with PgnIndex("Data/lichess_elite_2020-12.pgn") as index:
+      for game in index.games(lambda g: g.white_elo > 2500 and g.eco == "B90"):
+        ...
+  """
+
+  def __init__(self, pgn_path, index_path=None, rebuild=False):
+    index_path = index_path or pgn_path + INDEX_SUFFIX
+    if rebuild or not self._is_current(pgn_path, index_path):
+      build_index(pgn_path, index_path)
+    with open(index_path, "rb") as index_file:
+      self._records = index_file.read()[len(INDEX_MAGIC) + 8:]
+
+    self._pgn_file = open(pgn_path, "rb")
+    # mmap refuses empty files, and an empty file has no games to read anyway
+    if os.path.getsize(pgn_path):
+      self._map = mmap.mmap(self._pgn_file.fileno(), 0, access=mmap.ACCESS_READ)
+    else:
+      self._map = None
+
+  @staticmethod
+  def _is_current(pgn_path, index_path):
+    # The index is stale if the pgn has changed size since it was built
+    try:
+      with open(index_path, "rb") as index_file:
+        header = index_file.read(len(INDEX_MAGIC) + 8)
+    except OSError:
+      return False
+    if len(header) < len(INDEX_MAGIC) + 8 or not header.startswith(INDEX_MAGIC):
+      return False
+    return struct.unpack_from("<Q", header, len(INDEX_MAGIC))[0] == os.path.getsize(pgn_path)
+
+  def __len__(self):
+    return len(self._records) // RECORD.size
+
+  def __getitem__(self, n):
+    if n < 0:
+      n += len(self)
+    if not 0 <= n < len(self):
+      raise IndexError("game index out of range")
+    return _unpack(self._records, n * RECORD.size)
+
+  def __iter__(self):
+    for position in range(0, len(self._records), RECORD.size):
+      yield _unpack(self._records, position)
+
+  def select(self, predicate=None):
+    """Entries of the games predicate accepts (every game without one)"""
+    for entry in self:
+      if predicate is None or predicate(entry):
+        yield entry
+
+  def text(self, entry):
+    """Raw pgn text of one game"""
+    return self._map[entry.offset:entry.offset + entry.length].decode("utf-8", "replace")
+
+  def read_game(self, entry):
+    """Parse one game; entry is a GameEntry or a game number"""
+    # Only parsing needs python-chess; scanning and indexing work without it
+    from chess import pgn
+
+    if not isinstance(entry, GameEntry):
+      entry = self[entry]
+    return pgn.read_game(io.StringIO(self.text(entry)))
+
+  def games(self, predicate=None):
+    """Parse only the games predicate accepts"""
+    for entry in self.select(predicate):
+      yield self.read_game(entry)
+
+  def close(self):
+    if self._map is not None:
+      self._map.close()
+    self._pgn_file.close()
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, *exc_info):
+    self.close()
+
+
+if __name__ == "__main__":
+  for path in sys.argv[1:]:
+    index_path, count = build_index(path)
+    print(f"{path}: {count} games -> {index_path}")
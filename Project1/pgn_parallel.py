@@ -0,0 +1,253 @@
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+import traceback
+from collections import namedtuple
+
+# Shards are cut roughly this far apart, then moved forward to a game start
+SHARD_SIZE = 32 * 1024 * 1024
+BATCH_SIZE = 1024  # records per message from a worker
+QUEUE_SIZE = 64  # batches in flight before workers block
+
+WorkerStats = namedtuple("WorkerStats", "worker shards games skipped records bytes seconds")
+
+
+def _is_game_start(line, seen_movetext):
+  return seen_movetext and line.startswith(b"[")
+
+# split_pgn cuts a pgn file into (start, end) byte ranges that each begin at a
+# game start, so every game lands in exactly one shard.
+def split_pgn(pgn_path, shard_size=SHARD_SIZE):
+  size = os.path.getsize(pgn_path)
+  cuts = [0]
+  with open(pgn_path, "rb") as pgn_file:
+    cut = shard_size
+    while cut < size:
+      pgn_file.seek(cut)
+      # The first line is probably cut in half, so it can't be trusted
+      pgn_file.readline()
+      seen_movetext = False
+      position = pgn_file.tell()
+      for line in iter(pgn_file.readline, b""):
+        if _is_game_start(line, seen_movetext):
+          break
+        if line.strip() and not line.startswith(b"["):
+          seen_movetext = True
+        position += len(line)
+      else:
+        position = size
+      if position >= size:
+        break
+      if position > cuts[-1]:
+        cuts.append(position)
+      cut = max(cut + shard_size, position + 1)
+  cuts.append(size)
+  return [(start, end) for start, end in zip(cuts, cuts[1:]) if end > start]
+
+# Yields the text of each game in a byte range that starts at a game start
+def iter_game_texts(pgn_path, start, end):
+  with open(pgn_path, "rb") as pgn_file:
+    pgn_file.seek(start)
+    position = start
+    lines = []
+    seen_movetext = False
+    while position < end:
+      line = pgn_file.readline()
+      if not line:
+        break
+      if _is_game_start(line, seen_movetext):
+        yield b"".join(lines).decode("utf-8", "replace")
+        lines = []
+        seen_movetext = False
+      elif line.strip() and not line.startswith(b"["):
+        seen_movetext = True
+      lines.append(line)
+      position += len(line)
+    if lines:
+      yield b"".join(lines).decode("utf-8", "replace")
+
+def _worker(worker_id, pgn_path, tasks, results, batch_size, convert):
+  shards = games = skipped = records = size = 0
+  busy = 0.0
+  try:
+    if convert is None:
+      # Imported here so splitting and scheduling don't need python-chess
+      from pgn_records import game_records as convert
+    for shard_id, start, end in iter(tasks.get, None):
+      started = time.perf_counter()
+      batch = []
+      for text in iter_game_texts(pgn_path, start, end):
+        # A game that can't be converted is skipped and counted, so one bad
+        # game doesn't end the whole run
+        try:
+          game = list(convert(text))
+        except Exception:
+          skipped += 1
+          continue
+        games += 1
+        for record in game:
+          batch.append(record)
+          if len(batch) >= batch_size:
+            busy += time.perf_counter() - started
+            results.put(("batch", shard_id, batch, False))
+            started = time.perf_counter()
+            records += len(batch)
+            batch = []
+      records += len(batch)
+      shards += 1
+      size += end - start
+      busy += time.perf_counter() - started
+      results.put(("batch", shard_id, batch, True))
+    results.put(("done", worker_id, WorkerStats(worker_id, shards, games, skipped, records, size, busy), None))
+  except Exception:
+    results.put(("error", worker_id, traceback.format_exc(), None))
+
+
+class ConvertStats:
+  """Per-worker and overall throughput of a parallel_records run"""
+
+  def __init__(self):
+    self.workers = {}
+    self.seconds = 0.0
+
+  def totals(self):
+    return WorkerStats("all", *(sum(getattr(stats, field) for stats in self.workers.values())
+                                for field in WorkerStats._fields[1:-1]), self.seconds)
+
+  def table(self):
+    lines = [f"{'worker':>8}{'shards':>8}{'games':>10}{'skipped':>9}{'records':>12}{'MB':>9}{'games/s':>10}"]
+    for stats in list(self.workers.values()) + [self.totals()]:
+      rate = stats.games / stats.seconds if stats.seconds else 0.0
+      lines.append(f"{stats.worker:>8}{stats.shards:>8}{stats.games:>10}{stats.skipped:>9}{stats.records:>12}"
+                   f"{stats.bytes / 1e6:>9.1f}{rate:>10.0f}")
+    return "\n".join(lines)
+
+
+# parallel_records yields the (fen, move, result) records of every game in the
+# file, parsed by a pool of worker processes. Workers send batches back through
+# a bounded queue, so a slow consumer holds them up instead of filling memory.
+# With ordered=True records come out in file order; otherwise batches are
+# yielded as they arrive, which keeps every worker busy. Pass a ConvertStats to
+# get per-worker throughput once the generator is exhausted.
+#
+# In ordered mode records that arrive ahead of their turn are buffered until
+# the shards before them finish. At most window shards (2 per worker by
+# default) are handed out at once, so peak memory is about window * shard_size
+# worth of records; lower either one to trade throughput for memory.
+# convert turns one game's text into records and defaults to
+# pgn_records.game_records; it must be a module level function so worker
+# processes can reach it. Games it raises on are skipped and counted in
+# ConvertStats instead of stopping the run.
+def parallel_records(pgn_path, workers=None, ordered=True, shard_size=SHARD_SIZE,
+                     batch_size=BATCH_SIZE, queue_size=QUEUE_SIZE, stats=None,
+                     window=None, convert=None):
+  workers = workers or os.cpu_count() or 1
+  shards = split_pgn(pgn_path, shard_size)
+  if not shards:
+    return
+  workers = max(1, min(workers, len(shards)))
+  started = time.perf_counter()
+
+  context = multiprocessing.get_context()
+  tasks = context.Queue()
+  results = context.Queue(maxsize=queue_size)
+  processes = [context.Process(target=_worker, args=(worker_id, pgn_path, tasks, results, batch_size, convert),
+                               daemon=True)
+               for worker_id in range(workers)]
+  for process in processes:
+    process.start()
+
+  # In ordered mode only a window of shards is handed out at a time, so the
+  # shards waiting behind a slow one can't pile up without limit
+  if not ordered:
+    window = len(shards)
+  window = max(1, window or 2 * workers)
+  submitted = 0
+
+  def submit_up_to(limit):
+    nonlocal submitted
+    while submitted < min(limit, len(shards)):
+      tasks.put((submitted, *shards[submitted]))
+      submitted += 1
+      if submitted == len(shards):
+        for _ in processes:
+          tasks.put(None)
+
+  buffered = {}  # shard id -> batches waiting for their turn
+  finished = set()
+  next_shard = 0
+  running = workers
+  try:
+    submit_up_to(window)
+    while running:
+      kind, key, payload, last = results.get()
+      if kind == "error":
+        raise RuntimeError(f"worker {key} failed:\n{payload}")
+      if kind == "done":
+        running -= 1
+        if stats is not None:
+          stats.workers[key] = payload
+        continue
+
+      if not ordered:
+        yield from payload
+        continue
+
+      if key == next_shard:
+        yield from payload
+      else:
+        buffered.setdefault(key, []).append(payload)
+      if last:
+        finished.add(key)
+      # Move on past every shard that is complete, emitting what they buffered
+      while next_shard in finished:
+        finished.discard(next_shard)
+        next_shard += 1
+        for batch in buffered.pop(next_shard, ()):
+          yield from batch
+      submit_up_to(next_shard + window)
+  finally:
+    for process in processes:
+      if process.is_alive() and running:
+        process.terminate()
+    for process in processes:
+      process.join()
+    if stats is not None:
+      stats.seconds = time.perf_counter() - started
+
+
+def main(argv=None):
+  parser = argparse.ArgumentParser(description="Convert a pgn file to (fen, move, result) records in parallel")
+  parser.add_argument("pgn", help="pgn file to convert")
+  parser.add_argument("--output", help="write records here as tab separated lines")
+  parser.add_argument("--workers", type=int, default=None, help="worker processes (default: every core)")
+  parser.add_argument("--unordered", action="store_true", help="faster, records in no fixed order")
+  parser.add_argument("--shard-mb", type=int, default=SHARD_SIZE // (1024 * 1024),
+                      help="approximate shard size in MB")
+  parser.add_argument("--window", type=int, default=None,
+                      help="shards in flight when ordered (default: 2 per worker); bounds buffered records")
+  args = parser.parse_args(argv)
+
+  stats = ConvertStats()
+  records = parallel_records(args.pgn, args.workers, not args.unordered,
+                             args.shard_mb * 1024 * 1024, stats=stats, window=args.window)
+  count = 0
+  output = open(args.output, "w") if args.output else None
+  try:
+    for fen, move, result in records:
+      count += 1
+      if output:
+        output.write(f"{fen}\t{move}\t{result}\n")
+  finally:
+    if output:
+      output.close()
+
+  print(stats.table())
+  print(f"{count} records in {stats.seconds:.1f}s")
+  return 0
+
+
+if __name__ == "__main__":
+  sys.exit(main())
@@ -0,0 +1,81 @@
+import io
+import logging
+
+from chess import pgn
+
+LOGGER = logging.getLogger(__name__)
+
+
+# Collects one game's mainline as (fen, uci) pairs without building a game tree.
+# Like python-chess's GameBuilder it doesn't raise on a bad move: the error is
+# logged and kept in errors, and the game stops at the last good move.
+class MainlineVisitor(pgn.BaseVisitor):
+
+  def begin_game(self):
+    self.headers = pgn.Headers()
+    self.moves = []
+    self.errors = []
+
+  def visit_header(self, tagname, tagvalue):
+    self.headers[tagname] = tagvalue
+
+  def begin_variation(self):
+    # Side lines aren't part of the game that was played
+    return pgn.SKIP
+
+  def visit_move(self, board, move):
+    # board is the position before move is played
+    self.moves.append((board.fen(), move.uci()))
+
+  def handle_error(self, error):
+    # read_game skips the rest of the mainline after this
+    LOGGER.error("%s while parsing game %r", error, self.headers.get("Event", "?"))
+    self.errors.append(error)
+
+  def result(self):
+    return self.headers, self.moves
+
+
+# read_records reads the next game from an open pgn file and returns its
+# (fen, move, result) records, or None once the file is exhausted.
+def read_records(pgn_file):
+  game = pgn.read_game(pgn_file, Visitor=MainlineVisitor)
+  if game is None:
+    return None
+  headers, moves = game
+  result = headers.get("Result", "*")
+  return [(fen, move, result) for fen, move in moves]
+
+# game_records turns the text of one game into its (fen, move, result) records
+def game_records(text):
+  return read_records(io.StringIO(text)) or []
+
+
+# iter_games takes a pgn file_path and yields its games one at a time, so only
+# one game is ever held in memory. With headers_only it yields just the
+# headers and skips over the movetext without parsing it.
+def iter_games(file_path, headers_only=False):
+  with open(file_path, 'r') as pgn_file:
+    while True:
+      if headers_only:
+        game = pgn.read_headers(pgn_file)
+      else:
+        game = pgn.read_game(pgn_file)
+      if game is None:
+        break
+      yield game
+
+# iter_records yields a (fen, move, result) record for every mainline move of
+# every game in the file. Memory stays bounded by the longest single game.
+def iter_records(file_path):
+  with open(file_path, 'r') as pgn_file:
+    while True:
+      records = read_records(pgn_file)
+      if records is None:
+        break
+      yield from records
+
+# Load_pgn takes a pgn file_path and returns an array of the files as now readable games.
+# Everything is kept in memory, so prefer iter_games / iter_records for big files.
+def load_pgn(file_path):
+  return list(iter_games(file_path))